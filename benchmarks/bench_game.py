@@ -0,0 +1,173 @@
+"""
+Game logic benchmarks: the inbound command parser, GameState.process_input
+and process_batch on synthetic command streams and GameState.update per
+simulation tick.
+"""
+import contextlib
+import io
+from harness import NullLink
+from config import (STATE_MENU, STATE_PLAYING, STATE_PAUSED, STATE_GAMEOVER, STATE_WAITING_P2,
+                    STATE_WINNER, SIM_TICK_MS)
+from comms import CommandAssembler, encode_frame, PROTOCOL_VERSION, OP_POT, OP_BTN
+from game_clock import ManualClock
+from game_state import GameState
+from moles import HOLE_UP
+
+# Potentiometer positions selecting a menu entry (see GameState.update)
+POT_EASY = 100
+POT_MULTIPLAYER = 700
+
+STATES = {
+    'menu': STATE_MENU,
+    'playing': STATE_PLAYING,
+    'paused': STATE_PAUSED,
+    'gameover': STATE_GAMEOVER,
+    'waiting_p2': STATE_WAITING_P2,
+    'winner': STATE_WINNER,
+}
+
+def make_game(state, seed=1):
+    """
+    Builds a GameState on a manual clock and drives it into the given state
+    through its normal inputs. Playing games get "infinite" lives so they
+    stay in play for the whole benchmark.
+    """
+    clock = ManualClock(1000)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = GameState(NullLink(), clock=clock, seed=seed)
+        multiplayer = state in (STATE_WAITING_P2, STATE_WINNER)
+        game.process_input(f"POT:{POT_MULTIPLAYER if multiplayer else POT_EASY}")
+        game.update()
+        if state != STATE_MENU:
+            game.process_input("BTN:CONFIRM")
+            game.lives = 10**9
+        if state == STATE_PAUSED:
+            game.process_input("BTN:CONFIRM")
+        elif state in (STATE_GAMEOVER, STATE_WAITING_P2):
+            game.stop_game()
+        elif state == STATE_WINNER:
+            game.stop_game()
+            game.start_next_player()
+            game.stop_game()
+    assert game.state == state, f"could not reach state {state}"
+    return game
+
+def live_hole(game):
+    for hole, state in enumerate(game.moles.state):
+        if state == HOLE_UP: return hole
+    return None
+
+# ==========================================
+#  PARSER (bytes -> commands)
+# ==========================================
+
+def _command_stream(count):
+    """ POT flood with a button press every 8 commands, like a fast player. """
+    commands = []
+    for i in range(count):
+        if i % 8 == 7: commands.append((OP_BTN, i % 9))
+        else: commands.append((OP_POT, (i * 37) % 1024))
+    return commands
+
+def bench_parser_ascii():
+    commands = _command_stream(5000)
+    data = b"".join((f"POT:{v}\n" if op == OP_POT else f"BTN:{v}\n").encode() for op, v in commands)
+    # Feed in UART-sized chunks
+    chunks = [data[i:i + 32] for i in range(0, len(data), 32)]
+    def run():
+        out = []
+        assembler = CommandAssembler(lambda ts, cmd: out.append(cmd))
+        for chunk in chunks:
+            assembler.feed(chunk, 0.0)
+    return run, len(commands)
+
+def bench_parser_binary():
+    commands = _command_stream(5000)
+    data = b"".join(encode_frame(op, v) for op, v in commands)
+    chunks = [data[i:i + 32] for i in range(0, len(data), 32)]
+    def run():
+        out = []
+        assembler = CommandAssembler(lambda ts, cmd: out.append(cmd))
+        assembler.protocol_version = PROTOCOL_VERSION
+        for chunk in chunks:
+            assembler.feed(chunk, 0.0)
+    return run, len(commands)
+
+# ==========================================
+#  process_input
+# ==========================================
+
+def bench_input_pot_flood_menu():
+    game = make_game(STATE_MENU)
+    commands = [f"POT:{(i * 37) % 1024}" for i in range(5000)]
+    def run():
+        for cmd in commands:
+            game.process_input(cmd)
+    return run, len(commands)
+
+def bench_input_pot_flood_playing():
+    game = make_game(STATE_PLAYING)
+    # Jitter below the auto-pause threshold around the start position
+    commands = [f"POT:{POT_EASY + (i % 21) - 10}" for i in range(5000)]
+    def run():
+        for cmd in commands:
+            game.process_input(cmd)
+    return run, len(commands)
+
+def bench_input_button_miss():
+    game = make_game(STATE_PLAYING)
+    mole = live_hole(game)
+    commands = [f"BTN:{b}" for b in range(9) if b != mole] * 500
+    def run():
+        for cmd in commands:
+            game.process_input(cmd)
+    return run, len(commands)
+
+def bench_input_button_hit():
+    """ Every press hits; the board is reset and a new mole spawned after each (included). """
+    game = make_game(STATE_PLAYING)
+    count = 2000
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):   # Bonus life messages
+            for _ in range(count):
+                game.process_input(f"BTN:{live_hole(game)}")
+                game.moles.reset()
+                game.spawn_mole()
+    return run, count
+
+def bench_input_pot_burst_batched():
+    """ Steps of 7 jittery pot samples and a button, one process_batch per step (coalesced). """
+    game = make_game(STATE_PLAYING)
+    mole = live_hole(game)
+    steps = [[f"POT:{POT_EASY + (s + i) % 21 - 10}" for i in range(7)] + [f"BTN:{(mole + 1) % 9}"]
+             for s in range(625)]
+    def run():
+        for batch in steps:
+            game.process_batch(batch)
+    return run, sum(len(batch) for batch in steps)
+
+# ==========================================
+#  update() per tick
+# ==========================================
+
+def _update_bench(name):
+    def bench():
+        game = make_game(STATES[name])
+        clock = game.clock
+        ticks = 5000
+        def run():
+            for _ in range(ticks):
+                clock.advance(SIM_TICK_MS)
+                game.update()
+        return run, ticks
+    return bench
+
+BENCHMARKS = [
+    ("parser.ascii", bench_parser_ascii),
+    ("parser.binary", bench_parser_binary),
+    ("input.pot_flood_menu", bench_input_pot_flood_menu),
+    ("input.pot_flood_playing", bench_input_pot_flood_playing),
+    ("input.button_miss", bench_input_button_miss),
+    ("input.button_hit", bench_input_button_hit),
+    ("input.pot_burst_batched", bench_input_pot_burst_batched),
+] + [(f"update.{name}", _update_bench(name)) for name in STATES]
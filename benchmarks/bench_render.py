@@ -0,0 +1,54 @@
+"""
+Renderer benchmarks: renderer.draw() per frame for every game state.
+Frames are drawn into the (dummy) display surface and never flipped, so
+only drawing is measured.
+"""
+import pygame
+import renderer
+from config import STATE_PLAYING, HAMMER_SWING_DURATION
+from bench_game import make_game, STATES
+
+FRAMES = 200
+FRAME_MS = 16   # ~60 FPS worth of animation between frames
+
+def _playing_bench(full_repaint):
+    """
+    Gameplay with moles rising, hiding and getting whacked and a hammer
+    swing every few frames. The game advances one frame's worth of ticks
+    between frames (included, it is small next to drawing).
+    """
+    def bench():
+        screen = pygame.display.get_surface()
+        game = make_game(STATE_PLAYING)
+        clock = game.clock
+        renderer.draw(screen, game)   # Loads the assets outside the timing
+        def run():
+            for frame in range(FRAMES):
+                clock.advance(FRAME_MS)
+                game.update()
+                if frame % 8 == 0:
+                    game.is_hammering = True
+                    game.hammer_target_index = frame % 9
+                    game.hammer_start_time = clock.get_ticks() - HAMMER_SWING_DURATION // 3
+                if full_repaint:
+                    renderer.invalidate(screen)
+                renderer.draw(screen, game)
+        return run, FRAMES
+    return bench
+
+def _state_bench(name):
+    """ Static screens: every draw() is a full repaint. """
+    def bench():
+        screen = pygame.display.get_surface()
+        game = make_game(STATES[name])
+        renderer.draw(screen, game)
+        def run():
+            for _ in range(FRAMES):
+                renderer.draw(screen, game)
+        return run, FRAMES
+    return bench
+
+BENCHMARKS = [
+    ("render.playing", _playing_bench(False)),
+    ("render.playing_full", _playing_bench(True)),
+] + [(f"render.{name}", _state_bench(name)) for name in STATES if name != 'playing']
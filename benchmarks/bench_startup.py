@@ -0,0 +1,65 @@
+"""
+Startup: a fresh interpreter runs main.py's startup path up to the first
+frame on screen (mixer, pygame, window, asset loading, GameState, first draw),
+without the setup screen or a controller.
+
+startup.cold starts every run with an empty asset cache (first start after an
+install or an asset change); startup.warm_cache reuses the cache the first run
+filled, like every later start.
+"""
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from harness import GUI_DIR
+
+STARTUP_SCRIPT = """
+import os, sys
+sys.path.insert(0, {gui_dir!r})
+import config
+config.ASSET_CACHE_DIR = {cache_dir!r}     # Before asset_loader creates its loader
+import pygame
+from config import SCREEN_WIDTH, SCREEN_HEIGHT
+from audio import init_mixer
+init_mixer()
+pygame.init()
+screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+import renderer
+from game_state import GameState, preload_sounds
+renderer.preload()
+preload_sounds()
+class NullLink:
+    def send(self, message): pass
+game = GameState(NullLink())
+renderer.draw(screen, game)
+pygame.display.flip()
+"""
+
+def run_startup(cache_dir):
+    """ One startup in a new interpreter, with the asset cache in cache_dir. """
+    script = STARTUP_SCRIPT.format(gui_dir=GUI_DIR, cache_dir=cache_dir)
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def bench_startup_cold():
+    def run():
+        cache_dir = tempfile.mkdtemp(prefix="wam-bench-cache-")
+        try:
+            run_startup(cache_dir)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return run, 1
+
+def bench_startup_warm_cache():
+    cache_dir = tempfile.mkdtemp(prefix="wam-bench-cache-")
+    atexit.register(shutil.rmtree, cache_dir, True)
+    run_startup(cache_dir)  # Fills the cache
+    return (lambda: run_startup(cache_dir)), 1
+
+BENCHMARKS = [
+    ("startup.cold", bench_startup_cold),
+    ("startup.warm_cache", bench_startup_warm_cache),
+]
@@ -0,0 +1,138 @@
+"""
+Timing, result files and baseline comparison for the benchmark suite.
+
+A benchmark is a function that does its setup and returns (run, ops):
+run() performs ops operations and is timed over several rounds with the
+garbage collector off. The reported value is the median time per operation
+(microseconds); the min and every round are kept for reference.
+"""
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+# Headless: must be set before pygame is imported anywhere
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GUI_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'python_GUI')
+if GUI_DIR not in sys.path:
+    sys.path.insert(0, GUI_DIR)
+
+RESULT_FORMAT = "wam-bench"
+RESULT_VERSION = 1
+
+class NullLink:
+    """ Stands in for the serial manager: GameState only needs send(). """
+    def send(self, message):
+        pass
+
+    def tx_queue_depth(self):
+        return 0
+
+def init_pygame():
+    """ Mixer, pygame and a window, in the order main.py uses. Returns the screen. """
+    import pygame
+    from config import SCREEN_WIDTH, SCREEN_HEIGHT
+    from audio import init_mixer
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_mixer()
+    pygame.init()
+    return pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+def measure(func, rounds=7, warmup=1, min_time=0.1):
+    """
+    Runs a benchmark and returns its result dict.
+    :param func: Benchmark function returning (run, ops)
+    :param min_time: Seconds per round; run() is repeated within a round until
+                     it lasts at least this long, so short benchmarks are not
+                     dominated by timer and scheduler noise
+    """
+    run, ops = func()
+    for _ in range(warmup):
+        start = time.perf_counter()
+        run()
+        single = time.perf_counter() - start
+    repeat = max(1, math.ceil(min_time / single)) if warmup and single > 0 else 1
+
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(repeat):
+                run()
+            times.append((time.perf_counter_ns() - start) / 1000.0 / (ops * repeat))
+    finally:
+        if gc_was_enabled: gc.enable()
+    ordered = sorted(times)
+    return {
+        'unit': 'us',
+        'ops': ops * repeat,
+        'median': ordered[len(ordered) // 2],
+        'min': ordered[0],
+        'rounds': [round(t, 3) for t in times],
+    }
+
+def environment():
+    """ Where the numbers come from (results are only comparable on the same machine). """
+    import pygame
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'sdl': ".".join(str(v) for v in pygame.get_sdl_version()),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'node': platform.node(),
+    }
+
+def write_results(path, results):
+    data = {'format': RESULT_FORMAT, 'version': RESULT_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': environment(), 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('format') != RESULT_FORMAT:
+        raise ValueError(f"{path} is not a benchmark result file")
+    return data
+
+def compare(results, baseline, tolerance):
+    """
+    Compares medians against a baseline.
+    Returns (report lines, names of benchmarks slower than baseline * (1 + tolerance)).
+    """
+    lines = [f"{'benchmark':<36}{'baseline':>12}{'now':>12}{'change':>9}  status"]
+    regressions = []
+    for name in sorted(results):
+        now = results[name]['median']
+        old = baseline.get(name)
+        if old is None:
+            lines.append(f"{name:<36}{'-':>12}{now:>12.3f}{'':>9}  new")
+            continue
+        change = now / old['median'] - 1.0 if old['median'] > 0 else 0.0
+        if change > tolerance:
+            status = "SLOWER"
+            regressions.append(name)
+        elif change < -tolerance:
+            status = "faster"
+        else:
+            status = "ok"
+        lines.append(f"{name:<36}{old['median']:>12.3f}{now:>12.3f}{change * 100:>8.1f}%  {status}")
+    for name in sorted(set(baseline) - set(results)):
+        lines.append(f"{name:<36}{baseline[name]['median']:>12.3f}{'-':>12}{'':>9}  not run")
+    return lines, regressions
@@ -0,0 +1,85 @@
+"""
+Benchmark suite runner (headless, SDL dummy video/audio drivers).
+
+    python benchmarks/run.py                     # run all, compare with the baseline if there is one
+    python benchmarks/run.py -k render           # only benchmarks whose name contains 'render'
+    python benchmarks/run.py --save-baseline     # store this run as the new baseline
+    python benchmarks/run.py --tolerance 0.10    # fail on a median more than 10% slower
+
+Results go to benchmarks/results/latest.json (times in microseconds per
+operation). With a baseline (benchmarks/baseline.json) every benchmark is
+compared by median and the exit status is 1 if any got slower than the
+tolerance allows. Benchmarks that look slower are measured again (--retries)
+and only fail if they stay slower, so a noisy moment does not fail the run.
+Baselines are per machine: save one before a change, then run again after it.
+"""
+import argparse
+import os
+import sys
+from harness import BENCH_DIR, init_pygame, measure, write_results, load_results, compare
+
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+def collect():
+    """ (name, function) for every benchmark, in run order. """
+    import bench_game, bench_render, bench_startup
+    return bench_game.BENCHMARKS + bench_render.BENCHMARKS + bench_startup.BENCHMARKS
+
+def main():
+    parser = argparse.ArgumentParser(description="Whac-A-Mole benchmark suite")
+    parser.add_argument('-k', dest='pattern', help="Run only benchmarks whose name contains this")
+    parser.add_argument('--rounds', type=int, default=7, help="Timed rounds per benchmark (median is reported)")
+    parser.add_argument('--out', default=DEFAULT_RESULTS, help="Result file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline result file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.20, help="Allowed slowdown of the median (0.20 = 20%%)")
+    parser.add_argument('--retries', type=int, default=2, help="Re-measurements of a benchmark that looks slower")
+    args = parser.parse_args()
+
+    init_pygame()
+    benchmarks = {name: func for name, func in collect() if not args.pattern or args.pattern in name}
+    results = {}
+    for name, func in benchmarks.items():
+        result = measure(func, rounds=args.rounds)
+        results[name] = result
+        print(f"[BENCH] {name:<32}{result['median']:>12.3f} us/op  (min {result['min']:.3f}, {result['ops']} ops)")
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        data = load_results(args.baseline)
+        baseline = {name: r for name, r in data['results'].items() if not args.pattern or args.pattern in name}
+        _, regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            # Keep the best of a few more measurements before calling it a regression
+            for _ in range(args.retries):
+                retry = measure(benchmarks[name], rounds=args.rounds)
+                print(f"[BENCH] {name:<32}{retry['median']:>12.3f} us/op  (re-measured)")
+                if retry['median'] < results[name]['median']:
+                    results[name] = retry
+                if results[name]['median'] <= baseline[name]['median'] * (1.0 + args.tolerance):
+                    break
+
+    write_results(args.out, results)
+    print(f"[BENCH] Results saved to {args.out}")
+    if args.save_baseline:
+        write_results(args.baseline, results)
+        print(f"[BENCH] Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("[BENCH] No baseline to compare with (run with --save-baseline first)")
+        return 0
+    if data['environment'] != load_results(args.out)['environment']:
+        print("[BENCH] Warning: baseline was recorded on a different machine or software version")
+    lines, regressions = compare(results, baseline, args.tolerance)
+    print("\n".join(lines))
+    if regressions:
+        print(f"[BENCH] REGRESSION: {len(regressions)} benchmark(s) more than {args.tolerance * 100:.0f}% slower: "
+              + ", ".join(regressions))
+        return 1
+    print("[BENCH] No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
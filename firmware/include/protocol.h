@@ -0,0 +1,39 @@
+/**
+ * @file protocol.h
+ * @brief Opcodes and framing for the compact binary PIC <-> PC protocol.
+ * @details Every binary frame is 4 bytes: [OPCODE][VALUE_HI][VALUE_LO][CHECKSUM].
+ * Opcodes always have bit 7 set, ASCII text never does, so both protocols can
+ * share the line. CHECKSUM = OPCODE ^ VALUE_HI ^ VALUE_LO ^ FRAME_KEY.
+ *
+ * Handshake (always in ASCII): the PC sends "BIN:<version>\n", the PIC answers
+ * "BIN:OK:<version>\r\n" and sends binary frames from then on. "BIN:0\n" or an
+ * 'X' (exit) command switches the PIC back to ASCII. Old firmware simply
+ * ignores the request, so the PC stays on ASCII.
+ *
+ * Readiness: the PIC sends READY_BANNER after boot, and again whenever it
+ * receives PING_CHAR, so the PC can check the link without waiting for a reset.
+ */
+
+#ifndef PROTOCOL_H
+#define PROTOCOL_H
+
+// Highest binary protocol version understood by this firmware
+#define PROTOCOL_VERSION 1
+
+#define FRAME_SIZE  4
+#define FRAME_KEY   0x5A
+
+// --- Link check (ASCII in both modes) ---
+#define PING_CHAR       '?'
+#define READY_BANNER    "System Ready.\r\n"
+
+// --- PIC -> PC ---
+#define OP_POT      0x81    // value = 10-bit ADC reading
+#define OP_BTN      0x82    // value = game button index (0-8)
+#define OP_CONFIRM  0x83    // value unused
+
+// --- PC -> PIC ---
+#define OP_LED      0x90    // value = 'G', 'P', 'E' or 'X'
+#define OP_SCORE    0x91    // value = score (0-9999)
+
+#endif // PROTOCOL_H
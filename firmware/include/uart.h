@@ -1,26 +1,47 @@
-/**
- * @file uart.h
- * @brief Header file for UART (Bluetooth) communication.
- */
-
-#ifndef UART_H
-#define UART_H
-
-/**
- * @brief Initializes the UART module for 9600 baud rate.
- */
-void UART_Init(void);
-
-/**
- * @brief Sends a string over UART.
- * @param text Null-terminated string to send.
- */
-void UART_Write_Text(char *text);
-
-/**
- * @brief UART Receive Interrupt Handler.
- * Processes incoming commands from Python.
- */
-void UART_ISR_Handler(void);
-
-#endif
\ No newline at end of file
+/**
+ * @file uart.h
+ * @brief Header file for UART (Bluetooth) communication.
+ */
+
+#ifndef UART_H
+#define UART_H
+
+#include "protocol.h"
+
+/**
+ * @brief Initializes the UART module for 9600 baud rate.
+ */
+void UART_Init(void);
+
+/**
+ * @brief Sends a string over UART.
+ * @param text Null-terminated string to send.
+ */
+void UART_Write_Text(char *text);
+
+/**
+ * @brief Sends an input event to the PC in the negotiated protocol.
+ * Uses a 4-byte binary frame in binary mode, or the ASCII line otherwise
+ * ("POT:512", "BTN:3", "BTN:CONFIRM").
+ * @param opcode OP_POT, OP_BTN or OP_CONFIRM.
+ * @param value Event payload (ADC value or button index).
+ */
+void UART_Send_Event(unsigned char opcode, int value);
+
+/**
+ * @brief Completes pending protocol handshakes and answers pings.
+ * Must be called from the main loop (never from the ISR), since it blocks
+ * while the acknowledgement is transmitted.
+ */
+void UART_Service(void);
+
+/**
+ * @brief UART Receive Interrupt Handler.
+ * Processes incoming commands from Python.
+ */
+void UART_ISR_Handler(void);
+
+// 1 while events are sent as binary frames, 0 for ASCII
+extern volatile char uart_binary_mode;
+
+#endif
@@ -1,78 +1,191 @@
-/**
- * @file uart.c
- * @brief Implementation of UART communication.
- */
-
-#include "config.h"
-#include "uart.h"
-#include "display.h" // Needed to update Display based on RX
-#include <string.h>
-#include <stdlib.h>
-
-// Receive buffer for parsing commands (e.g., "SCR:100")
-volatile char rx_str[10];
-volatile int rx_idx = 0;
-
-void UART_Init(void) {
-    // Configure IO pins
-    TRISCbits.TRISC6 = 1; // TX usually driven by module, but set as input/output depending on datasheet recommendations
-    TRISCbits.TRISC7 = 1; // RX Must be Input
-    
-    // --- Baud Rate Generation ---
-    // Formula: Baud = Fosc / (16 * (SPBRG + 1))
-    // Target: 9600, Fosc: 4MHz
-    TXSTAbits.SYNC = 0;      // Asynchronous mode
-    BAUDCONbits.BRG16 = 0;   // 8-bit BRG
-    TXSTAbits.BRGH = 1;      // High Speed
-    SPBRG = 25;              // Calculated value for 9600
-    
-    // --- Enable Module ---
-    RCSTAbits.SPEN = 1;      // Serial Port Enable
-    TXSTAbits.TXEN = 1;      // Transmit Enable
-    RCSTAbits.CREN = 1;      // Continuous Receive Enable
-    
-    // --- Interrupts ---
-    PIE1bits.RCIE = 1;       // Enable Receive Interrupt
-}
-
-void UART_Write_Text(char *text) {
-    // Loop through string until null terminator
-    for(int i=0; text[i]!='\0'; i++) {
-        while(!TXSTAbits.TRMT); // Wait until Transmit Shift Register is empty
-        TXREG = text[i];        // Load data to transmit
-    }
-}
-
-void UART_ISR_Handler(void) {
-    // Check Receive Interrupt Flag
-    if (PIR1bits.RCIF) {
-        char rx = RCREG; // Read data (clears flag)
-        
-        // --- Single Character Commands ---
-        // Control LEDs based on Game State
-        if (rx == 'G' || rx == 'P' || rx == 'E' || rx == 'X') {
-            if(rx == 'X'){ 
-                Display_Update_Score(0); // Clear score on exit
-            }
-            Display_Set_LED(rx);
-            rx_idx = 0; // Reset buffer
-        }
-        
-        // --- String Parsing for Score ---
-        // Expecting format: "SCR:xxxx\n"
-        else if (rx == '\n' || rx == '\r') {
-            rx_str[rx_idx] = '\0'; // Null-terminate
-            rx_idx = 0;
-            
-            // Check prefix
-            if (strncmp((char*)rx_str, "SCR:", 4) == 0) {
-                int new_score = atoi((char*)&rx_str[4]);
-                Display_Update_Score(new_score);
-            }
-        } 
-        else if (rx_idx < 9) {
-            // Store char in buffer
-            rx_str[rx_idx++] = rx;
-        }
-    }
-}
\ No newline at end of file
+/**
+ * @file uart.c
+ * @brief Implementation of UART communication.
+ */
+
+#include "config.h"
+#include "uart.h"
+#include "display.h" // Needed to update Display based on RX
+#include <stdio.h>
+#include <string.h>
+#include <stdlib.h>
+
+// Receive buffer for parsing commands (e.g., "SCR:100")
+volatile char rx_str[10];
+volatile int rx_idx = 0;
+
+// --- Binary Protocol State ---
+volatile char uart_binary_mode = 0;
+// Version requested by the PC, acknowledged by UART_Service() (0 = none)
+volatile char bin_request = 0;
+// Set by the ISR when the PC pings, answered by UART_Service()
+volatile char ping_request = 0;
+
+// Receive buffer for binary frames: [OPCODE][VALUE_HI][VALUE_LO][CHECKSUM]
+volatile unsigned char rx_frame[FRAME_SIZE];
+volatile char rx_frame_idx = 0;
+
+// Buffer for ASCII event formatting
+char tx_buf[20];
+
+void UART_Init(void) {
+    // Configure IO pins
+    TRISCbits.TRISC6 = 1; // TX usually driven by module, but set as input/output depending on datasheet recommendations
+    TRISCbits.TRISC7 = 1; // RX Must be Input
+
+    // --- Baud Rate Generation ---
+    // Formula: Baud = Fosc / (16 * (SPBRG + 1))
+    // Target: 9600, Fosc: 4MHz
+    TXSTAbits.SYNC = 0;      // Asynchronous mode
+    BAUDCONbits.BRG16 = 0;   // 8-bit BRG
+    TXSTAbits.BRGH = 1;      // High Speed
+    SPBRG = 25;              // Calculated value for 9600
+
+    // --- Enable Module ---
+    RCSTAbits.SPEN = 1;      // Serial Port Enable
+    TXSTAbits.TXEN = 1;      // Transmit Enable
+    RCSTAbits.CREN = 1;      // Continuous Receive Enable
+
+    // --- Interrupts ---
+    PIE1bits.RCIE = 1;       // Enable Receive Interrupt
+}
+
+/**
+ * @brief Blocks until the transmitter is free, then sends one byte.
+ */
+static void UART_Write_Byte(unsigned char data) {
+    while(!TXSTAbits.TRMT); // Wait until Transmit Shift Register is empty
+    TXREG = data;           // Load data to transmit
+}
+
+void UART_Write_Text(char *text) {
+    // Loop through string until null terminator
+    for(int i=0; text[i]!='\0'; i++) {
+        UART_Write_Byte(text[i]);
+    }
+}
+
+void UART_Send_Event(unsigned char opcode, int value) {
+    if (uart_binary_mode) {
+        // --- Binary Frame (4 bytes) ---
+        unsigned char hi = (value >> 8) & 0xFF;
+        unsigned char lo = value & 0xFF;
+        UART_Write_Byte(opcode);
+        UART_Write_Byte(hi);
+        UART_Write_Byte(lo);
+        UART_Write_Byte(opcode ^ hi ^ lo ^ FRAME_KEY);
+        return;
+    }
+
+    // --- ASCII Line (legacy protocol) ---
+    if (opcode == OP_POT) sprintf(tx_buf, "POT:%d\r\n", value);
+    else if (opcode == OP_BTN) sprintf(tx_buf, "BTN:%d\r\n", value);
+    else if (opcode == OP_CONFIRM) strcpy(tx_buf, "BTN:CONFIRM\r\n");
+    else return;
+    UART_Write_Text(tx_buf);
+}
+
+void UART_Service(void) {
+    // Answer a link check with the boot banner
+    if (ping_request) {
+        ping_request = 0;
+        UART_Write_Text(READY_BANNER);
+    }
+
+    // Acknowledge a binary protocol request in ASCII, then switch over.
+    // The switch happens only after the ack is on the wire, so the PC
+    // always sees a clean boundary between the two protocols.
+    if (bin_request) {
+        char version = bin_request;
+        bin_request = 0;
+        if (version > PROTOCOL_VERSION) version = PROTOCOL_VERSION;
+        sprintf(tx_buf, "BIN:OK:%d\r\n", version);
+        UART_Write_Text(tx_buf);
+        uart_binary_mode = 1;
+    }
+}
+
+/**
+ * @brief Applies a single character LED command ('G', 'P', 'E', 'X').
+ */
+static void UART_Handle_LED(char cmd) {
+    if (cmd == 'X') {
+        Display_Update_Score(0); // Clear score on exit
+        uart_binary_mode = 0;    // Next session starts with a fresh handshake
+    }
+    Display_Set_LED(cmd);
+}
+
+/**
+ * @brief Validates and executes a complete binary frame.
+ */
+static void UART_Handle_Frame(void) {
+    unsigned char op = rx_frame[0];
+    unsigned char hi = rx_frame[1];
+    unsigned char lo = rx_frame[2];
+
+    // Drop corrupted frames silently
+    if ((op ^ hi ^ lo ^ FRAME_KEY) != rx_frame[3]) return;
+
+    if (op == OP_LED) UART_Handle_LED((char)lo);
+    else if (op == OP_SCORE) Display_Update_Score(((int)hi << 8) | lo);
+}
+
+void UART_ISR_Handler(void) {
+    // Check Receive Interrupt Flag
+    if (PIR1bits.RCIF) {
+        char rx = RCREG; // Read data (clears flag)
+
+        // --- Binary Frames ---
+        // Opcodes have bit 7 set; the following 3 bytes (any value) complete the frame
+        if (rx_frame_idx > 0) {
+            rx_frame[rx_frame_idx++] = rx;
+            if (rx_frame_idx == FRAME_SIZE) {
+                rx_frame_idx = 0;
+                UART_Handle_Frame();
+            }
+            return;
+        }
+        if ((unsigned char)rx & 0x80) {
+            rx_frame[0] = rx;
+            rx_frame_idx = 1;
+            return;
+        }
+
+        // --- Single Character Commands ---
+        // Control LEDs based on Game State
+        if (rx == 'G' || rx == 'P' || rx == 'E' || rx == 'X') {
+            UART_Handle_LED(rx);
+            rx_idx = 0; // Reset buffer
+        }
+
+        // --- Link Check ---
+        // Banner is sent from the main loop, the ISR must not block on TX
+        else if (rx == PING_CHAR) {
+            ping_request = 1;
+            rx_idx = 0;
+        }
+
+        // --- String Parsing for Score ---
+        // Expecting format: "SCR:xxxx\n" or "BIN:v\n"
+        else if (rx == '\n' || rx == '\r') {
+            rx_str[rx_idx] = '\0'; // Null-terminate
+            rx_idx = 0;
+
+            // Check prefix
+            if (strncmp((char*)rx_str, "SCR:", 4) == 0) {
+                int new_score = atoi((char*)&rx_str[4]);
+                Display_Update_Score(new_score);
+            }
+            else if (strncmp((char*)rx_str, "BIN:", 4) == 0) {
+                char version = (char)atoi((char*)&rx_str[4]);
+                if (version > 0) bin_request = version; // Ack sent from main loop
+                else uart_binary_mode = 0;              // Back to ASCII
+            }
+        }
+        else if (rx_idx < 9) {
+            // Store char in buffer
+            rx_str[rx_idx++] = rx;
+        }
+    }
+}
@@ -0,0 +1,300 @@
+"""
+Offline analysis of the telemetry logs (telemetry.py), for tuning
+GameState.get_speed() and hide_duration from real play.
+
+    python analytics.py                              # every log in telemetry/
+    python analytics.py telemetry/ kiosk2/ --mode hard
+
+Logs are memory-mapped as NumPy structured arrays and every statistic is a
+vectorized operation over the whole event array, so a season of kiosk play
+(millions of events) takes seconds. Reports:
+
+- reaction time distribution (percentiles + histogram) per difficulty
+- hits during the retreat window (whacked height ratio < 1)
+- per-hole heatmaps: hit rate, reaction time, misses
+- game length by number of bonus lives earned
+
+Needs NumPy (pip install numpy); the game itself does not.
+"""
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+from config import (TELEMETRY_DIR, BOARD_COLS, MODE_NAMES, MODE_MULTIPLAYER, MENU_QUIT,
+                    STATE_GAMEOVER, STATE_WAITING_P2, STATE_WINNER)
+from telemetry import (HEADER, RECORD, FILE_PATTERN, read_header, TEL_SPAWN, TEL_HIT, TEL_MISS, TEL_TIMEOUT,
+                       TEL_PAUSE, TEL_BONUS_LIFE, TEL_STATE, TEL_GAME)
+
+# Same layout as telemetry.RECORD ('<dBBHf')
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('kind', 'u1'), ('a', 'u1'), ('b', '<u2'), ('value', '<f4')])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+# A game (or multiplayer turn) is over when the board leaves play for one of these
+GAME_END_STATES = (STATE_GAMEOVER, STATE_WAITING_P2, STATE_WINNER)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+REACTION_BIN_MS = 100       # Histogram bucket width
+REACTION_MAX_MS = 1500      # Last bucket collects everything slower
+BONUS_MAX = 5               # Games with more bonus lives are grouped with this many
+SHADES = " .:-=+*#%@"       # Heatmap cell shading, low to high
+
+# ==========================================
+#  LOADING
+# ==========================================
+
+def find_logs(paths):
+    """ Log files named or found in the given directories, oldest first. """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, FILE_PATTERN))
+        else:
+            files.append(path)
+    # telemetry_<stamp>_<part>.wamt sorts chronologically
+    return sorted(set(files), key=os.path.basename)
+
+def run_of(path):
+    """ Parts written by one run of the game share the stamp in their name. """
+    return os.path.basename(path).rsplit('_', 1)[0]
+
+def map_log(path):
+    """ Read-only memory map of a log's records (a partial last record is ignored). """
+    with open(path, "rb") as f:
+        read_header(f)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count <= 0: return np.empty(0, RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+def load(paths):
+    """
+    Every record of the logs as one array, plus the run each record belongs to.
+    Returns (records, runs, number of files).
+    """
+    files = find_logs(paths)
+    maps = [map_log(path) for path in files]
+    if not maps: return np.empty(0, RECORD_DTYPE), np.empty(0, np.int32), 0
+    run_ids = {}
+    runs = [np.full(len(m), run_ids.setdefault(run_of(path), len(run_ids)), np.int32)
+            for path, m in zip(files, maps)]
+    return np.concatenate(maps), np.concatenate(runs), len(files)
+
+# ==========================================
+#  EVENTS -> GAMES
+# ==========================================
+
+class Events:
+    """
+    Decoded record columns with every event assigned to a game.
+    Events of one controller in one run stay in logged order; a game runs
+    from its TEL_GAME record to the next one (events before a run's first
+    game belong to no game, mode -1).
+    """
+    def __init__(self, records, runs):
+        controller = records['kind'] >> 4
+        # Group by run, then controller, keeping the logged order within each
+        order = np.lexsort((np.arange(len(records)), controller, runs))
+        records = records[order]
+        self.count = len(records)
+        self.event = records['kind'] & 0x0F
+        self.time = records['time']
+        self.a = records['a'].astype(np.int64)
+        self.b = records['b'].astype(np.int64)
+        self.value = records['value']
+
+        stream = runs[order].astype(np.int64) * 16 + controller[order]
+        new_stream = np.ones(self.count, bool)
+        new_stream[1:] = stream[1:] != stream[:-1]
+        starts = self.event == TEL_GAME
+        opens = starts | new_stream
+        first = np.flatnonzero(opens)               # First event of every segment
+        self.game = np.cumsum(opens) - 1            # Segment of every event
+        self.games = len(first)
+        self.game_mode = np.where(starts[first], self.a[first], -1)
+        self.mode = self.game_mode[self.game]       # Mode of every event (-1 outside games)
+
+        # Finished games: first end-of-game state change in the segment
+        ends = np.flatnonzero((self.event == TEL_STATE) & np.isin(self.a, GAME_END_STATES))
+        end_game, first_end = np.unique(self.game[ends], return_index=True)
+        end_time = np.full(self.games, np.nan)
+        end_time[end_game] = self.time[ends[first_end]]
+        # Pause length from the pause/resume timestamps (the record's 16-bit duration saturates)
+        pauses = np.flatnonzero(self.event == TEL_PAUSE)
+        begin, end = pauses[:-1], pauses[1:]
+        pair = (self.a[begin] == 1) & (self.a[end] == 0) & (self.game[begin] == self.game[end])
+        paused = np.bincount(self.game[end[pair]], weights=self.time[end[pair]] - self.time[begin[pair]],
+                             minlength=self.games)
+        self.game_length = end_time - self.time[first] - paused     # ms, NaN if not finished
+        self.finished = (self.game_mode >= 0) & ~np.isnan(self.game_length)
+        self.game_bonus = self.per_game(self.event == TEL_BONUS_LIFE)
+        self.game_hits = self.per_game(self.event == TEL_HIT)
+
+    def per_game(self, mask):
+        """ Number of masked events in every game. """
+        return np.bincount(self.game[mask], minlength=self.games)
+
+    def modes(self):
+        """ Modes that were played, in menu order. """
+        return [m for m in np.unique(self.game_mode) if 0 <= m < MENU_QUIT]
+
+# ==========================================
+#  STATISTICS
+# ==========================================
+
+def reaction_times(ev):
+    """ Per mode: hit count and reaction time percentiles, mean and histogram (ms). """
+    hits = ev.event == TEL_HIT
+    times, modes = ev.b[hits], ev.mode[hits]
+    bins = REACTION_MAX_MS // REACTION_BIN_MS + 1
+    # One bincount for every (mode, bucket) pair
+    bucket = np.minimum(times // REACTION_BIN_MS, bins - 1)
+    histogram = np.bincount((modes + 1) * bins + bucket, minlength=(MENU_QUIT + 1) * bins)
+    histogram = histogram.reshape(MENU_QUIT + 1, bins)[1:]
+    result = {}
+    for mode in ev.modes():
+        selected = times[modes == mode]
+        if len(selected) == 0: continue
+        result[mode] = {
+            'hits': len(selected),
+            'mean': float(selected.mean()),
+            'percentiles': np.percentile(selected, PERCENTILES),
+            'histogram': histogram[mode],
+        }
+    return result
+
+def outcomes(ev):
+    """ Per mode: spawns, hits, misses, timeouts and hits during the retreat window. """
+    counts = {}
+    for name, kind in (('spawns', TEL_SPAWN), ('hits', TEL_HIT), ('misses', TEL_MISS), ('timeouts', TEL_TIMEOUT)):
+        mask = (ev.event == kind) & (ev.mode >= 0)
+        counts[name] = np.bincount(ev.mode[mask], minlength=MENU_QUIT)
+    late = (ev.event == TEL_HIT) & (ev.value < 1.0) & (ev.mode >= 0)
+    counts['late_hits'] = np.bincount(ev.mode[late], minlength=MENU_QUIT)
+    counts['late_ratio'] = np.bincount(ev.mode[late], weights=ev.value[late], minlength=MENU_QUIT)
+    return counts
+
+def per_hole(ev, mode=None):
+    """ Per hole: spawns, hits, misses, timeouts and summed reaction time (optionally one mode). """
+    selected = ev.mode >= 0 if mode is None else ev.mode == mode
+    holes = int(ev.a[selected & (ev.event == TEL_SPAWN)].max(initial=-1)) + 1
+    result = {}
+    for name, kind in (('spawns', TEL_SPAWN), ('hits', TEL_HIT), ('misses', TEL_MISS), ('timeouts', TEL_TIMEOUT)):
+        mask = selected & (ev.event == kind)
+        result[name] = np.bincount(ev.a[mask], minlength=holes)[:holes]
+    hits = selected & (ev.event == TEL_HIT)
+    result['reaction_sum'] = np.bincount(ev.a[hits], weights=ev.b[hits], minlength=holes)[:holes]
+    return result
+
+def bonus_effect(ev, mode=None):
+    """ Finished games (single-player, or one mode) by bonus lives earned: games, length (s) and hits. """
+    games = ev.finished & (ev.game_mode != MODE_MULTIPLAYER if mode is None else ev.game_mode == mode)
+    bonus = np.minimum(ev.game_bonus[games], BONUS_MAX)
+    count = np.bincount(bonus, minlength=BONUS_MAX + 1)
+    length = np.bincount(bonus, weights=ev.game_length[games] / 1000.0, minlength=BONUS_MAX + 1)
+    hits = np.bincount(bonus, weights=ev.game_hits[games], minlength=BONUS_MAX + 1)
+    return count, length, hits
+
+# ==========================================
+#  REPORT
+# ==========================================
+
+def _ratio(a, b):
+    """ Element-wise a / b, 0 where b is 0. """
+    a = np.asarray(a, float)
+    b = np.asarray(b, float)
+    return np.divide(a, b, out=np.zeros_like(a), where=b > 0)
+
+def heatmap(title, values, fmt, cols=BOARD_COLS):
+    """ Board-shaped table of per-hole values, each cell shaded by its size (" " lowest, "@" highest). """
+    values = np.asarray(values, float)
+    rows = -(-len(values) // cols)
+    grid = np.full(rows * cols, np.nan)
+    grid[:len(values)] = values
+    # Shade from the board's smallest to its largest value, so differences between holes stand out
+    low, high = np.nanmin(grid), np.nanmax(grid)
+    scaled = (np.nan_to_num(grid, nan=low) - low) / (high - low) if high > low else np.zeros_like(grid)
+    shade = (scaled * (len(SHADES) - 1)).round().astype(int)
+    lines = [title]
+    for r in range(rows):
+        cells = []
+        for c in range(cols):
+            i = r * cols + c
+            cells.append(f"{'':>9}" if np.isnan(grid[i]) else f"{SHADES[shade[i]] * 2}{format(grid[i], fmt):>7}")
+        lines.append("  " + " ".join(cells))
+    return lines
+
+def report(ev, mode=None):
+    """ Every table as text lines. """
+    lines = []
+    names = {m: MODE_NAMES[m] for m in range(MENU_QUIT)}
+
+    lines.append(f"[ANALYTICS] {ev.count} events, {int((ev.game_mode >= 0).sum())} games "
+                 f"({int(ev.finished.sum())} finished)")
+
+    lines += ["", "--- Reaction time (ms) per difficulty ---",
+              f"{'mode':<12}{'hits':>8}{'mean':>8}" + "".join(f"{'p' + str(p):>8}" for p in PERCENTILES)]
+    reactions = reaction_times(ev)
+    for m, r in reactions.items():
+        lines.append(f"{names[m]:<12}{r['hits']:>8}{r['mean']:>8.0f}"
+                     + "".join(f"{v:>8.0f}" for v in r['percentiles']))
+    for m, r in reactions.items():
+        if mode is not None and m != mode: continue
+        lines += ["", f"{names[m]} reaction histogram ({REACTION_BIN_MS} ms buckets)"]
+        share = _ratio(r['histogram'], r['hits'])
+        bar_scale = 40.0 / max(share.max(), 1e-9)
+        for i, s in enumerate(share):
+            label = f"{i * REACTION_BIN_MS}-" if i == len(share) - 1 else f"{i * REACTION_BIN_MS}-{(i + 1) * REACTION_BIN_MS}"
+            lines.append(f"  {label:>10} {s * 100:5.1f}% {'#' * int(round(s * bar_scale))}")
+
+    counts = outcomes(ev)
+    lines += ["", "--- Outcomes per difficulty ---",
+              f"{'mode':<12}{'spawns':>8}{'hit %':>8}{'timeout %':>11}{'misses':>8}{'late hits':>11}{'late ratio':>12}"]
+    hit_rate = _ratio(counts['hits'], counts['spawns'])
+    timeout_rate = _ratio(counts['timeouts'], counts['spawns'])
+    late_share = _ratio(counts['late_hits'], counts['hits'])
+    late_ratio = _ratio(counts['late_ratio'], counts['late_hits'])
+    for m in ev.modes():
+        lines.append(f"{names[m]:<12}{counts['spawns'][m]:>8}{hit_rate[m] * 100:>7.1f}%{timeout_rate[m] * 100:>10.1f}%"
+                     f"{counts['misses'][m]:>8}{late_share[m] * 100:>10.1f}%{late_ratio[m]:>12.2f}")
+    lines.append("(late hits: hit while retreating, late ratio: mean whacked height of those)")
+
+    holes = per_hole(ev, mode)
+    scope = "all modes" if mode is None else names[mode]
+    lines += [""] + heatmap(f"--- Hit rate per hole, % ({scope}) ---", _ratio(holes['hits'], holes['spawns']) * 100, ".1f")
+    lines += [""] + heatmap(f"--- Mean reaction time per hole, ms ({scope}) ---",
+                            _ratio(holes['reaction_sum'], holes['hits']), ".0f")
+    lines += [""] + heatmap(f"--- Misses per hole ({scope}) ---", holes['misses'], ".0f")
+
+    count, length, hits = bonus_effect(ev, mode)
+    games = "single-player" if mode is None else names[mode]
+    lines += ["", f"--- Game length by bonus lives (finished {games} games) ---",
+              f"{'bonus':<8}{'games':>8}{'mean s':>9}{'hits':>8}"]
+    mean_length = _ratio(length, count)
+    mean_hits = _ratio(hits, count)
+    for bonus in np.flatnonzero(count):
+        label = f"{bonus}+" if bonus == BONUS_MAX else str(bonus)
+        lines.append(f"{label:<8}{count[bonus]:>8}{mean_length[bonus]:>9.1f}{mean_hits[bonus]:>8.1f}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Whac-A-Mole telemetry analytics")
+    parser.add_argument('paths', nargs='*', default=[TELEMETRY_DIR], help="Log files or directories")
+    parser.add_argument('--mode', choices=[n.lower() for n in MODE_NAMES[:MENU_QUIT]],
+                        help="Heatmaps and histograms for one difficulty only")
+    args = parser.parse_args()
+
+    try:
+        records, runs, files = load(args.paths)
+    except (OSError, ValueError) as e:
+        print(f"[ANALYTICS] {e}")
+        return 1
+    if len(records) == 0:
+        print("[ANALYTICS] No telemetry events found in " + ", ".join(args.paths))
+        return 1
+    mode = None if args.mode is None else [n.lower() for n in MODE_NAMES].index(args.mode)
+    print(f"[ANALYTICS] {files} file(s), {runs.max() + 1} run(s)")
+    print("\n".join(report(Events(records, runs), mode)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from config import ASSET_LOADER_WORKERS, ASSET_CACHE, ASSET_CACHE_DIR
+
+# Bump when the cached pixel layout changes so old files are ignored
+CACHE_FORMAT = 1
+
+# --- LOAD SOURCES (per asset, for the report) ---
+SOURCE_CACHE = "cache hit"
+SOURCE_DECODED = "decoded"
+SOURCE_MISSING = "missing"
+
+class AssetLoader:
+    """
+    Loads images and sounds on a worker pool while the game does something else
+    (the setup screen). Scaled images are stored on disk as raw RGBA buffers,
+    keyed by the source file's hash and the target size, so later launches
+    skip both the PNG decode and the scale.
+
+    Workers only produce plain surfaces; convert_alpha() needs the display and
+    runs on the main thread the first time image() is called for a key.
+    """
+    def __init__(self, workers=ASSET_LOADER_WORKERS, cache_dir=ASSET_CACHE_DIR if ASSET_CACHE else None):
+        self.cache_dir = cache_dir
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+        self._lock = threading.Lock()
+        self._futures = {}      # key -> Future, guarded by _lock
+        self._ready = {}        # key -> converted Surface / Sound (main thread only)
+        self.records = {}       # key -> (file, size, source, ms)
+        self.started = None
+        self.finished = None    # perf_counter() when the last job completed
+
+    # ==========================================
+    #  SCHEDULING
+    # ==========================================
+
+    def load_image(self, key, path, size=None):
+        """ Starts decoding (and scaling) an image in the background. No-op if already queued. """
+        self._submit(key, self._load_image, path, size)
+
+    def load_sound(self, key, path, volume=1.0):
+        """ Starts decoding a sound in the background. The mixer must be initialised. """
+        self._submit(key, self._load_sound, path, volume)
+
+    def _submit(self, key, func, *args):
+        with self._lock:
+            if key in self._futures: return
+            if self.started is None: self.started = time.perf_counter()
+            self._futures[key] = self._pool.submit(self._timed, key, func, *args)
+
+    def _timed(self, key, func, path, arg):
+        start = time.perf_counter()
+        result, source, size = func(path, arg)
+        end = time.perf_counter()
+        self.records[key] = (os.path.basename(path), size, source, (end - start) * 1000.0)
+        with self._lock:
+            if self.finished is None or end > self.finished: self.finished = end
+        return result
+
+    # ==========================================
+    #  WORKERS
+    # ==========================================
+
+    def _load_image(self, path, size):
+        """ Returns (surface or None, source, size). Runs on a worker thread. """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, SOURCE_MISSING, size
+
+        cache_path = None
+        if self.cache_dir and size:
+            digest = hashlib.sha1(data).hexdigest()[:16]
+            stem = os.path.splitext(os.path.basename(path))[0]
+            cache_path = os.path.join(self.cache_dir, f"{stem}_{size[0]}x{size[1]}_{digest}_v{CACHE_FORMAT}.rgba")
+            try:
+                with open(cache_path, 'rb') as f:
+                    pixels = f.read()
+                if len(pixels) == size[0] * size[1] * 4:
+                    return pygame.image.frombuffer(pixels, size, "RGBA"), SOURCE_CACHE, size
+            except OSError:
+                pass
+
+        img = pygame.image.load(path)
+        if size:
+            img = pygame.transform.scale(img, size)
+        if cache_path:
+            self._write_cache(cache_path, pygame.image.tobytes(img, "RGBA"))
+        return img, SOURCE_DECODED, img.get_size()
+
+    def _write_cache(self, path, pixels):
+        """ Writes a cache file atomically; a failed write only costs the next launch time. """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(pixels)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[ASSETS] Could not cache {os.path.basename(path)}: {e}")
+
+    def _load_sound(self, path, volume):
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(volume)
+        return sound, SOURCE_DECODED, None
+
+    # ==========================================
+    #  RESULTS (main thread)
+    # ==========================================
+
+    def image(self, key):
+        """
+        Returns the display-format surface for a queued image (None if the file
+        is missing), waiting for the worker if it has not finished yet.
+        """
+        if key in self._ready: return self._ready[key]
+        img = self._futures[key].result()
+        if img is not None and pygame.display.get_surface() is not None:
+            img = img.convert_alpha()
+        self._ready[key] = img
+        return img
+
+    def sound(self, key):
+        """ Returns a queued sound, re-raising the worker's error if decoding failed. """
+        if key not in self._ready:
+            self._ready[key] = self._futures[key].result()
+        return self._ready[key]
+
+    def busy(self):
+        """ True while any queued asset is still loading. """
+        with self._lock:
+            return any(not f.done() for f in self._futures.values())
+
+    def elapsed(self):
+        """ Seconds from the first job to the last completed one. """
+        if self.started is None or self.finished is None: return 0.0
+        return self.finished - self.started
+
+    def format_report(self):
+        """ Human readable table: where every asset came from and what it cost. """
+        lines = [f"{'asset':<20}{'size':>10}  {'source':<10}{'ms':>8}"]
+        for name, size, source, ms in sorted(self.records.values()):
+            size_text = f"{size[0]}x{size[1]}" if size else "-"
+            lines.append(f"{name:<20}{size_text:>10}  {source:<10}{ms:>8.1f}")
+        hits = sum(1 for r in self.records.values() if r[2] == SOURCE_CACHE)
+        lines.append(f"{len(self.records)} assets, {hits} cache hits, {self.elapsed() * 1000.0:.1f} ms in background")
+        return "\n".join(lines)
+
+# Shared by renderer.py, input_screen.py and game_state.py
+loader = AssetLoader()
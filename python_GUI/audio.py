@@ -0,0 +1,134 @@
+import os
+import time
+import wave
+import pygame
+from config import (AUDIO_FREQUENCY, AUDIO_BUFFER, AUDIO_VOICES, AUDIO_LATENCY_PROBE)
+from latency import LatencyHistogram
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
+
+# Sample used to pick the mixer rate when AUDIO_FREQUENCY is 0
+RATE_REFERENCE = 'hit.wav'
+
+def native_rate(path=os.path.join(ASSETS_DIR, RATE_REFERENCE), default=44100):
+    """ Sample rate of a WAV file (so the mixer can run at it without resampling). """
+    try:
+        with wave.open(path) as w:
+            return w.getframerate()
+    except (OSError, wave.Error):
+        return default
+
+def init_mixer(frequency=AUDIO_FREQUENCY, buffer=AUDIO_BUFFER):
+    """
+    Opens the audio device with a small buffer for low latency.
+    Must run before any sound is loaded, so SDL converts every sample to the
+    device format once at load time instead of while playing.
+    Falls back to SDL's defaults if the device refuses the settings.
+    """
+    if frequency == 0: frequency = native_rate()
+    try:
+        pygame.mixer.init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+    except pygame.error as e:
+        print(f"[AUDIO] Low-latency mode unavailable ({e}), using defaults")
+        pygame.mixer.init()
+    fmt = pygame.mixer.get_init()
+    if fmt:
+        print(f"[AUDIO] Mixer {fmt[0]} Hz, {buffer} sample buffer (~{buffer * 1000.0 / fmt[0]:.1f} ms)")
+    return fmt
+
+class EffectPlayer:
+    """
+    Plays sound effects on channels reserved per effect type, so a burst of
+    hits never cuts off the miss or game-over sound (and the other way round).
+    AUDIO_VOICES gives the number of channels per effect. When all of an
+    effect's channels are busy the oldest voice is stolen.
+
+    Measurement mode (AUDIO_LATENCY_PROBE): every channel posts an end event;
+    (end - play() call) - sample length is the delay between scheduling an
+    effect and the mixer starting it.
+    """
+    def __init__(self, voices=AUDIO_VOICES, probe=AUDIO_LATENCY_PROBE):
+        self.voices = voices
+        self.probe = probe
+        self.sounds = {}
+        self._pools = None      # effect -> [Channel]
+        self._started = {}      # channel index -> (play time, expected length, effect)
+        self._end_events = {}   # event type -> channel index
+        self._ignore_ends = {}  # channel index -> end events caused by stealing
+        self.steals = 0
+        self.histogram = LatencyHistogram(bucket_ms=0.5, max_ms=1000)
+
+    def add(self, name, sound):
+        self.sounds[name] = sound
+
+    def _setup(self):
+        """ Reserves the channels once the mixer is running. """
+        self._pools = {}
+        total = sum(self.voices.values())
+        pygame.mixer.set_num_channels(max(total + 2, pygame.mixer.get_num_channels()))
+        # Reserved channels are never picked by a plain Sound.play()
+        pygame.mixer.set_reserved(total)
+        index = 0
+        for name, count in self.voices.items():
+            pool = []
+            for _ in range(count):
+                channel = pygame.mixer.Channel(index)
+                if self.probe:
+                    event_type = pygame.event.custom_type()
+                    channel.set_endevent(event_type)
+                    self._end_events[event_type] = index
+                pool.append((index, channel))
+                index += 1
+            self._pools[name] = pool
+
+    def play(self, name):
+        """ Plays an effect on one of its channels, stealing the oldest voice if needed. """
+        sound = self.sounds.get(name)
+        if sound is None or not pygame.mixer.get_init(): return
+        if self._pools is None: self._setup()
+        pool = self._pools.get(name)
+        if not pool:
+            sound.play()
+            return
+
+        for index, channel in pool:
+            if not channel.get_busy(): break
+        else:
+            # Voice stealing: restart the channel whose sound started first
+            index, channel = min(pool, key=lambda c: self._started.get(c[0], (0.0,))[0])
+            self._started.pop(index, None)
+            if self.probe:
+                # stop() posts an end event too, which is not a measurement
+                self._ignore_ends[index] = self._ignore_ends.get(index, 0) + 1
+            channel.stop()
+            self.steals += 1
+
+        channel.play(sound)
+        self._started[index] = (time.perf_counter(), sound.get_length(), name)
+
+    def handle_event(self, event):
+        """ Feeds a channel end event to the measurement. Returns True if it was one. """
+        index = self._end_events.get(event.type)
+        if index is None: return False
+        if self._ignore_ends.get(index):
+            self._ignore_ends[index] -= 1
+            return True
+        started = self._started.pop(index, None)
+        if started:
+            play_time, length, _ = started
+            delay = time.perf_counter() - play_time - length
+            self.histogram.add(max(0.0, delay) * 1000.0)
+        return True
+
+    def format_report(self):
+        """ Human readable scheduled -> played delay statistics. """
+        s = self.histogram.summary()
+        fmt = pygame.mixer.get_init()
+        buffer_ms = AUDIO_BUFFER * 1000.0 / fmt[0] if fmt else 0.0
+        return (f"[AUDIO] effect delay over {s['count']} sounds: p50 {s['p50']:.1f} ms, "
+                f"p95 {s['p95']:.1f} ms, max {s['max']:.1f} ms "
+                f"(+ ~{buffer_ms:.1f} ms device buffer), {self.steals} voices stolen")
+
+# Shared by game_state.py and main.py
+effects = EffectPlayer()
@@ -1,63 +1,495 @@
-import serial
-import time
-
-class SerialManager:
-    """
-    Handles Serial (UART) communication between the Python Game and the PIC Microcontroller.
-    """
-
-    def __init__(self, port, baudrate=9600):
-        """
-        Initialize the serial connection.
-        :param port: The COM port (e.g., 'COM3')
-        :param baudrate: Communication speed (default 9600)
-        """
-        try:
-            # Initialize Serial Object with a short timeout for non-blocking reads
-            self.serial = serial.Serial(port, baudrate, timeout=0.1)
-            
-            # Wait a moment for the connection to stabilize
-            time.sleep(2) 
-            print(f"[SERIAL] Connected to {port}")
-        except serial.SerialException as e:
-            print(f"[SERIAL] Error connecting to {port}: {e}")
-            self.serial = None
-
-    def read_commands(self):
-        """
-        Reads all available data from the serial buffer.
-        Returns a list of clean command strings (e.g., ['POT:500', 'BTN:1']).
-        """
-        commands = []
-        # Check if serial is open and there is data waiting
-        if self.serial and self.serial.in_waiting > 0:
-            try:
-                # Read all bytes and decode to UTF-8
-                raw_data = self.serial.read(self.serial.in_waiting).decode('utf-8', errors='ignore')
-                
-                # Split the raw data by newline characters to get individual commands
-                lines = raw_data.split('\n')
-                for line in lines:
-                    line = line.strip() # Remove whitespace
-                    if line:
-                        commands.append(line)
-            except Exception as e:
-                print(f"[SERIAL] Read Error: {e}")
-        return commands
-
-    def send(self, message):
-        """
-        Sends a string message to the PIC Microcontroller.
-        """
-        if self.serial:
-            try:
-                self.serial.write(message.encode('utf-8'))
-            except Exception as e:
-                print(f"[SERIAL] Send Error: {e}")
-
-    def close(self):
-        """
-        Closes the serial connection safely.
-        """
-        if self.serial:
-            self.serial.close()
\ No newline at end of file
+import pygame
+import serial
+import threading
+import time
+from collections import deque
+from config import (SERIAL_RX_BUFFER_SIZE, SERIAL_TX_QUEUE_SIZE, SERIAL_TX_FLUSH_WINDOW,
+                    SERIAL_BINARY_PROTOCOL, SERIAL_HANDSHAKE_TIMEOUT,
+                    SERIAL_READY_TIMEOUT)
+
+# --- BINARY PROTOCOL (see firmware/include/protocol.h) ---
+# Frame: [OPCODE][VALUE_HI][VALUE_LO][CHECKSUM], opcodes always have bit 7 set.
+PROTOCOL_VERSION = 1
+FRAME_SIZE = 4
+FRAME_KEY = 0x5A
+
+OP_POT = 0x81
+OP_BTN = 0x82
+OP_CONFIRM = 0x83
+OP_LED = 0x90
+OP_SCORE = 0x91
+
+# --- LINK CHECK ---
+# The PIC sends the banner after boot and whenever it receives the ping
+PING = b"?"
+READY_BANNER = b"System Ready."
+
+# pygame event posted for every received command when post_events is on.
+# Attributes: command (str), arrival (time.perf_counter() of the last byte),
+# controller (always 0 here; multiplex.ControllerHub numbers its controllers)
+SERIAL_EVENT = pygame.event.custom_type()
+
+# pygame event posted when a controller's port goes away (unplugged).
+# Attributes: controller (ID of the lost controller, always 0 for SerialManager)
+DISCONNECT_EVENT = pygame.event.custom_type()
+
+# Pre-built command strings so decoding a button frame allocates nothing
+_BTN_COMMANDS = [f"BTN:{i}" for i in range(256)]
+
+def encode_frame(opcode, value):
+    """ Packs one 4-byte binary frame. """
+    hi = (value >> 8) & 0xFF
+    lo = value & 0xFF
+    return bytes((opcode, hi, lo, opcode ^ hi ^ lo ^ FRAME_KEY))
+
+def decode_frame(opcode, value):
+    """ Converts an inbound frame to the equivalent ASCII command (None if unknown). """
+    if opcode == OP_POT: return f"POT:{value}"
+    if opcode == OP_BTN: return _BTN_COMMANDS[value & 0xFF]
+    if opcode == OP_CONFIRM: return "BTN:CONFIRM"
+    return None
+
+def encode_message(message):
+    """
+    Translates an outbound ASCII message ('G', '\\nSCR:12\\n', ...) to binary frames.
+    Anything without a binary equivalent is sent unchanged.
+    """
+    cmd = message.strip()
+    if len(cmd) == 1 and cmd in "GPEX":
+        return encode_frame(OP_LED, ord(cmd))
+    if cmd.startswith("SCR:"):
+        try: return encode_frame(OP_SCORE, min(9999, max(0, int(cmd[4:]))))
+        except ValueError: pass
+    return message.encode('utf-8')
+
+def wait_for_ready(ser, timeout=SERIAL_READY_TIMEOUT):
+    """
+    Pings the PIC on an open port and waits for its "System Ready." banner.
+    Anything else received meanwhile (old events, half lines) is discarded.
+    :param ser: Open serial.Serial
+    :return: Round trip time in seconds, or None if nothing answered in time
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    ser.reset_input_buffer()
+    ser.write(PING)
+    ser.flush()
+
+    received = bytearray()
+    old_timeout = ser.timeout
+    try:
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0: return None
+            ser.timeout = min(remaining, 0.05)
+            received += ser.read(max(1, ser.in_waiting))
+            if READY_BANNER in received:
+                return time.perf_counter() - start
+            # Only the tail can still contain the start of the banner
+            del received[:-len(READY_BANNER)]
+    finally:
+        ser.timeout = old_timeout
+
+class CommandAssembler:
+    """
+    Reassembles inbound bytes into complete commands (ASCII lines and binary
+    frames, also mixed on the same line). Feed it raw chunks in arrival order;
+    it calls on_command(timestamp, command) for every finished command.
+    Handshake acknowledgements ("BIN:OK:v") switch the protocol and are not
+    passed on; on_handshake() is called instead.
+    """
+    def __init__(self, on_command, on_handshake=None):
+        self.on_command = on_command
+        self.on_handshake = on_handshake
+        # Bytes received but not yet terminated by a newline (bounded)
+        self.buffer = bytearray()
+        # 0 = ASCII lines only, otherwise the negotiated binary version
+        self.protocol_version = 0
+        self.overflows = 0
+        self.bad_frames = 0
+
+    def feed(self, chunk, timestamp):
+        """ Appends raw bytes and emits every completed command. """
+        buf = self.buffer
+        buf += chunk
+
+        if self.protocol_version:
+            start = self._parse_binary(buf, timestamp)
+        else:
+            start = self._parse_ascii(buf, timestamp)
+        if start:
+            del buf[:start]
+
+        # A line that never terminates (line noise) must not grow without bound:
+        # keep only the newest bytes, which are the ones that can still complete.
+        if len(buf) > SERIAL_RX_BUFFER_SIZE:
+            del buf[:len(buf) - SERIAL_RX_BUFFER_SIZE]
+            self.overflows += 1
+
+    def _parse_ascii(self, buf, timestamp):
+        """ Emits every newline-terminated line in buf. Returns bytes consumed. """
+        start = 0
+        while True:
+            end = buf.find(b'\n', start)
+            if end < 0: break
+            line = buf[start:end].decode('utf-8', errors='ignore').strip()
+            start = end + 1
+            if line:
+                self._handle_line(line, timestamp)
+                if self.protocol_version:
+                    # Handshake acknowledged mid-buffer: the rest is binary
+                    return self._parse_binary(buf, timestamp, start)
+        return start
+
+    def _parse_binary(self, buf, timestamp, start=0):
+        """
+        Decodes binary frames from buf[start:], still accepting ASCII lines
+        in between (e.g. the boot banner). Returns bytes consumed.
+        """
+        n = len(buf)
+        i = start
+        line_start = start
+        while i < n:
+            op = buf[i]
+            if op & 0x80:
+                if n - i < FRAME_SIZE:
+                    break # Wait for the rest of the frame
+                hi = buf[i + 1]
+                lo = buf[i + 2]
+                if buf[i + 3] != (op ^ hi ^ lo ^ FRAME_KEY):
+                    # Corrupted: resynchronise on the next byte
+                    self.bad_frames += 1
+                    i += 1
+                    line_start = i
+                    continue
+                cmd = decode_frame(op, (hi << 8) | lo)
+                if cmd:
+                    self.on_command(timestamp, cmd)
+                i += FRAME_SIZE
+                line_start = i
+            elif op == 0x0A: # '\n' ends an ASCII line
+                line = bytes(buf[line_start:i]).decode('utf-8', errors='ignore').strip()
+                if line:
+                    self._handle_line(line, timestamp)
+                i += 1
+                line_start = i
+            else:
+                i += 1
+        return line_start
+
+    def _handle_line(self, line, timestamp):
+        """ Routes one ASCII line: handshake replies are consumed here, the rest is emitted. """
+        if line.startswith("BIN:OK:"):
+            try: self.protocol_version = int(line[7:])
+            except ValueError: self.protocol_version = 0
+            if self.on_handshake: self.on_handshake()
+            return
+        self.on_command(timestamp, line)
+
+class OutboundQueue:
+    """
+    Write-behind queue for one controller. LED state and score are coalesced
+    (latest wins), anything else is kept in order. Not thread-safe on its own:
+    callers guard it with their lock.
+    """
+    def __init__(self):
+        self.raw = deque()
+        self.led = None
+        self.score = None
+        self.first_queued = 0.0
+        self.stats = {
+            'queued': 0,          # messages passed to send()
+            'coalesced': 0,       # messages replaced by a newer one before flushing
+            'dropped': 0,         # raw messages dropped because the queue was full
+            'flushes': 0,         # write() calls
+            'bytes': 0,
+            'max_depth': 0,
+            'last_flush_ms': 0.0, # oldest message queued -> write() returned
+            'max_flush_ms': 0.0,
+        }
+
+    def push(self, message):
+        """ Queues one message ('G', '\\nSCR:12\\n', ...). """
+        cmd = message.strip()
+        score = None
+        if cmd.startswith("SCR:"):
+            try: score = int(cmd[4:])
+            except ValueError: pass
+
+        stats = self.stats
+        stats['queued'] += 1
+        if self.depth() == 0:
+            self.first_queued = time.perf_counter()
+
+        if len(cmd) == 1 and cmd in "GPEX":
+            if self.led is not None: stats['coalesced'] += 1
+            self.led = cmd
+        elif score is not None:
+            if self.score is not None: stats['coalesced'] += 1
+            self.score = score
+        else:
+            if len(self.raw) >= SERIAL_TX_QUEUE_SIZE:
+                self.raw.popleft()
+                stats['dropped'] += 1
+            self.raw.append(message)
+
+        depth = self.depth()
+        if depth > stats['max_depth']: stats['max_depth'] = depth
+
+    def depth(self):
+        """ Number of outbound messages waiting to be written. """
+        return len(self.raw) + (self.led is not None) + (self.score is not None)
+
+    def take_payload(self, binary):
+        """ Drains the queue into one byte string (binary frames if binary is set). """
+        parts = []
+        for message in self.raw:
+            parts.append(encode_message(message) if binary else message.encode('utf-8'))
+        self.raw.clear()
+
+        # LED before score: 'X' clears the display, a later score must survive it
+        if self.led is not None:
+            parts.append(encode_frame(OP_LED, ord(self.led)) if binary else self.led.encode())
+            self.led = None
+        if self.score is not None:
+            score = min(9999, max(0, self.score))
+            parts.append(encode_frame(OP_SCORE, score) if binary else f"\nSCR:{score}\n".encode())
+            self.score = None
+        return b"".join(parts)
+
+    def record_flush(self, nbytes, first_queued):
+        """ Updates the statistics after a write() of nbytes. """
+        flush_ms = (time.perf_counter() - first_queued) * 1000.0
+        stats = self.stats
+        stats['flushes'] += 1
+        stats['bytes'] += nbytes
+        stats['last_flush_ms'] = flush_ms
+        if flush_ms > stats['max_flush_ms']: stats['max_flush_ms'] = flush_ms
+
+class SerialManager:
+    """
+    Handles Serial (UART) communication between the Python Game and the PIC Microcontroller.
+    A background reader thread drains the port continuously and reassembles
+    complete lines, so the game loop never sees half-received commands.
+    """
+
+    def __init__(self, port, baudrate=9600, post_events=False):
+        """
+        Initialize the serial connection.
+        :param port: The COM port (e.g., 'COM3'), or an already open and
+                     checked serial.Serial (from the setup screen) to reuse
+        :param baudrate: Communication speed (default 9600)
+        :param post_events: Deliver commands as SERIAL_EVENT pygame events
+                            (wakes up pygame.event.wait) instead of queueing them
+        """
+        self.post_events = post_events
+        # --- RX STATE ---
+        # Assembler for the reader thread; completed (timestamp, 0, command) tuples
+        # wait in _rx_queue for the game loop.
+        # deque.append/popleft are atomic, so no lock is needed between threads.
+        # Unbounded: the game loop drains it every frame, and evicting the
+        # oldest commands would lose input silently.
+        self._rx = CommandAssembler(self._deliver, self._on_handshake)
+        self._rx_queue = deque()
+        self._handshake_done = threading.Event()
+
+        # --- TX STATE (write-behind) ---
+        # Guarded by _tx_cond
+        self._tx_cond = threading.Condition()
+        self._tx = OutboundQueue()
+        self.tx_stats = self._tx.stats
+
+        self._running = False
+        self._reader = None
+        self._writer = None
+        self.connected = True   # False once the port is gone; nothing is sent to it after that
+
+        if isinstance(port, serial.Serial):
+            # Handed over by the setup screen: already open and answering
+            self.serial = port
+            self.serial.timeout = 0.1
+            print(f"[SERIAL] Connected to {port.port}")
+        else:
+            try:
+                # Initialize Serial Object with a short timeout for non-blocking reads
+                self.serial = serial.Serial(port, baudrate, timeout=0.1)
+                print(f"[SERIAL] Connected to {port}")
+            except serial.SerialException as e:
+                print(f"[SERIAL] Error connecting to {port}: {e}")
+                self.serial = None
+
+            # Wait for the PIC to answer instead of sleeping a fixed time
+            if self.serial and wait_for_ready(self.serial) is None:
+                print(f"[SERIAL] Warning: no answer from {port}, continuing anyway")
+
+        if self.serial:
+            self._running = True
+            self._reader = threading.Thread(target=self._reader_loop, name="serial-reader")
+            self._reader.daemon = True
+            self._reader.start()
+
+            self._writer = threading.Thread(target=self._writer_loop, name="serial-writer")
+            self._writer.daemon = True
+            self._writer.start()
+
+            if SERIAL_BINARY_PROTOCOL:
+                self.negotiate_binary()
+
+    def negotiate_binary(self, timeout=SERIAL_HANDSHAKE_TIMEOUT):
+        """
+        Asks the PIC to switch to binary frames.
+        Falls back to ASCII if the firmware does not answer within the timeout.
+        Returns True if binary mode is active.
+        """
+        self._handshake_done.clear()
+        self.send(f"\nBIN:{PROTOCOL_VERSION}\n")
+        if self._handshake_done.wait(timeout) and self.protocol_version > 0:
+            print(f"[SERIAL] Binary protocol v{self.protocol_version} active")
+            return True
+        print("[SERIAL] No binary protocol support, using ASCII")
+        return False
+
+    def _reader_loop(self):
+        """
+        Background thread: blocks on the port and queues every complete line
+        together with the time its last byte arrived.
+        """
+        while self._running:
+            try:
+                # Block for at least one byte (bounded by the port timeout),
+                # then grab whatever else is already waiting.
+                chunk = self.serial.read(1)
+                if chunk and self.serial.in_waiting > 0:
+                    chunk += self.serial.read(self.serial.in_waiting)
+            except Exception as e:
+                if self._running:
+                    print(f"[SERIAL] Read Error: {e}")
+                    self._disconnect()
+                break
+
+            if chunk:
+                self._rx.feed(chunk, time.perf_counter())
+
+    # --- Protocol state lives in the assembler ---
+    @property
+    def protocol_version(self):
+        """ 0 = ASCII lines only, otherwise the negotiated binary version. """
+        return self._rx.protocol_version
+
+    @property
+    def rx_overflows(self):
+        return self._rx.overflows
+
+    @property
+    def rx_bad_frames(self):
+        return self._rx.bad_frames
+
+    def _on_handshake(self):
+        self._handshake_done.set()
+
+    def _disconnect(self):
+        """ Port gone (unplugged): stops the writer, drops queued output and tells the game. """
+        with self._tx_cond:
+            if not self.connected: return
+            self.connected = False
+            self._running = False
+            self._tx.take_payload(False)
+            self._tx_cond.notify()
+        print(f"[SERIAL] Controller on {self.serial.port} disconnected")
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(DISCONNECT_EVENT, controller=0))
+
+    def _deliver(self, timestamp, command):
+        """ Hands one command to the game: as a pygame event or through the queue. """
+        if self.post_events:
+            try:
+                pygame.event.post(pygame.event.Event(SERIAL_EVENT, command=command, arrival=timestamp, controller=0))
+                return
+            except pygame.error:
+                pass # Display not initialised (yet): fall back to the queue
+        self._rx_queue.append((timestamp, 0, command))
+
+    def read_commands_timed(self):
+        """
+        Returns all commands received since the last call as
+        (arrival_time, controller, command) tuples, the same shape as
+        ControllerHub's (controller is always 0). arrival_time is time.perf_counter().
+        """
+        queue = self._rx_queue
+        commands = []
+        while queue:
+            commands.append(queue.popleft())
+        return commands
+
+    def read_commands(self):
+        """
+        Returns all commands received since the last call.
+        Returns a list of clean command strings (e.g., ['POT:500', 'BTN:1']).
+        """
+        return [cmd for _, _, cmd in self.read_commands_timed()]
+
+    def pending_commands(self):
+        """ Number of completed commands waiting to be read. """
+        return len(self._rx_queue)
+
+    def send(self, message):
+        """
+        Queues a string message for the PIC Microcontroller and returns immediately.
+        LED commands ('G', 'P', 'E', 'X') and 'SCR:n' updates are coalesced:
+        only the latest of each is written when the queue is flushed.
+        """
+        if not self.serial or not self.connected: return
+
+        with self._tx_cond:
+            self._tx.push(message)
+            self._tx_cond.notify()
+
+    def tx_queue_depth(self):
+        """ Number of outbound messages waiting to be written. """
+        return self._tx.depth()
+
+    def _writer_loop(self):
+        """
+        Background thread: waits for outbound messages, lets a short flush
+        window collect anything sent right after, then writes it all at once.
+        """
+        while True:
+            with self._tx_cond:
+                while self._running and self.tx_queue_depth() == 0:
+                    self._tx_cond.wait()
+                if not self._running and self.tx_queue_depth() == 0:
+                    return
+
+            # Give back-to-back send() calls from the same frame a chance to coalesce
+            if self._running and SERIAL_TX_FLUSH_WINDOW > 0:
+                time.sleep(SERIAL_TX_FLUSH_WINDOW)
+
+            with self._tx_cond:
+                first_queued = self._tx.first_queued
+                payload = self._tx.take_payload(self.protocol_version > 0)
+            if not payload: continue
+
+            try:
+                self.serial.write(payload)
+            except Exception as e:
+                print(f"[SERIAL] Send Error: {e}")
+                self._disconnect()
+                continue
+
+            self._tx.record_flush(len(payload), first_queued)
+
+    def close(self):
+        """
+        Flushes pending messages, stops the I/O threads and closes the serial connection safely.
+        Safe to call more than once.
+        """
+        if not self.serial or not self.serial.is_open: return
+        with self._tx_cond:
+            self._running = False
+            self._tx_cond.notify()
+        if self._writer:
+            self._writer.join(timeout=1.0)
+        if self._reader:
+            self._reader.join(timeout=0.5)
+        if self.serial:
+            self.serial.close()
@@ -1,49 +1,149 @@
-# config.py
-# ---------------------------------------------------------
-# Configuration file for the Whac-A-Mole Game.
-# Contains all constants for Hardware, GUI, and Game Logic.
-# ---------------------------------------------------------
-
-# --- Serial Communication Settings ---
-# Default Bluetooth COM port (Can be changed in the Input Screen)
-SERIAL_PORT = 'COM7'  
-# Baud rate must match the PIC18F4520 UART setting
-BAUD_RATE = 9600
-
-# --- Animation Settings ---
-# Duration of the hammer swing animation in milliseconds
-HAMMER_SWING_DURATION = 150
-
-# --- Window & Graphics Constants ---
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-MOLE_RADIUS = 80
-
-# --- Color Definitions (R, G, B) ---
-COLOR_BG = (30, 30, 30)       # Dark Gray Background
-COLOR_HOLE = (0, 0, 0)        # Black Holes
-COLOR_SELECT = (255, 215, 0)  # Gold for highlights
-COLOR_TEXT = (220, 220, 220)  # Off-white for text
-
-# --- Game Modes ---
-MODE_EASY = 0
-MODE_MEDIUM = 1
-MODE_HARD = 2
-MODE_MULTIPLAYER = 3  # Multiplayer mode (Time Attack)
-MENU_QUIT = 4         # Option to close the application
-
-# Display names for the menu selection
-MODE_NAMES = ["Easy", "Medium", "Hard", "Multiplayer", "Quit"]
-
-# --- Game States ---
-# These constants control the main state machine of the game
-STATE_MENU = 0
-STATE_PLAYING = 1
-STATE_GAMEOVER = 2
-STATE_PAUSED = 3
-STATE_WAITING_P2 = 5   # Intermission screen for Multiplayer
-STATE_WINNER = 6       # Final result screen for Multiplayer
-
-# --- Multiplayer Settings ---
-# Duration for each player's turn in Multiplayer (in ms)
+# config.py
+# ---------------------------------------------------------
+# Configuration file for the Whac-A-Mole Game.
+# Contains all constants for Hardware, GUI, and Game Logic.
+# ---------------------------------------------------------
+
+import os
+
+# --- Serial Communication Settings ---
+# Default Bluetooth COM port (Can be changed in the Input Screen)
+SERIAL_PORT = 'COM7'  
+# Baud rate must match the PIC18F4520 UART setting
+BAUD_RATE = 9600
+# Max bytes of an unterminated line kept by the serial reader thread
+SERIAL_RX_BUFFER_SIZE = 256
+# Max queued outbound messages that cannot be coalesced
+SERIAL_TX_QUEUE_SIZE = 64
+# Seconds the writer waits to batch back-to-back sends into one write()
+SERIAL_TX_FLUSH_WINDOW = 0.004
+# Negotiate the compact binary protocol with the PIC (falls back to ASCII)
+SERIAL_BINARY_PROTOCOL = True
+# Seconds to wait for the PIC to acknowledge a protocol handshake
+SERIAL_HANDSHAKE_TIMEOUT = 0.5
+# Seconds to wait for the PIC to answer a ping with "System Ready."
+SERIAL_READY_TIMEOUT = 1.0
+# Max bytes read from one controller per I/O round (multiplex.py), keeps reads fair
+HUB_READ_CHUNK = 64
+# Seconds the hub keeps writing queued output to slow controllers when closing
+HUB_CLOSE_TIMEOUT = 0.5
+
+# --- Input Pipeline (input_pipeline.py) ---
+# Potentiometer smoothing after coalescing: 'hysteresis', 'median' or None (raw)
+POT_FILTER = 'hysteresis'
+POT_HYSTERESIS = 4      # Counts a reading must move before the value follows
+POT_MEDIAN_WINDOW = 5   # Readings in the median filter
+
+# --- Port Discovery (setup screen) ---
+# Ports probed automatically besides pyserial's list (pic_emulator --link /tmp/ttyWAM0)
+DISCOVERY_GLOBS = ['/dev/ttyUSB*', '/dev/ttyACM*', '/dev/rfcomm*', '/tmp/ttyWAM*']
+# Ports probed at the same time
+DISCOVERY_WORKERS = 8
+# Seconds between two scans for plugged / unplugged ports
+DISCOVERY_INTERVAL = 1.0
+
+# --- Audio Settings ---
+# Mixer sample rate; 0 = use the rate of the effect files (no resampling)
+AUDIO_FREQUENCY = 0
+# Mixer buffer in samples (smaller = lower latency, too small = crackling)
+AUDIO_BUFFER = 128
+# Channels reserved per sound effect; the oldest voice is stolen when all are busy
+AUDIO_VOICES = {'hit': 4, 'miss': 2, 'over': 1}
+# Measure the delay from play() to the mixer starting each effect (printed on exit)
+AUDIO_LATENCY_PROBE = False
+
+# --- Animation Settings ---
+# Duration of the hammer swing animation in milliseconds
+HAMMER_SWING_DURATION = 150
+# Duration of the mole rising out of its hole in milliseconds
+MOLE_RISE_DURATION = 150
+
+# --- Diagnostics ---
+# Print the input latency histogram table when the game exits
+LATENCY_REPORT_ON_EXIT = True
+# Print how long each startup phase took once the first frame is on screen
+STARTUP_REPORT = True
+# Record every session (inputs + RNG seed) for replay.py
+SESSION_RECORDING = True
+SESSION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions')
+# Per-frame phase timing (F1 shows the HUD, F2 exports CSV + Chrome trace)
+PROFILER_ENABLED = True
+PROFILER_FRAMES = 600         # Frames kept for the statistics (ring buffer)
+PROFILER_SPANS = 16384        # Individual phase spans kept for the trace export
+PROFILER_HUD_INTERVAL = 0.25  # Seconds between HUD text refreshes
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+# Binary log of every game event and inbound command (telemetry.py)
+TELEMETRY_ENABLED = True
+TELEMETRY_RING_RECORDS = 65536          # Events buffered in memory (16 bytes each, 1 MiB)
+TELEMETRY_FLUSH_INTERVAL = 1.0          # Seconds between background writes
+TELEMETRY_MAX_FILE_BYTES = 8 * 1024**2  # Start a new file after this many bytes
+TELEMETRY_MAX_FILES = 50                # Oldest files are deleted beyond this count
+TELEMETRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'telemetry')
+
+# --- Leaderboard (leaderboard.py) ---
+# Keep every final score and show the best ones on the menu
+LEADERBOARD_ENABLED = True
+LEADERBOARD_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+LEADERBOARD_SIZE = 5            # Entries per board on the menu
+LEADERBOARD_BATCH_DELAY = 0.5   # Seconds the writer waits to commit scores that arrive together
+
+# --- Main Loop Timing ---
+# Game logic runs in fixed steps (2 ms = 500 Hz), independent of drawing
+SIM_TICK_MS = 2
+# Max steps simulated in one go before skipping time (250 ms)
+SIM_MAX_CATCHUP_STEPS = 125
+# Target frame rate; lowered automatically if drawing gets slow
+RENDER_FPS = 60
+
+# --- Window & Graphics Constants ---
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+MOLE_RADIUS = 80
+# Board geometry (see layout.py); the PIC controller has 9 buttons (NUM_GAME_BUTTONS)
+BOARD_ROWS = 3
+BOARD_COLS = 3
+BOARD_SPACING = 1.0     # Distance between hole centers, relative to an evenly filled board
+BOARD_HOLE_SCALE = 1.0  # Hole/mole/hammer size on top of the automatic fit (1.0 = 3x3 artwork size)
+# Repaint only changed regions during gameplay (display.update(rects) instead of flip)
+DIRTY_RECT_RENDERING = True
+# Max rendered text labels kept by the text cache (LRU eviction)
+TEXT_CACHE_SIZE = 256
+# Threads decoding PNG/WAV assets in the background at startup
+ASSET_LOADER_WORKERS = 4
+# Keep scaled images as raw RGBA files so later launches skip decode + scale
+ASSET_CACHE = True
+ASSET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.asset_cache')
+
+# --- Color Definitions (R, G, B) ---
+COLOR_BG = (30, 30, 30)       # Dark Gray Background
+COLOR_HOLE = (0, 0, 0)        # Black Holes
+COLOR_SELECT = (255, 215, 0)  # Gold for highlights
+COLOR_TEXT = (220, 220, 220)  # Off-white for text
+
+# --- Game Modes ---
+MODE_EASY = 0
+MODE_MEDIUM = 1
+MODE_HARD = 2
+MODE_MULTIPLAYER = 3  # Multiplayer mode (Time Attack)
+MENU_QUIT = 4         # Option to close the application
+
+# Display names for the menu selection
+MODE_NAMES = ["Easy", "Medium", "Hard", "Multiplayer", "Quit"]
+
+# --- Mole Density ---
+# Moles that can be up at the same time, per game mode (1 = classic one-at-a-time game)
+MAX_ACTIVE_MOLES = {MODE_EASY: 1, MODE_MEDIUM: 1, MODE_HARD: 1, MODE_MULTIPLAYER: 1}
+MOLE_SPAWN_GAP = 400  # ms between extra moles popping up while below the limit
+
+# --- Game States ---
+# These constants control the main state machine of the game
+STATE_MENU = 0
+STATE_PLAYING = 1
+STATE_GAMEOVER = 2
+STATE_PAUSED = 3
+STATE_WAITING_P2 = 5   # Intermission screen for Multiplayer
+STATE_WINNER = 6       # Final result screen for Multiplayer
+
+# --- Multiplayer Settings ---
+# Duration for each player's turn in Multiplayer (in ms)
 GAME_DURATION = 30000  # 30 Seconds
\ No newline at end of file
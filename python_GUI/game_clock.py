@@ -0,0 +1,26 @@
+import pygame
+
+class LiveClock:
+    """
+    Millisecond clock backed by pygame.time.get_ticks().
+    Default clock of GameState; every call reads the current time.
+    """
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+class ManualClock:
+    """
+    Clock that only moves when told to.
+    Drives the fixed-step simulation in main.py, replays and benchmarks.
+    """
+    def __init__(self, start=0):
+        self.now = start
+
+    def set(self, ms):
+        self.now = ms
+
+    def advance(self, ms):
+        self.now += ms
+
+    def get_ticks(self):
+        return self.now
@@ -1,374 +1,478 @@
-import pygame
-import random
-import sys
-import os
-from config import *
-
-# Assumes ASSETS_DIR is defined in your main file or config, 
-# otherwise define it here if needed:
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
-
-class GameState:
-    """
-    Manages the game logic, state transitions, and hardware synchronization.
-    This class acts as the 'Controller' in the MVC pattern.
-    """
-    def __init__(self, serial_manager):
-        self.serial = serial_manager
-        self.state = STATE_MENU
-        self.previous_state = STATE_MENU 
-        self.score = 0
-        self.lives = 10
-        self.difficulty = MODE_EASY
-        
-        # --- MULTIPLAYER VARIABLES ---
-        self.is_multiplayer = False 
-        self.current_player = 1
-        self.p1_score = 0
-        self.p2_score = 0
-        self.start_time = 0  # Timestamp for tracking game duration
-        # -----------------------------
-
-        self.hit_delay_duration = 500
-        
-        # --- HAMMER ANIMATION STATE ---
-        self.is_hammering = False       
-        self.hammer_target_index = -1   
-        self.hammer_start_time = 0      
-        self.hammer_duration = HAMMER_SWING_DURATION
-        
-        # --- BONUS ---
-        self.consecutive_hits = 0 
-        
-        # --- AUDIO INIT ---
-        try:
-            # Load background music and sound effects
-            pygame.mixer.music.load(os.path.join(ASSETS_DIR, 'Menu.wav')) 
-            pygame.mixer.music.set_volume(0.3)
-            pygame.mixer.music.play(-1) # Loop indefinitely
-            
-            self.snd_hit = pygame.mixer.Sound(os.path.join(ASSETS_DIR, 'hit.wav'))
-            self.snd_miss = pygame.mixer.Sound(os.path.join(ASSETS_DIR, 'miss.wav'))
-            self.snd_over = pygame.mixer.Sound(os.path.join(ASSETS_DIR, 'game-over.wav'))
-            self.snd_hit.set_volume(0.6)
-            self.snd_miss.set_volume(0.4)
-            self.snd_over.set_volume(0.5)
-        except Exception as e:
-            self.snd_hit = None
-            self.snd_miss = None
-            self.snd_over = None
-            print(f"[AUDIO] Warning: {e}")
-
-        # --- GAME LOGIC VARIABLES ---
-        self.pot_value = 0
-        self.last_stable_pot = 0 
-        
-        self.current_mole_index = -1
-        self.whacked_mole_index = -1
-        self.whacked_height_ratio = 1.0 
-        
-        self.is_hiding = False
-        self.hide_duration = 300
-        
-        self.spawn_interval = 2000
-        self.last_spawn_time = 0
-        self.game_over_selection = 0 
-        
-        self.pause_selection = 0   
-        self.pause_start_time = 0
-        
-        self.waiting_for_next_mole = False
-        self.hit_time = 0
-
-        # --- INIT HARDWARE ---
-        # Sync initial state with PIC (Red LED, Score 0)
-        self.serial.send('E') 
-        self.serial.send('\nSCR:0\n')
-
-    def get_speed(self):
-        """
-        Calculates the spawn speed based on difficulty and current score.
-        """
-        # Multiplayer uses a fixed fast speed
-        if self.is_multiplayer: return 1500
-
-        base_speed = 1500 
-        if self.difficulty == MODE_EASY: return 1500 
-        elif self.difficulty == MODE_MEDIUM:
-            # Increase speed as score increases
-            return max(800, base_speed - (self.score * 50))
-        elif self.difficulty == MODE_HARD:
-            return max(300, base_speed - (self.score * 80))
-        return 1500
-
-    def spawn_mole(self):
-        """ Selects a random hole to spawn a mole. """
-        self.current_mole_index = random.randint(0, 8)
-        self.spawn_interval = self.get_speed()
-        self.last_spawn_time = pygame.time.get_ticks()
-        self.is_hiding = False
-        self.whacked_height_ratio = 1.0 
-
-    def stop_game(self):
-        """ Stops the game logic and handles transition (GameOver or Next Player). """
-        if self.is_multiplayer:
-            self.handle_player_finish()
-        else:
-            self.state = STATE_GAMEOVER
-            self._reset_game_state()
-            if self.snd_over: self.snd_over.play()
-
-    def _reset_game_state(self):
-        """ Helper to reset temporary game variables without changing the screen. """
-        self.current_mole_index = -1
-        self.whacked_mole_index = -1
-        self.is_hiding = False
-        self.consecutive_hits = 0 
-        self.serial.send('E') # Turn LED Red
-
-    def handle_player_finish(self):
-        """ Handles the transition between players in Multiplayer mode. """
-        self._reset_game_state()
-        
-        if self.current_player == 1:
-            self.p1_score = self.score
-            self.state = STATE_WAITING_P2
-            print(f"P1 Finished. Score: {self.p1_score}")
-        else:
-            self.p2_score = self.score
-            self.state = STATE_WINNER
-            print(f"P2 Finished. Score: {self.p2_score}")
-            if self.snd_over: self.snd_over.play()
-
-    def start_next_player(self):
-        """ Prepares the game for Player 2. """
-        self.current_player = 2
-        self.score = 0
-        self.lives = 3 
-        self.start_time = pygame.time.get_ticks()
-        self.state = STATE_PLAYING
-        self.serial.send('G')     
-        self.serial.send('\nSCR:0\n')
-        self.spawn_mole()
-
-    def cleanup(self):
-        """ Sends exit signal to hardware before closing. """
-        self.serial.send('X') 
-        print("[SERIAL] Sent exit signal 'X'")
-        
-    def toggle_pause(self):
-        """ Toggles between Playing and Paused states. """
-        if self.state == STATE_PAUSED:
-            self.state = self.previous_state
-            self.serial.send('G')
-            
-            # Adjust timers so pause duration doesn't count towards spawn time
-            pause_duration = pygame.time.get_ticks() - self.pause_start_time
-            self.last_spawn_time += pause_duration
-            self.hit_time += pause_duration
-            self.start_time += pause_duration # Extend game timer
-            
-            self.last_stable_pot = self.pot_value
-        else:
-            if self.state == STATE_PLAYING:
-                self.previous_state = self.state
-                self.state = STATE_PAUSED
-                self.serial.send('P') # Turn LED Yellow
-                self.pause_selection = 0 
-                self.pause_start_time = pygame.time.get_ticks()
-
-    def handle_hit(self, hit_index):
-        """ Logic when a button input is received. """
-        if self.state != STATE_PLAYING: return
-        if self.waiting_for_next_mole: return 
-
-        current_time = pygame.time.get_ticks()
-
-        # Trigger Hammer Animation
-        self.is_hammering = True
-        self.hammer_target_index = hit_index
-        self.hammer_start_time = current_time
-        
-        if hit_index == self.current_mole_index:
-            # --- HIT ---
-            if self.snd_hit: self.snd_hit.play()
-            self.score += 1
-            self.serial.send(f"SCR:{self.score}\n") # Update Score on PIC
-
-            # Bonus Life (Standard Rule)
-            self.consecutive_hits += 1
-            if self.consecutive_hits >= 10:
-                self.lives += 1
-                self.consecutive_hits = 0 
-                print("[GAMEPLAY] Bonus Life!")
-
-            # Check if hit while hiding (partial hit logic)
-            time_elapsed = current_time - self.last_spawn_time
-            retreat_start_time = self.spawn_interval - self.hide_duration
-            
-            if time_elapsed > retreat_start_time:
-                time_into_retreat = time_elapsed - retreat_start_time
-                retreat_progress = time_into_retreat / self.hide_duration
-                self.whacked_height_ratio = max(0.0, 1.0 - retreat_progress)
-            else:
-                self.whacked_height_ratio = 1.0 
-
-            self.whacked_mole_index = self.current_mole_index 
-            self.current_mole_index = -1 
-            self.waiting_for_next_mole = True
-            self.hit_time = current_time
-        else:
-            # --- MISS ---
-            if self.snd_miss: self.snd_miss.play()
-            # Note: Lives logic can be added here if needed for Single Player
-    
-    def update(self):
-        """ Main game loop update. """
-        current_time = pygame.time.get_ticks()
-
-        if self.state == STATE_PAUSED:
-            self.pause_selection = 0 if self.pot_value < 512 else 1
-            return 
-
-        # --- MENU LOGIC (5 SECTIONS) ---
-        if self.state == STATE_MENU:
-            # Divide Potentiometer range (0-1023) into 5 sections
-            if self.pot_value < 205: 
-                self.difficulty = MODE_EASY
-                self.is_multiplayer = False
-            elif self.pot_value < 410: 
-                self.difficulty = MODE_MEDIUM
-                self.is_multiplayer = False
-            elif self.pot_value < 615: 
-                self.difficulty = MODE_HARD
-                self.is_multiplayer = False
-            elif self.pot_value < 820: 
-                self.difficulty = MODE_MULTIPLAYER 
-                self.is_multiplayer = True 
-            else: 
-                self.difficulty = MENU_QUIT 
-                self.is_multiplayer = False
-
-        elif self.state == STATE_PLAYING:
-            
-            # --- MULTIPLAYER TIMER CHECK ---
-            if self.is_multiplayer:
-                if current_time - self.start_time >= GAME_DURATION:
-                    self.stop_game() 
-                    return
-            
-            # --- MOLE SPAWN LOGIC ---
-            if self.waiting_for_next_mole:
-                if current_time - self.hit_time > self.hit_delay_duration:
-                    self.waiting_for_next_mole = False
-                    self.whacked_mole_index = -1 
-                    self.spawn_mole()
-            else:
-                time_elapsed = current_time - self.last_spawn_time
-                
-                # 1. Timeout (Missed the mole)
-                if time_elapsed > self.spawn_interval:
-                    self.is_hiding = False
-                    if self.current_mole_index != -1:
-                        self.lives -= 1
-                        self.consecutive_hits = 0 
-                        
-                        if self.lives <= 0: self.stop_game()
-                        else: self.spawn_mole()
-
-                # 2. Hiding Animation
-                elif time_elapsed > (self.spawn_interval - self.hide_duration):
-                    self.is_hiding = True
-                else:
-                    self.is_hiding = False
-
-        elif self.state in [STATE_GAMEOVER, STATE_WINNER]:
-            self.game_over_selection = 0 if self.pot_value < 512 else 1
-
-    def process_input(self, line):
-        """
-        Parses commands received from the PIC Microcontroller.
-        Example commands: "POT:512", "BTN:3", "BTN:CONFIRM"
-        """
-        if line.startswith("POT:"):
-            try: 
-                new_val = int(line.split(":")[1])
-                # Feature: Auto-Pause if pot is moved rapidly during game
-                if self.state == STATE_PLAYING:
-                    if abs(new_val - self.last_stable_pot) > 30:
-                        self.toggle_pause()
-                
-                self.pot_value = new_val
-                
-                # Update stable pot only if not in menu/intermission
-                if self.state not in [STATE_MENU, STATE_GAMEOVER, STATE_WINNER, STATE_WAITING_P2]:
-                    self.last_stable_pot = new_val
-            except: pass
-
-        elif "BTN:CONFIRM" in line:
-            if self.state == STATE_MENU:
-                if self.difficulty == MENU_QUIT:
-                    self.serial.send('X') 
-                    pygame.quit(); sys.exit()
-                else:
-                    # START NEW GAME
-                    self.score = 0
-                    self.lives = 3 # Reset lives
-                    self.consecutive_hits = 0 
-                    self.state = STATE_PLAYING
-                    
-                    if self.is_multiplayer:
-                        self.current_player = 1
-                        self.p1_score = 0
-                        self.p2_score = 0
-                        self.start_time = pygame.time.get_ticks()
-                    
-                    self.serial.send('G')     
-                    self.serial.send('\nSCR:0\n')
-                    self.last_stable_pot = self.pot_value
-                    self.spawn_mole()
-                
-            elif self.state == STATE_PLAYING:
-                self.toggle_pause()
-                
-            elif self.state == STATE_PAUSED:
-                if self.pause_selection == 0:
-                    self.toggle_pause() 
-                else:
-                    self.state = STATE_MENU
-                    self._reset_game_state()
-                    self.serial.send('\nSCR:0\n') 
-                
-            elif self.state == STATE_GAMEOVER:
-                if self.game_over_selection == 0: 
-                    self.state = STATE_MENU
-                    self._reset_game_state()
-                    self.serial.send('\nSCR:0\n') 
-                else: 
-                    self.serial.send('X') 
-                    pygame.quit(); sys.exit()
-
-            # --- NEW STATE HANDLING ---
-            elif self.state == STATE_WAITING_P2:
-                self.start_next_player()
-
-            elif self.state == STATE_WINNER:
-                if self.game_over_selection == 0: # Play Again
-                    self.state = STATE_MENU
-                    self._reset_game_state()
-                    self.serial.send('\nSCR:0\n')
-                else: # Quit
-                    self.serial.send('X')
-                    pygame.quit(); sys.exit()
-
-        elif line.startswith("BTN:"):
-            # Ignore buttons during Pause or Transitions
-            if self.state == STATE_PAUSED: return
-            if self.state in [STATE_WAITING_P2, STATE_WINNER]: return 
-            
-            try:
-                idx = int(line.split(":")[1])
-                if 0 <= idx <= 8:
-                    self.handle_hit(idx)
-            except: pass
\ No newline at end of file
+import pygame
+import random
+import sys
+import os
+from config import *
+from game_clock import LiveClock
+from asset_loader import loader
+from audio import effects
+from layout import board
+from moles import MoleField, HOLE_UP, HOLE_HIDING, EV_RETREAT, EV_TIMEOUT, EV_CLEAR, EV_SPAWN
+from comms import OP_POT, OP_BTN, OP_CONFIRM
+from input_pipeline import InputPipeline
+from leaderboard import leaderboard
+from telemetry import (telemetry, TEL_SPAWN, TEL_HIT, TEL_MISS, TEL_TIMEOUT, TEL_PAUSE, TEL_BONUS_LIFE,
+                       TEL_STATE, TEL_GAME)
+
+# Assumes ASSETS_DIR is defined in your main file or config, 
+# otherwise define it here if needed:
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
+
+# Sound effect key -> (file, volume)
+SOUNDS = {
+    'hit': ('hit.wav', 0.6),
+    'miss': ('miss.wav', 0.4),
+    'over': ('game-over.wav', 0.5),
+}
+
+def preload_sounds():
+    """ Starts decoding the sound effects in the background (mixer must be initialised). """
+    for key, (name, volume) in SOUNDS.items():
+        loader.load_sound(key, os.path.join(ASSETS_DIR, name), volume)
+
+class GameState:
+    """
+    Manages the game logic, state transitions, and hardware synchronization.
+    This class acts as the 'Controller' in the MVC pattern.
+    """
+    def __init__(self, serial_manager, clock=None, seed=None, controller=0):
+        """
+        :param serial_manager: Anything with a send(message) method
+        :param clock: Millisecond clock (get_ticks()); defaults to pygame's
+        :param seed: Seed for mole placement, random if omitted (see self.seed)
+        :param controller: Index of this board's controller (tags its telemetry events)
+        """
+        self.serial = serial_manager
+        self.clock = clock or LiveClock()
+        self.controller = controller
+        self.connected = True   # False once the controller is unplugged (comms.DISCONNECT_EVENT)
+        # Own RNG so a recorded session can be replayed with the same mole sequence
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self._state = STATE_MENU
+        self.previous_state = STATE_MENU 
+        self.score = 0
+        self.lives = 10
+        self.difficulty = MODE_EASY
+        
+        # --- MULTIPLAYER VARIABLES ---
+        self.is_multiplayer = False 
+        self.current_player = 1
+        self.p1_score = 0
+        self.p2_score = 0
+        self.start_time = 0  # Timestamp for tracking game duration
+        # -----------------------------
+
+        self.hit_delay_duration = 500
+        
+        # --- HAMMER ANIMATION STATE ---
+        self.is_hammering = False       
+        self.hammer_target_index = -1   
+        self.hammer_start_time = 0      
+        self.hammer_duration = HAMMER_SWING_DURATION
+        
+        # --- BONUS ---
+        self.consecutive_hits = 0 
+        
+        # --- AUDIO INIT ---
+        try:
+            # Load background music and sound effects
+            pygame.mixer.music.load(os.path.join(ASSETS_DIR, 'Menu.wav')) 
+            pygame.mixer.music.set_volume(0.3)
+            pygame.mixer.music.play(-1) # Loop indefinitely
+            
+            # Decoded on the asset loader's workers (already done if preloaded),
+            # played on reserved channels by the shared EffectPlayer
+            preload_sounds()
+            for key in SOUNDS:
+                effects.add(key, loader.sound(key))
+        except Exception as e:
+            print(f"[AUDIO] Warning: {e}")
+
+        # --- GAME LOGIC VARIABLES ---
+        self.pot_value = 0
+        self.last_stable_pot = 0 
+        
+        # Every hole's mole, with its retreat/timeout deadlines on a heap
+        self.moles = MoleField(board.holes)
+        self.hide_duration = 300
+        
+        self.game_over_selection = 0 
+        
+        self.pause_selection = 0   
+        self.pause_start_time = 0
+
+        # --- INPUT ---
+        # Commands -> typed events (coalesced, filtered) -> handle_event
+        self.inputs = InputPipeline(self)
+        self._handlers = {OP_POT: self._on_pot, OP_BTN: self._on_button, OP_CONFIRM: self._on_confirm}
+
+        # --- INIT HARDWARE ---
+        # Sync initial state with PIC (Red LED, Score 0)
+        self.serial.send('E') 
+        self.serial.send('\nSCR:0\n')
+
+    def get_speed(self):
+        """
+        Calculates the spawn speed based on difficulty and current score.
+        """
+        # Multiplayer uses a fixed fast speed
+        if self.is_multiplayer: return 1500
+
+        base_speed = 1500 
+        if self.difficulty == MODE_EASY: return 1500 
+        elif self.difficulty == MODE_MEDIUM:
+            # Increase speed as score increases
+            return max(800, base_speed - (self.score * 50))
+        elif self.difficulty == MODE_HARD:
+            return max(300, base_speed - (self.score * 80))
+        return 1500
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, new_state):
+        """ Every screen change goes through here so it ends up in the telemetry log. """
+        if new_state != self._state:
+            telemetry.log(self.clock.get_ticks(), TEL_STATE, new_state, self._state, controller=self.controller)
+        self._state = new_state
+
+    def log(self, event, a=0, b=0, value=0.0):
+        """ Telemetry record stamped with the game clock and this board's controller. """
+        telemetry.log(self.clock.get_ticks(), event, a, b, value, self.controller)
+
+    @property
+    def waiting_for_next_mole(self):
+        """ True between a hit and the next mole when nothing is left to hit (input is ignored). """
+        return self.moles.live == 0 and self.moles.whacked > 0
+
+    def spawn_mole(self):
+        """ Selects a random free hole to spawn a mole. """
+        free = self.moles.free_holes()
+        if not free: return
+        hole = self.rng.choice(free)
+        lifetime = self.get_speed()
+        self.moles.spawn(hole, self.clock.get_ticks(), lifetime, self.hide_duration)
+        self.log(TEL_SPAWN, hole, lifetime)
+
+    def fill_holes(self):
+        """
+        Spawns a mole if fewer than the mode's MAX_ACTIVE_MOLES are out.
+        Further moles follow MOLE_SPAWN_GAP apart, not all at once.
+        """
+        limit = MAX_ACTIVE_MOLES.get(self.difficulty, 1)
+        if self.moles.active() < limit:
+            self.spawn_mole()
+        if self.moles.active() < limit and not self.moles.spawn_pending:
+            self.moles.schedule_spawn(self.clock.get_ticks() + MOLE_SPAWN_GAP)
+
+    def stop_game(self):
+        """ Stops the game logic and handles transition (GameOver or Next Player). """
+        if self.is_multiplayer:
+            self.handle_player_finish()
+        else:
+            self.state = STATE_GAMEOVER
+            self._reset_game_state()
+            effects.play('over')
+            leaderboard.record(self.difficulty, self.score, self.controller + 1)
+
+    def _reset_game_state(self):
+        """ Helper to reset temporary game variables without changing the screen. """
+        self.moles.reset()
+        self.consecutive_hits = 0 
+        self.serial.send('E') # Turn LED Red
+
+    def handle_player_finish(self):
+        """ Handles the transition between players in Multiplayer mode. """
+        self._reset_game_state()
+        
+        if self.current_player == 1:
+            self.p1_score = self.score
+            self.state = STATE_WAITING_P2
+            print(f"P1 Finished. Score: {self.p1_score}")
+        else:
+            self.p2_score = self.score
+            self.state = STATE_WINNER
+            print(f"P2 Finished. Score: {self.p2_score}")
+            effects.play('over')
+            leaderboard.record(MODE_MULTIPLAYER, self.p1_score, 1)
+            leaderboard.record(MODE_MULTIPLAYER, self.p2_score, 2)
+
+    def start_next_player(self):
+        """ Prepares the game for Player 2. """
+        self.current_player = 2
+        self.score = 0
+        self.lives = 3 
+        self.start_time = self.clock.get_ticks()
+        self.state = STATE_PLAYING
+        self.log(TEL_GAME, MODE_MULTIPLAYER, self.lives)
+        self.serial.send('G')     
+        self.serial.send('\nSCR:0\n')
+        self.fill_holes()
+
+    def disconnect(self):
+        """ The controller was unplugged: abandon the game (no score) and park the board on the menu. """
+        self.connected = False
+        self.is_hammering = False
+        self._reset_game_state()
+        self.state = STATE_MENU
+
+    def cleanup(self):
+        """ Sends exit signal to hardware before closing. """
+        self.serial.send('X') 
+        print("[SERIAL] Sent exit signal 'X'")
+        
+    def toggle_pause(self):
+        """ Toggles between Playing and Paused states. """
+        if self.state == STATE_PAUSED:
+            self.state = self.previous_state
+            self.serial.send('G')
+            
+            # Adjust timers so pause duration doesn't count towards spawn time
+            pause_duration = self.clock.get_ticks() - self.pause_start_time
+            self.log(TEL_PAUSE, 0, pause_duration)
+            self.moles.shift(pause_duration)
+            self.start_time += pause_duration # Extend game timer
+            
+            self.last_stable_pot = self.pot_value
+        else:
+            if self.state == STATE_PLAYING:
+                self.previous_state = self.state
+                self.state = STATE_PAUSED
+                self.serial.send('P') # Turn LED Yellow
+                self.pause_selection = 0 
+                self.pause_start_time = self.clock.get_ticks()
+                self.log(TEL_PAUSE, 1)
+
+    def handle_hit(self, hit_index):
+        """ Logic when a button input is received. """
+        if self.state != STATE_PLAYING: return
+        if self.waiting_for_next_mole: return 
+
+        current_time = self.clock.get_ticks()
+
+        # Trigger Hammer Animation
+        self.is_hammering = True
+        self.hammer_target_index = hit_index
+        self.hammer_start_time = current_time
+        
+        moles = self.moles
+        if moles.state[hit_index] in (HOLE_UP, HOLE_HIDING):
+            # --- HIT ---
+            effects.play('hit')
+            self.score += 1
+            self.serial.send(f"SCR:{self.score}\n") # Update Score on PIC
+
+            # Bonus Life (Standard Rule)
+            self.consecutive_hits += 1
+            if self.consecutive_hits >= 10:
+                self.lives += 1
+                self.consecutive_hits = 0 
+                print("[GAMEPLAY] Bonus Life!")
+                self.log(TEL_BONUS_LIFE, 0, self.lives)
+
+            # Check if hit while hiding (partial hit logic)
+            time_elapsed = current_time - moles.spawn_time[hit_index]
+            retreat_start_time = moles.lifetime[hit_index] - self.hide_duration
+            
+            if time_elapsed > retreat_start_time:
+                time_into_retreat = time_elapsed - retreat_start_time
+                retreat_progress = time_into_retreat / self.hide_duration
+                height_ratio = max(0.0, 1.0 - retreat_progress)
+            else:
+                height_ratio = 1.0 
+
+            moles.whack(hit_index, current_time, height_ratio, self.hit_delay_duration)
+            self.log(TEL_HIT, hit_index, time_elapsed, height_ratio)
+        else:
+            # --- MISS ---
+            effects.play('miss')
+            self.log(TEL_MISS, hit_index)
+            # Note: Lives logic can be added here if needed for Single Player
+    
+    def update(self):
+        """ Main game loop update. """
+        current_time = self.clock.get_ticks()
+
+        if self.state == STATE_PAUSED:
+            self.pause_selection = 0 if self.pot_value < 512 else 1
+            return 
+
+        # --- MENU LOGIC (5 SECTIONS) ---
+        if self.state == STATE_MENU:
+            # Divide Potentiometer range (0-1023) into 5 sections
+            if self.pot_value < 205: 
+                self.difficulty = MODE_EASY
+                self.is_multiplayer = False
+            elif self.pot_value < 410: 
+                self.difficulty = MODE_MEDIUM
+                self.is_multiplayer = False
+            elif self.pot_value < 615: 
+                self.difficulty = MODE_HARD
+                self.is_multiplayer = False
+            elif self.pot_value < 820: 
+                self.difficulty = MODE_MULTIPLAYER 
+                self.is_multiplayer = True 
+            else: 
+                self.difficulty = MENU_QUIT 
+                self.is_multiplayer = False
+
+        elif self.state == STATE_PLAYING:
+            
+            # --- MULTIPLAYER TIMER CHECK ---
+            if self.is_multiplayer:
+                if current_time - self.start_time >= GAME_DURATION:
+                    self.stop_game() 
+                    return
+            
+            # --- MOLE SCHEDULE (only moles whose deadline has passed) ---
+            for event, hole in self.moles.pop_due(current_time):
+                # 1. Hiding Animation
+                if event == EV_RETREAT:
+                    self.moles.state[hole] = HOLE_HIDING
+
+                # 2. Timeout (Missed the mole)
+                elif event == EV_TIMEOUT:
+                    self.moles.clear(hole)
+                    self.lives -= 1
+                    self.consecutive_hits = 0 
+                    self.log(TEL_TIMEOUT, hole, self.lives)
+                    
+                    if self.lives <= 0:
+                        self.stop_game()
+                        return
+                    self.fill_holes()
+
+                # 3. Squash over / spawn gap elapsed: next mole
+                elif event == EV_CLEAR:
+                    self.moles.clear(hole)
+                    self.fill_holes()
+                elif event == EV_SPAWN:
+                    self.fill_holes()
+
+        elif self.state in [STATE_GAMEOVER, STATE_WINNER]:
+            self.game_over_selection = 0 if self.pot_value < 512 else 1
+
+    def next_deadline(self):
+        """
+        Returns the clock time (ms) at which update() will next change
+        something on its own (mole retreat/timeout, respawn after a hit,
+        multiplayer timer), or None if only input can change the state.
+        """
+        if self.state != STATE_PLAYING: return None
+
+        deadlines = []
+        if self.is_multiplayer:
+            end_time = self.start_time + GAME_DURATION
+            deadlines.append(end_time)
+            # The on-screen timer changes every full second
+            time_left = end_time - self.clock.get_ticks()
+            if time_left > 1000:
+                deadlines.append(end_time - ((time_left - 1) // 1000) * 1000)
+
+        mole_deadline = self.moles.next_deadline()
+        if mole_deadline is not None:
+            deadlines.append(mole_deadline)
+        return min(deadlines) if deadlines else None
+
+    def is_animating(self, now=None):
+        """ True while something on screen moves every frame (rise, retreat, squash, hammer). """
+        if self.state != STATE_PLAYING: return False
+        if now is None: now = self.clock.get_ticks()
+        if self.is_hammering: return True
+        return self.moles.is_animating(now, MOLE_RISE_DURATION)
+
+    def process_input(self, line):
+        """
+        Handles one command received from the PIC Microcontroller.
+        Example commands: "POT:512", "BTN:3", "BTN:CONFIRM"
+        """
+        self.inputs.process((line,))
+
+    def process_batch(self, lines):
+        """ Handles the commands of one simulation step (see input_pipeline.py). """
+        self.inputs.process(lines)
+
+    def handle_event(self, event):
+        """ Applies one parsed InputEvent (called by the input pipeline). """
+        self._handlers[event.op](event.value)
+
+    def _on_pot(self, new_val):
+        """ POT:<value> (coalesced and filtered) """
+        # Feature: Auto-Pause if pot is moved rapidly during game
+        if self.state == STATE_PLAYING:
+            if abs(new_val - self.last_stable_pot) > 30:
+                self.toggle_pause()
+        
+        self.pot_value = new_val
+        
+        # Update stable pot only if not in menu/intermission
+        if self.state not in [STATE_MENU, STATE_GAMEOVER, STATE_WINNER, STATE_WAITING_P2]:
+            self.last_stable_pot = new_val
+
+    def _on_confirm(self, _):
+        """ BTN:CONFIRM (yellow button) """
+        if self.state == STATE_MENU:
+            if self.difficulty == MENU_QUIT:
+                self.serial.send('X') 
+                pygame.quit(); sys.exit()
+            else:
+                # START NEW GAME
+                self.score = 0
+                self.lives = 3 # Reset lives
+                self.consecutive_hits = 0 
+                self.state = STATE_PLAYING
+                
+                if self.is_multiplayer:
+                    self.current_player = 1
+                    self.p1_score = 0
+                    self.p2_score = 0
+                    self.start_time = self.clock.get_ticks()
+                self.log(TEL_GAME, self.difficulty, self.lives)
+                
+                self.serial.send('G')     
+                self.serial.send('\nSCR:0\n')
+                self.last_stable_pot = self.pot_value
+                self.fill_holes()
+            
+        elif self.state == STATE_PLAYING:
+            self.toggle_pause()
+            
+        elif self.state == STATE_PAUSED:
+            if self.pause_selection == 0:
+                self.toggle_pause() 
+            else:
+                self.state = STATE_MENU
+                self._reset_game_state()
+                self.serial.send('\nSCR:0\n') 
+            
+        elif self.state == STATE_GAMEOVER:
+            if self.game_over_selection == 0: 
+                self.state = STATE_MENU
+                self._reset_game_state()
+                self.serial.send('\nSCR:0\n') 
+            else: 
+                self.serial.send('X') 
+                pygame.quit(); sys.exit()
+
+        # --- NEW STATE HANDLING ---
+        elif self.state == STATE_WAITING_P2:
+            self.start_next_player()
+
+        elif self.state == STATE_WINNER:
+            if self.game_over_selection == 0: # Play Again
+                self.state = STATE_MENU
+                self._reset_game_state()
+                self.serial.send('\nSCR:0\n')
+            else: # Quit
+                self.serial.send('X')
+                pygame.quit(); sys.exit()
+
+    def _on_button(self, button):
+        """ BTN:<n>; pause and transitions never get here (input_pipeline.IGNORED) """
+        hole = board.hole_for_button(button)
+        if hole is not None:
+            self.handle_hit(hole)
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Inbound command pipeline: command strings -> typed events -> GameState.
+
+Commands that arrive in the same simulation step are handled as one batch:
+
+1. Parse: known commands ("POT:512", "BTN:3", "BTN:CONFIRM") are looked up
+   in a table built at import time that maps each string to its prebuilt
+   event, so there is no splitting or int() per command. Anything else falls
+   back to parse_command().
+2. Coalesce: only the newest potentiometer sample of a batch is kept. Older
+   samples still feed the filter, but never reach the state logic, so a
+   burst of jitter cannot toggle the auto-pause several times.
+3. Filter: the kept sample goes through POT_FILTER ('hysteresis', 'median'
+   or None). A value the filter leaves unchanged is not delivered.
+4. Drop: events the current state ignores (IGNORED) are counted and
+   skipped before GameState.handle_event runs.
+"""
+from collections import deque, namedtuple
+from config import (POT_FILTER, POT_HYSTERESIS, POT_MEDIAN_WINDOW, STATE_MENU, STATE_PLAYING, STATE_PAUSED,
+                    STATE_GAMEOVER, STATE_WAITING_P2, STATE_WINNER)
+from comms import OP_POT, OP_BTN, OP_CONFIRM
+from telemetry import telemetry, TEL_COMMAND
+
+# One inbound command: op = comms.OP_* opcode, value = pot reading / button index
+InputEvent = namedtuple('InputEvent', 'op value')
+
+POT_MAX = 1023      # 10-bit ADC
+CONFIRM = InputEvent(OP_CONFIRM, 0)
+POT_EVENTS = [InputEvent(OP_POT, v) for v in range(POT_MAX + 1)]
+
+def _build_command_table():
+    """ Every regular command string -> its event. """
+    table = {f"POT:{v}": event for v, event in enumerate(POT_EVENTS)}
+    table.update({f"BTN:{b}": InputEvent(OP_BTN, b) for b in range(256)})
+    table["BTN:CONFIRM"] = CONFIRM
+    return table
+
+COMMAND_TABLE = _build_command_table()
+
+# Prefix -> opcode for values outside the table (e.g. "POT:1500")
+_PREFIXES = (("POT:", OP_POT), ("BTN:", OP_BTN))
+
+def parse_command(line):
+    """ Slow path for commands not in COMMAND_TABLE. Returns an InputEvent or None. """
+    if "BTN:CONFIRM" in line: return CONFIRM
+    for prefix, op in _PREFIXES:
+        if line.startswith(prefix):
+            try: return InputEvent(op, int(line[len(prefix):].split(":")[0]))
+            except ValueError: return None
+    return None
+
+# Opcodes a state does nothing with: buttons only count while playing
+IGNORED = {
+    STATE_MENU: frozenset((OP_BTN,)),
+    STATE_PLAYING: frozenset(),
+    STATE_PAUSED: frozenset((OP_BTN,)),
+    STATE_GAMEOVER: frozenset((OP_BTN,)),
+    STATE_WAITING_P2: frozenset((OP_BTN,)),
+    STATE_WINNER: frozenset((OP_BTN,)),
+}
+
+class PotFilter:
+    """
+    Smooths potentiometer readings.
+    'hysteresis': the value only moves once the reading is more than
+                  POT_HYSTERESIS counts away from it (removes LSB jitter)
+    'median':     median of the last POT_MEDIAN_WINDOW readings (removes
+                  single-sample spikes; lags behind, so it suits controllers
+                  that stream readings rather than send changes only)
+    None:         raw readings
+    """
+    def __init__(self, mode=POT_FILTER, hysteresis=POT_HYSTERESIS, window=POT_MEDIAN_WINDOW):
+        if mode not in ('hysteresis', 'median', None):
+            raise ValueError(f"unknown POT_FILTER {mode!r}")
+        self.mode = mode
+        self.hysteresis = hysteresis
+        self.samples = deque(maxlen=window)
+        self.value = None
+
+    def feed(self, reading):
+        """ Adds a reading that will not be delivered (coalesced), median history only. """
+        if self.mode == 'median': self.samples.append(reading)
+
+    def apply(self, reading):
+        """ Filters the reading that will be delivered. Returns the new value. """
+        if self.mode == 'hysteresis':
+            if self.value is None or abs(reading - self.value) > self.hysteresis:
+                self.value = reading
+        elif self.mode == 'median':
+            self.samples.append(reading)
+            self.value = sorted(self.samples)[len(self.samples) // 2]
+        else:
+            self.value = reading
+        return self.value
+
+class InputPipeline:
+    """ Parses, coalesces, filters and routes one board's commands. """
+    def __init__(self, game, pot_filter=None):
+        """
+        :param game: GameState receiving the events (handle_event, log, state)
+        :param pot_filter: PotFilter, one configured by POT_FILTER if omitted
+        """
+        self.game = game
+        self.pot_filter = pot_filter or PotFilter()
+        self.parsed = 0         # Commands turned into events
+        self.invalid = 0        # Unrecognised commands
+        self.coalesced = 0      # Pot samples replaced by a newer one in the same batch
+        self.filtered = 0       # Pot samples the filter left unchanged
+        self.dropped = 0        # Events the state they arrived in ignores
+        self._batch = []
+
+    def process(self, lines):
+        """ Handles the commands of one simulation step, in order. """
+        game = self.game
+        table = COMMAND_TABLE
+        batch = self._batch
+        newest_pot = -1
+        for line in lines:
+            event = table.get(line)
+            if event is None:
+                event = parse_command(line)
+                if event is None:
+                    self.invalid += 1
+                    continue
+            if telemetry.enabled:
+                game.log(TEL_COMMAND, event.op, event.value)
+            if event.op == OP_POT:
+                if newest_pot >= 0:
+                    # Superseded: keep the slot order, deliver only the newest
+                    self.pot_filter.feed(batch[newest_pot].value)
+                    batch[newest_pot] = None
+                    self.coalesced += 1
+                newest_pot = len(batch)
+            batch.append(event)
+        self.parsed += len(batch)
+
+        try:
+            for event in batch:
+                if event is None: continue
+                # The state may change within the batch (e.g. CONFIRM starts a game)
+                if event.op in IGNORED.get(game.state, ()):
+                    self.dropped += 1
+                    continue
+                if event.op == OP_POT:
+                    previous = self.pot_filter.value
+                    value = self.pot_filter.apply(event.value)
+                    if value == previous:
+                        self.filtered += 1
+                        continue
+                    if value != event.value:
+                        event = POT_EVENTS[value] if 0 <= value <= POT_MAX else InputEvent(OP_POT, value)
+                game.handle_event(event)
+        finally:
+            batch.clear()
+
+    def counts(self):
+        return {'parsed': self.parsed, 'coalesced': self.coalesced, 'filtered': self.filtered,
+                'dropped': self.dropped, 'invalid': self.invalid}
+
+    def format_report(self):
+        return "[INPUT] " + ", ".join(f"{name} {count}" for name, count in self.counts().items())
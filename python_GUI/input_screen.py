@@ -1,220 +1,282 @@
-import pygame
-import serial
-import threading
-import os
-import time
-import math
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, COLOR_BG, COLOR_SELECT, COLOR_TEXT
-
-# --- RESOURCE PATHS ---
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
-
-# --- GLOBAL RESOURCES ---
-assets = {}
-fonts = {}
-
-def init_resources():
-    """
-    Lazily initializes fonts and loads images to improve startup performance.
-    """
-    if 'initialized' in assets: return
-
-    pygame.font.init()
-    try:
-        # Use modern fonts if available, fallback to system default if not
-        fonts['title'] = pygame.font.SysFont("Chalkboard SE", 60, bold=True)
-        fonts['input'] = pygame.font.SysFont("Arial Rounded MT Bold", 48)
-        fonts['status'] = pygame.font.SysFont("Arial", 28)
-        fonts['hint'] = pygame.font.SysFont("Arial Rounded MT Bold", 20)
-    except:
-        # Fallback fonts
-        fonts['title'] = pygame.font.SysFont("Arial", 60, bold=True)
-        fonts['input'] = pygame.font.SysFont("Arial", 48)
-        fonts['status'] = pygame.font.SysFont("Arial", 28)
-        fonts['hint'] = pygame.font.SysFont("Arial", 20)
-
-    def load_img(name, size=None):
-        path = os.path.join(ASSETS_DIR, name)
-        try:
-            img = pygame.image.load(path).convert_alpha()
-            if size: img = pygame.transform.scale(img, size)
-            return img
-        except: return None
-
-    assets['bg'] = load_img('bg.png', (SCREEN_WIDTH, SCREEN_HEIGHT))
-    assets['initialized'] = True
-
-# --- GLOBAL VARIABLES FOR THREADING ---
-connection_result = None
-is_checking = False
-
-def threaded_check_connection(port_name):
-    """
-    Background thread to check if the COM port is valid.
-    This prevents the UI from freezing while waiting for a serial connection.
-    """
-    global connection_result, is_checking
-    try:
-        # Try to open the port with a timeout
-        s = serial.Serial(port_name, 9600, timeout=2)
-        s.close() # Close immediately if successful
-        connection_result = (True, "Connection Successful")
-    except serial.SerialException:
-        connection_result = (False, f"Failed to open {port_name}")
-    except Exception as e:
-        connection_result = (False, f"Error: {str(e)}")
-    
-    is_checking = False 
-
-def draw_text_centered(screen, text, font, color, center_y, shadow=True):
-    """ Helper function to draw centered text with a drop shadow effect. """
-    if shadow:
-        shadow_surf = font.render(text, True, (0, 0, 0))
-        shadow_rect = shadow_surf.get_rect(center=(SCREEN_WIDTH//2 + 2, center_y + 2))
-        screen.blit(shadow_surf, shadow_rect)
-    
-    surf = font.render(text, True, color)
-    rect = surf.get_rect(center=(SCREEN_WIDTH//2, center_y))
-    screen.blit(surf, rect)
-
-def get_port_from_user(screen):
-    """
-    Main loop for the Port Selection Screen.
-    Allows user to type the COM port and validates it.
-    """
-    global connection_result, is_checking
-    
-    init_resources()
-    
-    input_text = "COM" # Default prefix
-    status_text = "Enter Device Port"
-    status_color = (200, 200, 200)
-    
-    clock = pygame.time.Clock()
-    cursor_visible = True
-    cursor_timer = 0
-    pulse_timer = 0 # For breathing text effect
-
-    while True:
-        # --- 1. Draw Background ---
-        if assets['bg']:
-            screen.blit(assets['bg'], (0, 0))
-        else:
-            screen.fill(COLOR_BG)
-            
-        # Add a dark overlay to make text pop
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180) 
-        overlay.fill((20, 20, 20))
-        screen.blit(overlay, (0, 0))
-
-        # --- 2. Draw Title ---
-        draw_text_centered(screen, "CONTROLLER SETUP", fonts['title'], COLOR_SELECT, 150)
-
-        # --- 3. Draw Input Box ---
-        box_width, box_height = 360, 80
-        box_center_x = SCREEN_WIDTH // 2
-        box_center_y = 280
-        box_rect = pygame.Rect(box_center_x - box_width//2, box_center_y - box_height//2, box_width, box_height)
-        
-        # Change border color if currently checking connection
-        if is_checking: 
-            border_color = (255, 255, 0) # Yellow for checking
-            bg_color = (60, 60, 40)
-        else: 
-            border_color = (255, 255, 255) # White for idle
-            bg_color = (50, 50, 50)
-            
-        pygame.draw.rect(screen, bg_color, box_rect, border_radius=15)
-        pygame.draw.rect(screen, border_color, box_rect, 4, border_radius=15)
-
-        # --- 4. Draw Input Text ---
-        txt_surf = fonts['input'].render(input_text, True, (255, 255, 255))
-        txt_rect = txt_surf.get_rect(center=box_rect.center)
-        screen.blit(txt_surf, txt_rect)
-        
-        # --- 5. Draw Blinking Cursor ---
-        if not is_checking and cursor_visible:
-            cursor_h = 40
-            cursor_rect = pygame.Rect(txt_rect.right + 4, box_center_y - cursor_h//2, 3, cursor_h)
-            pygame.draw.rect(screen, (255, 255, 255), cursor_rect)
-
-        # --- 6. Draw Status Message ---
-        if "Success" in status_text: status_color = (100, 255, 100)
-        elif "Failed" in status_text or "Error" in status_text: status_color = (255, 80, 80)
-        
-        draw_text_centered(screen, status_text, fonts['status'], status_color, 380)
-
-        # --- 7. Draw Bottom Hint (Breathing Animation) ---
-        pulse_val = (math.sin(pulse_timer * 0.005) + 1) * 0.5 # 0.0 ~ 1.0
-        alpha = int(100 + pulse_val * 155) # Calculate alpha for fading
-        
-        hint_surf = fonts['hint'].render("Press ENTER to Connect   |   ESC to Quit", True, (180, 180, 180))
-        hint_surf.set_alpha(alpha) 
-        hint_rect = hint_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 60))
-        screen.blit(hint_surf, hint_rect)
-
-        pygame.display.flip()
-
-        # --- EVENT HANDLING ---
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return None
-            
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    if is_checking:
-                        is_checking = False
-                        status_text = "Cancelled"
-                        status_color = (255, 100, 100)
-                    else:
-                        return None
-                
-                elif event.key == pygame.K_RETURN:
-                    # Start connection check
-                    if not is_checking and len(input_text) > 0:
-                        is_checking = True
-                        connection_result = None
-                        status_text = "Connecting..."
-                        status_color = (255, 255, 0)
-                        
-                        # Start thread
-                        t = threading.Thread(target=threaded_check_connection, args=(input_text,))
-                        t.daemon = True
-                        t.start()
-                
-                elif not is_checking:
-                    # Handle typing
-                    if event.key == pygame.K_BACKSPACE:
-                        input_text = input_text[:-1]
-                    else:
-                        if len(input_text) < 10: 
-                            input_text += event.unicode.upper()
-
-        # --- CHECK RESULT FROM THREAD ---
-        if connection_result is not None:
-            success, msg = connection_result
-            if success:
-                status_text = msg
-                # Force draw one last frame to show success
-                pygame.draw.rect(screen, (20, 20, 20), (0, 360, SCREEN_WIDTH, 50)) 
-                draw_text_centered(screen, status_text, fonts['status'], (100, 255, 100), 380)
-                pygame.display.flip()
-                
-                print("[DEBUG] Waiting 1.5s for port release...")
-                time.sleep(1.5) # Wait for OS to release the port handle
-                return input_text
-            else:
-                status_text = msg
-                status_color = (255, 80, 80)
-                connection_result = None
-
-        # Update Timers
-        dt = clock.tick(30)
-        cursor_timer += dt
-        pulse_timer += dt
-        
-        if cursor_timer > 500:
-            cursor_visible = not cursor_visible
-            cursor_timer = 0
\ No newline at end of file
+import pygame
+import os
+import time
+import math
+from port_scanner import PortScanner, PROBING, READY, SILENT, FAILED
+from config import SCREEN_WIDTH, SCREEN_HEIGHT, COLOR_BG, COLOR_SELECT, COLOR_TEXT
+from text_cache import text_cache
+from asset_loader import loader
+
+# --- RESOURCE PATHS ---
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
+
+# --- GLOBAL RESOURCES ---
+assets = {}
+fonts = {}
+
+# Bottom hint, faded in and out every frame
+HINT_TEXT = "UP/DOWN Select   |   ENTER Connect   |   F5 Retry   |   ESC Quit"
+
+def init_resources():
+    """
+    Lazily initializes fonts and loads images to improve startup performance.
+    """
+    if 'initialized' in assets: return
+
+    pygame.font.init()
+    try:
+        # Use modern fonts if available, fallback to system default if not
+        fonts['title'] = pygame.font.SysFont("Chalkboard SE", 60, bold=True)
+        fonts['input'] = pygame.font.SysFont("Arial Rounded MT Bold", 48)
+        fonts['status'] = pygame.font.SysFont("Arial", 28)
+        fonts['item'] = pygame.font.SysFont("Arial", 22)
+        fonts['hint'] = pygame.font.SysFont("Arial Rounded MT Bold", 20)
+    except:
+        # Fallback fonts
+        fonts['title'] = pygame.font.SysFont("Arial", 60, bold=True)
+        fonts['input'] = pygame.font.SysFont("Arial", 48)
+        fonts['status'] = pygame.font.SysFont("Arial", 28)
+        fonts['item'] = pygame.font.SysFont("Arial", 22)
+        fonts['hint'] = pygame.font.SysFont("Arial", 20)
+
+    # Same key as the game background, so it is decoded only once
+    loader.load_image('bg', os.path.join(ASSETS_DIR, 'bg.png'), (SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets['bg'] = loader.image('bg')
+
+    # Dark overlay to make text pop, built once instead of every frame
+    assets['overlay'] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets['overlay'].set_alpha(180)
+    assets['overlay'].fill((20, 20, 20))
+
+    # Own surface, not the shared text cache: its alpha changes every frame
+    assets['hint'] = fonts['hint'].render(HINT_TEXT, True, (180, 180, 180))
+    assets['initialized'] = True
+
+# --- PORT LIST ---
+MAX_LIST_ROWS = 6
+LIST_TOP = 320
+LIST_ROW_HEIGHT = 34
+
+def draw_text_centered(screen, text, font, color, center_y, shadow=True):
+    """ Helper function to draw centered text with a drop shadow effect. """
+    shadow_color = (0, 0, 0) if shadow else None
+    surf = text_cache.get(text, font, color, shadow_color)
+    w, h = text_cache.text_size(text, font, color, shadow_color)
+    screen.blit(surf, (SCREEN_WIDTH//2 - w//2, center_y - h//2))
+
+def describe_probe(probe):
+    """ Returns (label, color) for the state column of the port list. """
+    if probe.state == READY: return f"ready  {probe.rtt * 1000:.0f} ms", (100, 255, 100)
+    if probe.state == SILENT: return "no reply", (255, 200, 80)
+    if probe.state == FAILED: return "unavailable", (255, 80, 80)
+    return "probing...", (200, 200, 200)
+
+def draw_port_list(screen, probes, selected_port):
+    """ Draws the discovered ports, best first, with the selected one highlighted. """
+    if not probes:
+        draw_text_centered(screen, "Searching for controllers...", fonts['item'], (160, 160, 160), LIST_TOP + 16)
+        return
+    left, right = SCREEN_WIDTH//2 - 220, SCREEN_WIDTH//2 + 220
+    for row, probe in enumerate(probes[:MAX_LIST_ROWS]):
+        y = LIST_TOP + row * LIST_ROW_HEIGHT
+        if probe.port == selected_port:
+            pygame.draw.rect(screen, (70, 70, 50), (left - 12, y, right - left + 24, LIST_ROW_HEIGHT - 4), border_radius=8)
+        name_color = COLOR_SELECT if probe.port == selected_port else (230, 230, 230)
+        name = text_cache.get(probe.port, fonts['item'], name_color)
+        screen.blit(name, (left, y + (LIST_ROW_HEIGHT - 4 - name.get_height()) // 2))
+        label, color = describe_probe(probe)
+        state = text_cache.get(label, fonts['item'], color)
+        screen.blit(state, (right - state.get_width(), y + (LIST_ROW_HEIGHT - 4 - state.get_height()) // 2))
+
+def get_port_from_user(screen, timer=None):
+    """
+    Main loop for the Port Selection Screen.
+    Ports are discovered and probed in the background (PortScanner); the best
+    responder is pre-selected. UP/DOWN picks another one, typing enters a port
+    by hand (e.g. COM7), ENTER connects, F5 probes the selected port again.
+    :param timer: Optional PhaseTimer that gets the discovery + handshake times
+    :return: The open serial.Serial, or None if the user quit
+    """
+    init_resources()
+
+    scanner = PortScanner().start()
+    opened = time.perf_counter()
+    first_found = None
+
+    input_text = "" # Selected or typed port
+    user_typed = False
+    connecting = None # Port we are waiting for after ENTER
+    selected = None   # Open serial.Serial handed to the game
+    status_text = "Searching for controllers..."
+    status_color = (200, 200, 200)
+    
+    clock = pygame.time.Clock()
+    cursor_visible = True
+    cursor_timer = 0
+    pulse_timer = 0 # For breathing text effect
+
+    try:
+        while True:
+            probes = scanner.results()
+
+            # --- Auto-select the best responder until the user takes over ---
+            ready = [p for p in probes if p.state == READY]
+            if ready and first_found is None:
+                first_found = time.perf_counter() - opened
+            if not user_typed and connecting is None:
+                if ready: input_text = ready[0].port
+                elif not input_text and probes: input_text = probes[0].port
+                if ready: status_text, status_color = f"Found {len(ready)} controller(s)", (100, 255, 100)
+
+            # --- Result of the port we are connecting to ---
+            if connecting is not None:
+                probe = scanner.get(connecting)
+                if probe is None:
+                    status_text, status_color = f"Failed to open {connecting}", (255, 80, 80)
+                    connecting = None
+                elif probe.state == FAILED:
+                    status_text, status_color = f"Failed to open {connecting}", (255, 80, 80)
+                    connecting = None
+                elif probe.state != PROBING:
+                    selected = scanner.take(connecting)
+                    if selected is not None:
+                        if probe.state == SILENT:
+                            print(f"[SETUP] Warning: {connecting} opened but the PIC did not answer")
+                        status_text = "Connection Successful"
+                        if timer:
+                            if first_found is not None: timer.add("port discovery", first_found)
+                            if probe.rtt is not None: timer.add("link handshake", probe.rtt)
+                        # Show the success message on this last frame
+                        status_color = (100, 255, 100)
+                    else:
+                        status_text, status_color = f"Failed to open {connecting}", (255, 80, 80)
+                        connecting = None
+
+            # --- 1. Draw Background ---
+            if assets['bg']:
+                screen.blit(assets['bg'], (0, 0))
+            else:
+                screen.fill(COLOR_BG)
+                
+            # Add a dark overlay to make text pop
+            screen.blit(assets['overlay'], (0, 0))
+
+            # --- 2. Draw Title ---
+            draw_text_centered(screen, "CONTROLLER SETUP", fonts['title'], COLOR_SELECT, 100)
+
+            # --- 3. Draw Input Box ---
+            box_width, box_height = 440, 80
+            box_center_x = SCREEN_WIDTH // 2
+            box_center_y = 200
+            box_rect = pygame.Rect(box_center_x - box_width//2, box_center_y - box_height//2, box_width, box_height)
+            
+            # Change border color if currently checking connection
+            if connecting is not None: 
+                border_color = (255, 255, 0) # Yellow for checking
+                bg_color = (60, 60, 40)
+            else: 
+                border_color = (255, 255, 255) # White for idle
+                bg_color = (50, 50, 50)
+                
+            pygame.draw.rect(screen, bg_color, box_rect, border_radius=15)
+            pygame.draw.rect(screen, border_color, box_rect, 4, border_radius=15)
+
+            # --- 4. Draw Input Text ---
+            txt_surf = text_cache.get(input_text, fonts['input'], (255, 255, 255))
+            txt_rect = txt_surf.get_rect(center=box_rect.center)
+            screen.blit(txt_surf, txt_rect)
+            
+            # --- 5. Draw Blinking Cursor ---
+            if connecting is None and cursor_visible:
+                cursor_h = 40
+                cursor_rect = pygame.Rect(txt_rect.right + 4, box_center_y - cursor_h//2, 3, cursor_h)
+                pygame.draw.rect(screen, (255, 255, 255), cursor_rect)
+
+            # --- 6. Draw Status Message ---
+            draw_text_centered(screen, status_text, fonts['status'], status_color, 275)
+
+            # --- 7. Draw Discovered Ports ---
+            draw_port_list(screen, probes, input_text)
+
+            # --- 8. Draw Bottom Hint (Breathing Animation) ---
+            pulse_val = (math.sin(pulse_timer * 0.005) + 1) * 0.5 # 0.0 ~ 1.0
+            alpha = int(100 + pulse_val * 155) # Calculate alpha for fading
+            
+            hint_surf = assets['hint']
+            hint_surf.set_alpha(alpha) 
+            hint_rect = hint_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 40))
+            screen.blit(hint_surf, hint_rect)
+
+            pygame.display.flip()
+
+            if selected is not None:
+                return selected
+
+            # --- EVENT HANDLING ---
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return None
+                
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        if connecting is not None:
+                            connecting = None
+                            status_text = "Cancelled"
+                            status_color = (255, 100, 100)
+                        else:
+                            return None
+                    
+                    elif event.key == pygame.K_RETURN:
+                        # Connect as soon as the port's probe has finished
+                        if connecting is None and len(input_text) > 0:
+                            connecting = input_text
+                            status_text = "Connecting..."
+                            status_color = (255, 255, 0)
+                            probe = scanner.get(connecting)
+                            if probe is not None and probe.state == FAILED:
+                                scanner.retry(connecting)
+                            else:
+                                scanner.check(connecting, manual=True)
+
+                    elif connecting is not None:
+                        continue
+
+                    elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                        # Pick another discovered port
+                        ports = [p.port for p in probes[:MAX_LIST_ROWS]]
+                        if ports:
+                            step = -1 if event.key == pygame.K_UP else 1
+                            idx = ports.index(input_text) + step if input_text in ports else 0
+                            input_text = ports[idx % len(ports)]
+                            user_typed = True
+
+                    elif event.key == pygame.K_F5:
+                        # Probe the selected port again (e.g. controller switched on late)
+                        if input_text: scanner.retry(input_text)
+
+                    elif event.unicode or event.key == pygame.K_BACKSPACE:
+                        # Handle typing (replaces the auto-selected port)
+                        if not user_typed and event.key != pygame.K_BACKSPACE:
+                            input_text = ""
+                        user_typed = True
+                        if event.key == pygame.K_BACKSPACE:
+                            input_text = input_text[:-1]
+                        else:
+                            # Windows names are upper case (COM7); Linux device
+                            # paths such as /dev/rfcomm0 or an emulator pty are not
+                            if len(input_text) < 16:
+                                char = event.unicode
+                                input_text += char if input_text.startswith('/') or char == '/' else char.upper()
+
+            # Update Timers
+            dt = clock.tick(30)
+            cursor_timer += dt
+            pulse_timer += dt
+            
+            if cursor_timer > 500:
+                cursor_visible = not cursor_visible
+                cursor_timer = 0
+    finally:
+        # Closes every probed port except the one handed to the game
+        scanner.stop()
@@ -0,0 +1,112 @@
+import time
+
+# --- PIPELINE STAGES ---
+# Each stage is measured from the end of the previous one:
+#   read   : last byte on the UART    -> command taken by the game loop
+#   parse  : game loop                -> GameState.process_batch done (whole step)
+#   update : parse done               -> first GameState.update after it done
+#   render : update done              -> renderer.draw done (incl. waiting for the frame)
+#   flip   : draw done                -> pygame.display.flip done
+STAGES = ("read", "parse", "update", "render", "flip")
+
+class LatencyHistogram:
+    """
+    Fixed-bucket streaming histogram (constant memory, O(1) insert).
+    Values are in milliseconds; anything above max_ms lands in the last bucket
+    but still updates the exact max.
+    """
+    def __init__(self, bucket_ms=0.05, max_ms=500):
+        self.bucket_ms = bucket_ms
+        self.buckets = [0] * (int(max_ms / bucket_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms):
+        idx = int(value_ms / self.bucket_ms)
+        if idx >= len(self.buckets): idx = len(self.buckets) - 1
+        elif idx < 0: idx = 0
+        self.buckets[idx] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max: self.max = value_ms
+
+    def percentile(self, pct):
+        """ Returns the upper edge of the bucket holding the given percentile. """
+        if self.count == 0: return 0.0
+        target = self.count * pct / 100.0
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(self.max, (idx + 1) * self.bucket_ms)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+class InputLatencyTracker:
+    """
+    Follows every inbound command from UART arrival until the frame that
+    shows its effect has been flipped, and keeps per-stage histograms.
+    All timestamps come from time.perf_counter().
+    """
+    def __init__(self):
+        self.histograms = {name: LatencyHistogram() for name in STAGES + ("total",)}
+        # Events not yet on screen: [arrival, dequeued, parsed, updated]
+        self._pending = []
+        self._render_done = 0.0
+
+    def begin(self, arrival):
+        """ Called when the game loop takes a command off the serial queue. """
+        event = [arrival, time.perf_counter(), 0.0, 0.0]
+        self._pending.append(event)
+        return event
+
+    def parsed(self, event):
+        """ Called once GameState.process_batch has handled the command's step. """
+        event[2] = time.perf_counter()
+
+    def update_done(self):
+        """ Called after GameState.update; stamps events that were waiting for it. """
+        now = time.perf_counter()
+        for event in self._pending:
+            if not event[3]: event[3] = now
+
+    def render_done(self):
+        self._render_done = time.perf_counter()
+
+    def frame_presented(self):
+        """ Called right after display.flip(); closes every event of this frame. """
+        if not self._pending: return
+        now = time.perf_counter()
+        h = self.histograms
+        render_done = self._render_done
+        for arrival, dequeued, parsed, updated in self._pending:
+            if not parsed: parsed = dequeued
+            if not updated: updated = parsed
+            h['read'].add((dequeued - arrival) * 1000.0)
+            h['parse'].add((parsed - dequeued) * 1000.0)
+            h['update'].add((updated - parsed) * 1000.0)
+            h['render'].add(max(0.0, render_done - updated) * 1000.0)
+            h['flip'].add((now - max(render_done, updated)) * 1000.0)
+            h['total'].add((now - arrival) * 1000.0)
+        self._pending.clear()
+
+    def summary(self):
+        """ Returns {stage: {count, mean, p50, p95, p99, max}} in milliseconds. """
+        return {name: hist.summary() for name, hist in self.histograms.items()}
+
+    def format_report(self):
+        """ Human readable table of the current statistics. """
+        lines = [f"{'stage':<8}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<8}{s['count']:>8}{s['p50']:>9.2f}{s['p95']:>9.2f}{s['p99']:>9.2f}{s['max']:>9.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,78 @@
+import pygame
+from config import (SCREEN_WIDTH, SCREEN_HEIGHT, MOLE_RADIUS,
+                    BOARD_ROWS, BOARD_COLS, BOARD_SPACING, BOARD_HOLE_SCALE)
+
+# --- BOARD AREA (the 3x3 grid's cells; every board is fitted into it) ---
+REFERENCE_CELL = (SCREEN_WIDTH // 3, SCREEN_HEIGHT // 5 - 10)
+BOARD_TOP = SCREEN_HEIGHT // 4 + 140 - REFERENCE_CELL[1] // 2
+BOARD_HEIGHT = 3 * REFERENCE_CELL[1]
+
+class BoardLayout:
+    """
+    Screen geometry of a rows x cols board, computed once.
+    Holes are numbered row by row from the top left, which is also the
+    controller's button numbering. Everything the renderer, the game and the
+    input parsing need per hole is a table lookup, so a bigger board costs no
+    layout math per frame.
+    """
+    def __init__(self, rows=BOARD_ROWS, cols=BOARD_COLS, spacing=BOARD_SPACING, hole_scale=BOARD_HOLE_SCALE):
+        """
+        :param spacing: Distance between hole centers relative to an evenly filled board
+        :param hole_scale: Sprite size multiplier on top of the automatic fit
+        """
+        self.rows = rows
+        self.cols = cols
+        self.holes = rows * cols
+
+        # Sprites keep their 3x3 proportions and shrink with the cells
+        gap_x = SCREEN_WIDTH // cols
+        gap_y = BOARD_HEIGHT // rows
+        fit = min(1.0, gap_x / REFERENCE_CELL[0], gap_y / REFERENCE_CELL[1])
+        self.scale = fit * hole_scale
+        self.radius = max(1, int(MOLE_RADIUS * self.scale))
+        r = self.radius
+        self.hole_size = (int(r * 1.8), int(r * 1.8))
+        self.mole_size = (int(r * 1.1), int(r * 1.3))
+        self.hammer_size = (int(r * 1.5), int(r * 1.5))
+
+        # --- PER-HOLE TABLES (index = hole number) ---
+        start_x = SCREEN_WIDTH // (2 * cols)
+        start_y = BOARD_TOP + gap_y // 2
+        mid_x = start_x + gap_x * (cols - 1) / 2
+        mid_y = start_y + gap_y * (rows - 1) / 2
+        self.cells = []          # (row, col)
+        self.centers = []
+        for row in range(rows):
+            for col in range(cols):
+                x = start_x + col * gap_x
+                y = start_y + row * gap_y
+                if spacing != 1.0:
+                    x = int(round(mid_x + (x - mid_x) * spacing))
+                    y = int(round(mid_y + (y - mid_y) * spacing))
+                self.cells.append((row, col))
+                self.centers.append((x, y))
+
+        self.hole_rects = [pygame.Rect(0, 0, *self.hole_size) for _ in self.centers]
+        for rect, center in zip(self.hole_rects, self.centers):
+            rect.center = center
+
+        # Moles rise from a baseline just below the hole center; one rect per visible height
+        w, h = self.mole_size
+        self.mole_anchors = [(x - w // 2, y + int(10 * self.scale)) for x, y in self.centers]
+        self.mole_rects = [[pygame.Rect(x, bottom - visible_h, w, visible_h) for visible_h in range(h + 1)]
+                           for x, bottom in self.mole_anchors]
+
+        # Hammer head hovers above and right of the hole (add to a frame centered on 0,0)
+        self.hammer_offsets = [(x + int(r * 0.4), y - int(r * 0.8)) for x, y in self.centers]
+
+        # Controller button -> hole (buttons are numbered like the holes)
+        self.button_holes = list(range(self.holes))
+
+    def hole_for_button(self, button):
+        """ Hole hit by a controller button, or None if the board has no such hole. """
+        if 0 <= button < len(self.button_holes):
+            return self.button_holes[button]
+        return None
+
+# Shared by renderer.py and game_state.py
+board = BoardLayout()
@@ -0,0 +1,224 @@
+"""
+Persistent high scores for the menu's leaderboards.
+
+Every finished game (GAME OVER, and both players' results on the WINNER
+screen) is stored in an SQLite database (WAL journal) indexed by score, mode
+and day. The game never touches the database itself:
+
+- record() queues the score for a background thread, which inserts whatever
+  has piled up in one transaction, so a game-over never waits on the disk.
+- The boards the menu shows (all-time, today, per mode) are kept in memory.
+  They are loaded once at start and then updated in place by record(), so
+  drawing the menu never runs a query.
+
+    python leaderboard.py        # print the boards
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+import pygame
+from config import (LEADERBOARD_DB, LEADERBOARD_SIZE, LEADERBOARD_BATCH_DELAY, MODE_EASY, MODE_MEDIUM,
+                    MODE_HARD, MODE_MULTIPLAYER, MODE_NAMES)
+
+# Board keys besides the game modes
+BOARD_ALL = 'all'
+BOARD_TODAY = 'today'
+BOARDS = [BOARD_ALL, BOARD_TODAY, MODE_EASY, MODE_MEDIUM, MODE_HARD, MODE_MULTIPLAYER]
+
+# Posted when the boards finish loading in the background, so the menu redraws
+LEADERBOARD_EVENT = pygame.event.custom_type()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id      INTEGER PRIMARY KEY,
+    created REAL    NOT NULL,   -- time.time()
+    day     TEXT    NOT NULL,   -- local date, YYYY-MM-DD
+    mode    INTEGER NOT NULL,   -- MODE_*
+    player  INTEGER NOT NULL,   -- 1 or 2 (multiplayer turn / controller)
+    score   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_by_mode  ON scores (mode, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_by_day   ON scores (day, score DESC, created);
+"""
+COLUMNS = "score, created, mode, player"
+
+def _rank(entry):
+    """ Higher score first; on a tie the older score stays ahead. """
+    return (-entry[0], entry[1])
+
+class ScoreStore:
+    """
+    Score database plus the in-memory top lists.
+    Entries are (score, created, mode, player) tuples, best first.
+    """
+    def __init__(self, path=LEADERBOARD_DB, size=LEADERBOARD_SIZE, batch_delay=LEADERBOARD_BATCH_DELAY):
+        """
+        :param size: Entries kept per board
+        :param batch_delay: Seconds the writer waits for more scores before committing
+        """
+        self.path = path
+        self.size = size
+        self.batch_delay = batch_delay
+        self.enabled = False                # Off until start(): replays and benchmarks store nothing
+        self.loaded = False
+        self.version = 0                    # Bumped whenever a board changes
+        self.stored = 0                     # Scores committed to disk this session
+
+        self._boards = {board: [] for board in BOARDS}
+        self._today = date.today().isoformat()
+        self._queue = []                    # (created, day, mode, player, score) not inserted yet
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        """ Opens the database and loads the boards on the writer thread. """
+        if self._thread is not None: return
+        self.enabled = True
+        self._thread = threading.Thread(target=self._writer_loop, name="leaderboard-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, mode, score, player=1):
+        """ Adds a finished game's score (game thread, never blocks on I/O). """
+        if not self.enabled: return
+        created = time.time()
+        day = date.fromtimestamp(created).isoformat()
+        entry = (score, created, mode, player)
+        with self._lock:
+            self._queue.append((created, day, mode, player, score))
+            if self.loaded:
+                self._insert(entry, day)
+        self._wake.set()
+
+    def top(self, board):
+        """ Best entries of a board (BOARD_ALL, BOARD_TODAY or a MODE_*). Do not modify. """
+        if board == BOARD_TODAY and self._today != date.today().isoformat():
+            with self._lock:
+                self._roll_day(date.today().isoformat())
+        return self._boards.get(board, [])
+
+    def close(self):
+        """ Commits the queued scores and stops the writer. """
+        if self._thread is None: return
+        self.enabled = False
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        print(f"[LEADERBOARD] {self.stored} score(s) saved to {self.path}")
+
+    # ==========================================
+    #  IN-MEMORY BOARDS (callers hold the lock)
+    # ==========================================
+
+    def _insert(self, entry, day):
+        """ Puts a new score into every board it belongs on, keeping each one sorted and short. """
+        if day != self._today: self._roll_day(day)
+        changed = False
+        for board in (BOARD_ALL, BOARD_TODAY, entry[2]):
+            entries = self._boards.get(board)
+            if entries is None: continue
+            if len(entries) >= self.size and _rank(entry) >= _rank(entries[-1]): continue
+            # New list instead of an in-place edit: the renderer may be iterating the old one
+            entries = sorted(entries + [entry], key=_rank)[:self.size]
+            self._boards[board] = entries
+            changed = True
+        if changed: self.version += 1
+
+    def _roll_day(self, day):
+        """ Midnight: today's board starts empty (every later score goes through _insert). """
+        self._today = day
+        self._boards[BOARD_TODAY] = []
+        self.version += 1
+
+    # ==========================================
+    #  WRITER THREAD
+    # ==========================================
+
+    def _writer_loop(self):
+        try:
+            db = self._open()
+        except sqlite3.Error as e:
+            print(f"[LEADERBOARD] Cannot open {self.path}: {e}")
+            self.enabled = False
+            return
+        try:
+            while True:
+                self._wake.wait()
+                # Let scores that arrive together (e.g. both players) share one commit
+                if not self._stopping and self.batch_delay > 0:
+                    time.sleep(self.batch_delay)
+                self._wake.clear()
+                stopping = self._stopping
+                with self._lock:
+                    batch, self._queue = self._queue, []
+                if batch:
+                    with db:
+                        db.executemany("INSERT INTO scores (created, day, mode, player, score) "
+                                       "VALUES (?, ?, ?, ?, ?)", batch)
+                    self.stored += len(batch)
+                if stopping: return
+        except sqlite3.Error as e:
+            print(f"[LEADERBOARD] Write failed, scores are no longer saved: {e}")
+            self.enabled = False
+        finally:
+            db.close()
+
+    def _open(self):
+        """ Connects (WAL journal), creates the schema and loads the boards. """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+
+        today = date.today().isoformat()
+        boards = {
+            BOARD_ALL: db.execute(f"SELECT {COLUMNS} FROM scores ORDER BY score DESC, created LIMIT ?",
+                                  (self.size,)).fetchall(),
+            BOARD_TODAY: db.execute(f"SELECT {COLUMNS} FROM scores WHERE day = ? "
+                                    "ORDER BY score DESC, created LIMIT ?", (today, self.size)).fetchall(),
+        }
+        for mode in BOARDS[2:]:
+            boards[mode] = db.execute(f"SELECT {COLUMNS} FROM scores WHERE mode = ? "
+                                      "ORDER BY score DESC, created LIMIT ?", (mode, self.size)).fetchall()
+        with self._lock:
+            self._boards = boards
+            self._today = today
+            # Scores recorded while loading are queued but not in the database yet
+            for created, day, mode, player, score in self._queue:
+                self._insert((score, created, mode, player), day)
+            self.loaded = True
+            self.version += 1
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(LEADERBOARD_EVENT))
+        return db
+
+def format_entry(rank, entry, board):
+    """ One menu line: rank, score and what the board does not already say (mode or date). """
+    score, created, mode, player = entry
+    when = datetime.fromtimestamp(created)
+    if board == BOARD_TODAY: detail = f"{MODE_NAMES[mode]} {when:%H:%M}"
+    elif board == BOARD_ALL: detail = f"{MODE_NAMES[mode]} {when:%d/%m}"
+    else: detail = f"{when:%d/%m/%y}"
+    if mode == MODE_MULTIPLAYER: detail += f" P{player}"
+    return f"{rank}. {score:>3}  {detail}"
+
+# Shared by main.py (starts it), game_state.py and renderer.py
+leaderboard = ScoreStore()
+
+if __name__ == "__main__":
+    store = ScoreStore(batch_delay=0)
+    store.start()
+    while store.enabled and not store.loaded:
+        time.sleep(0.01)
+    titles = {BOARD_ALL: "All time", BOARD_TODAY: "Today"}
+    for board in BOARDS:
+        print(f"--- {titles.get(board) or MODE_NAMES[board]} ---")
+        for rank, entry in enumerate(store.top(board), 1):
+            print(format_entry(rank, entry, board))
+    store.close()
@@ -1,78 +1,316 @@
-import pygame
-import sys
-from config import SCREEN_WIDTH, SCREEN_HEIGHT
-from comms import SerialManager
-from game_state import GameState
-import renderer
-
-from input_screen import get_port_from_user 
-
-def main():
-    """
-    Main Entry Point of the Application.
-    Steps:
-    1. Init Pygame
-    2. Show Input Screen to get COM port
-    3. Initialize Serial Connection
-    4. Enter Game Loop
-    """
-    pygame.init()
-    pygame.mixer.init()
-    
-    # Initialize Display Surface
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("PIC18F Whac-A-Mole Controller")
-    clock = pygame.time.Clock()
-    
-
-    # ==========================================
-    # 1. GET PORT FROM UI
-    # ==========================================
-    # Blocking call that waits for user to enter a valid port
-    selected_port = get_port_from_user(screen)
-    
-    # If user closed the window instead of entering a port
-    if selected_port is None:
-        pygame.quit()
-        sys.exit()
-        
-    print(f"User selected: {selected_port}")
-
-    # ==========================================
-    # 2. START GAME
-    # ==========================================
-    # Pass the validated port to SerialManager
-    comms = SerialManager(port=selected_port) 
-    
-    # Initialize Game State with the serial connection
-    game = GameState(comms)
-
-    running = True
-    while running:
-        # --- 1. Read Serial Inputs ---
-        # Fetch commands from PIC (buttons, potentiometer)
-        commands = comms.read_commands()
-        for cmd in commands:
-            game.process_input(cmd)
-
-        # --- 2. Window Events ---
-        for event in pygame.event.get():
-            # Handle Window Close (X Button)
-            if event.type == pygame.QUIT:
-                game.cleanup() # Send signal to reset hardware before quitting
-                running = False
-
-        # --- 3. Update & Draw ---
-        game.update()       # Update game logic (timers, states)
-        renderer.draw(screen, game) # Render current state to screen
-
-        pygame.display.flip() # Update display
-        clock.tick(60)        # Limit to 60 FPS
-
-    # Clean exit
-    comms.close()
-    pygame.quit()
-    sys.exit()
-
-if __name__ == "__main__":
+import pygame
+import sys
+import time
+import atexit
+from collections import deque
+from config import (SCREEN_WIDTH, SCREEN_HEIGHT, LATENCY_REPORT_ON_EXIT, SESSION_RECORDING, SESSION_DIR,
+                    SIM_TICK_MS, SIM_MAX_CATCHUP_STEPS, RENDER_FPS, STARTUP_REPORT, TELEMETRY_ENABLED,
+                    LEADERBOARD_ENABLED)
+from comms import SerialManager, SERIAL_EVENT, DISCONNECT_EVENT
+from multiplex import ControllerHub
+from game_clock import ManualClock
+from game_state import GameState, preload_sounds
+from latency import InputLatencyTracker
+from replay import SessionRecorder
+from timing import PhaseTimer
+from profiler import profiler, PHASE_WAIT
+from telemetry import telemetry
+from leaderboard import leaderboard, LEADERBOARD_EVENT
+import renderer
+from asset_loader import loader
+from audio import init_mixer, effects
+
+from input_screen import get_port_from_user 
+
+def next_deadline(games):
+    """ Earliest GameState.next_deadline() of all boards (None if no board has one). """
+    deadlines = [d for d in (game.next_deadline() for game in games) if d is not None]
+    return min(deadlines) if deadlines else None
+
+def is_animating(games, now):
+    return any(game.is_animating(now) for game in games)
+
+def main():
+    """
+    Main Entry Point of the Application.
+    Steps:
+    1. Init Pygame
+    2. Show Input Screen to get COM port (skipped when ports are given:
+       python main.py PORT [PORT ...], two or more = head-to-head)
+    3. Initialize Serial Connection
+    4. Enter Game Loop
+    """
+    ports = sys.argv[1:]
+
+    # How long each startup phase takes (printed after the first frame)
+    startup = PhaseTimer()
+
+    # Small-buffer mixer first: pygame.init() would open it with the defaults
+    init_mixer()
+    pygame.init()
+    startup.mark("pygame init")
+    
+    # Initialize Display Surface
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("PIC18F Whac-A-Mole Controller")
+    startup.mark("window")
+
+    # Decode images and sounds in the background while the setup screen runs
+    renderer.preload()
+    preload_sounds()
+    # Score boards are loaded by the leaderboard's writer thread
+    if LEADERBOARD_ENABLED:
+        leaderboard.start()
+        atexit.register(leaderboard.close)
+    
+
+    # ==========================================
+    # 1. GET PORT FROM UI
+    # ==========================================
+    if not ports:
+        # Blocking call that waits for user to enter a valid port.
+        # Returns the port already open and answering, so it is not opened twice.
+        selected_port = get_port_from_user(screen, startup)
+        startup.mark("port setup (user)")
+        
+        # If user closed the window instead of entering a port
+        if selected_port is None:
+            pygame.quit()
+            sys.exit()
+            
+        print(f"User selected: {selected_port.port}")
+        ports = [selected_port]
+
+    # ==========================================
+    # 2. START GAME
+    # ==========================================
+    # Received commands are posted as SERIAL_EVENTs so the loop can sleep in pygame.event.wait
+    if len(ports) == 1:
+        # Pass the validated port to SerialManager.
+        comms = SerialManager(port=ports[0], post_events=True)
+        links = [comms]
+    else:
+        # One board per controller, all served by a single I/O thread
+        comms = ControllerHub(ports, post_events=True)
+        links = comms.links
+        if not links:
+            pygame.quit()
+            sys.exit()
+    # The menus' Quit options end the program with sys.exit(): close() still
+    # writes the queued exit command ('X') before the ports are closed
+    atexit.register(comms.close)
+    startup.mark("serial start")
+    
+    # Initialize one Game State per controller.
+    # The game runs on a simulation clock that only moves in fixed steps,
+    # so hit timing and mole timeouts do not depend on the frame rate.
+    # Boards share the seed, so head-to-head players get the same moles.
+    sim_clock = ManualClock(pygame.time.get_ticks())
+    games = [GameState(links[0], clock=sim_clock)]
+    for controller, link in enumerate(links[1:], 1):
+        games.append(GameState(link, clock=sim_clock, seed=games[0].seed, controller=controller))
+    game = games[0]
+    startup.mark("game init")
+
+    # Record every step's inputs so the session can be replayed (replay.py)
+    recorder = None
+    if SESSION_RECORDING and len(games) == 1:
+        recorder = SessionRecorder(SESSION_DIR, game.seed, sim_clock.get_ticks(), SIM_TICK_MS)
+        # Also covers "Quit" from the in-game menu
+        atexit.register(lambda: recorder.close(sim_clock.get_ticks()))
+
+    # Binary event log for later analysis (telemetry.py), written in the background
+    if TELEMETRY_ENABLED:
+        telemetry.start(game.seed)
+        atexit.register(telemetry.close)
+
+    # Input-to-screen latency statistics (F3 prints them at runtime)
+    latency = InputLatencyTracker()
+
+    # Real time in game milliseconds (same origin as the simulation clock)
+    real_base = sim_clock.get_ticks()
+    perf_base = time.perf_counter()
+    def real_ms(perf_time):
+        return real_base + (perf_time - perf_base) * 1000.0
+
+    pending = deque()         # (arrival_ms, arrival, controller, command) not simulated yet
+    next_render = 0.0
+    render_interval = 1000.0 / RENDER_FPS
+    render_cost = 0.0         # Smoothed draw + flip time in ms
+    redraw = True             # Something changed since the last frame
+
+    running = True
+    while running:
+        # --- 1. Sleep until input, the next game deadline or the next frame ---
+        # Serial commands arrive as SERIAL_EVENTs, so this wakes up immediately
+        # on a button press and does not spin while nothing is happening.
+        now = real_ms(time.perf_counter())
+        wake = None
+        if redraw or is_animating(games, now):
+            wake = next_render
+        deadline = next_deadline(games)
+        if pending:
+            # A command is waiting for the step matching its arrival time
+            deadline = sim_clock.get_ticks() + SIM_TICK_MS
+        if deadline is not None:
+            wake = deadline if wake is None else min(wake, deadline)
+
+        if wake is None:
+            events = [pygame.event.wait()]
+        elif wake > now:
+            events = [pygame.event.wait(max(1, int(wake - now + 0.999)))]
+        else:
+            events = []
+        profiler.mark(PHASE_WAIT)
+        events.extend(pygame.event.get())
+
+        # --- 2. Serial Inputs & Window Events ---
+        for event in events:
+            if event.type == SERIAL_EVENT:
+                # Commands from PIC (buttons, potentiometer), tagged with their controller
+                pending.append((real_ms(event.arrival), event.arrival, event.controller, event.command))
+                redraw = True
+            # Handle Window Close (X Button)
+            elif event.type == pygame.QUIT:
+                for board in games:
+                    board.cleanup() # Send signal to reset hardware before quitting
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                print(latency.format_report())
+                if effects.probe: print(effects.format_report())
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F1:
+                # Profiler HUD on/off (repaint everything to remove it)
+                profiler.show_hud = not profiler.show_hud
+                renderer.invalidate()
+                redraw = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                print(profiler.format_report())
+                for path in profiler.export():
+                    print(f"[PROFILE] Saved {path}")
+            elif event.type == DISCONNECT_EVENT:
+                # Controller unplugged: stop its board instead of spawning moles nobody can hit
+                games[event.controller].disconnect()
+                redraw = True
+            elif event.type == LEADERBOARD_EVENT:
+                redraw = True   # Boards finished loading (shown on the menu)
+            elif effects.handle_event(event):
+                pass # Sound effect finished (audio latency measurement)
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # Window contents were lost: repaint everything
+                renderer.invalidate()
+                redraw = True
+        profiler.mark("events")
+        # Commands that were received before the window could take events
+        for arrival, controller, cmd in comms.read_commands_timed():
+            pending.append((real_ms(arrival), arrival, controller, cmd))
+            redraw = True
+        profiler.mark("serial")
+
+        # --- 3. Fixed-Step Simulation ---
+        # Catch the simulation up with real time. Each command is applied in
+        # the step matching its arrival time, even if a slow frame delayed it.
+        now = real_ms(time.perf_counter())
+        steps = 0
+        while sim_clock.get_ticks() + SIM_TICK_MS <= now:
+            # Steps before the next command or deadline cannot change anything:
+            # jump over them instead of running every idle step after a long wait
+            idle_until = now
+            if pending: idle_until = min(idle_until, pending[0][0] - 0.001)
+            deadline = next_deadline(games)
+            if deadline is not None: idle_until = min(idle_until, deadline - 0.001)
+            idle_steps = int((idle_until - sim_clock.get_ticks()) // SIM_TICK_MS)
+            if idle_steps > 0:
+                sim_clock.advance(idle_steps * SIM_TICK_MS)
+                continue
+
+            sim_clock.advance(SIM_TICK_MS)
+            tick = sim_clock.get_ticks()
+            if deadline is not None and deadline <= tick:
+                redraw = True
+
+            step_commands = []
+            if pending and pending[0][0] <= tick:
+                # Every board gets this step's commands as one batch (input_pipeline.py)
+                batches = [[] for _ in games]
+                events = []
+                while pending and pending[0][0] <= tick:
+                    _, arrival, controller, cmd = pending.popleft()
+                    events.append(latency.begin(arrival))
+                    batches[controller].append(cmd)
+                    step_commands.append(cmd)
+                # Recorded first: a Quit confirmed in this step exits inside process_batch
+                if recorder:
+                    recorder.frame(tick, step_commands)
+                for board, batch in zip(games, batches):
+                    if batch: board.process_batch(batch)
+                for event in events:
+                    latency.parsed(event)
+
+            for board in games:
+                board.update()   # Update game logic (timers, states)
+            if step_commands:
+                latency.update_done()
+
+            steps += 1
+            if steps >= SIM_MAX_CATCHUP_STEPS:
+                # Far behind (e.g. window dragged): skip time instead of spiralling
+                skipped = now - sim_clock.get_ticks()
+                real_base -= skipped
+                pending = deque((t - skipped, arrival, controller, cmd) for t, arrival, controller, cmd in pending)
+                # Everything measured in the old time base moves with it
+                next_render -= skipped
+                now = sim_clock.get_ticks()
+                break
+        profiler.mark("update")
+
+        # --- 4. Render at its own rate, only when the picture changes ---
+        if (redraw or is_animating(games, now)) and now >= next_render:
+            render_start = time.perf_counter()
+            # Interpolate animations to the real time, between two steps
+            if len(games) == 1:
+                dirty = renderer.draw(screen, game, now) # Render current state to screen
+            else:
+                dirty = renderer.draw_split(screen, games, now)
+            latency.render_done()
+            if profiler.show_hud:
+                hud_rect = renderer.draw_hud(screen, profiler.hud_lines())
+                if dirty is not None: dirty.append(hud_rect)
+                profiler.mark("hud")
+
+            # Update display (only the changed regions when the renderer reports them)
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+            latency.frame_presented()
+            profiler.mark("present")
+            profiler.end_frame(len(pending), sum(link.tx_queue_depth() for link in links))
+            redraw = False
+
+            if startup:
+                startup.mark("first frame")
+                startup.add("assets (background)", loader.elapsed())
+                if STARTUP_REPORT:
+                    print(startup.format_report())
+                    print(loader.format_report())
+                startup = None
+
+            # Adaptive rate: never spend more than half the time drawing
+            cost = (time.perf_counter() - render_start) * 1000.0
+            render_cost += (cost - render_cost) * 0.1
+            render_interval = max(1000.0 / RENDER_FPS, render_cost * 2.0)
+            next_render = now + render_interval
+
+    # Clean exit
+    if LATENCY_REPORT_ON_EXIT:
+        print(latency.format_report())
+        for board in games:
+            print(board.inputs.format_report())
+    if effects.probe:
+        print(effects.format_report())
+    comms.close()
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
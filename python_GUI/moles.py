@@ -0,0 +1,136 @@
+import heapq
+from array import array
+
+# --- HOLE STATES ---
+HOLE_EMPTY = 0
+HOLE_UP = 1         # Rising or fully up
+HOLE_HIDING = 2     # Retreating, still hittable
+HOLE_WHACKED = 3    # Squash animation, the hole is busy until it is cleared
+
+# --- SCHEDULED EVENTS ---
+EV_RETREAT = 0      # Mole starts hiding
+EV_TIMEOUT = 1      # Mole got away (missed)
+EV_CLEAR = 2        # Squash animation over, the hole is free again
+EV_SPAWN = 3        # Time for another mole (hole -1)
+
+class MoleField:
+    """
+    Per-hole mole state for any number of concurrent moles.
+
+    State lives in flat arrays indexed by hole, so a button press is resolved
+    with one lookup. Every mole's future changes (retreat, timeout, end of the
+    squash) are pushed on a min-heap of deadlines; pop_due() only touches the
+    moles whose deadlines have passed, and next_deadline() is the heap top.
+
+    Events are not removed from the heap when a mole is hit or the board is
+    cleared: each hole has a generation counter and events from an older
+    generation are skipped when they come up.
+    Deadlines are 1 ms after the limit, matching the '>' comparisons the
+    single-mole game used.
+    """
+    def __init__(self, holes=9):
+        self.holes = holes
+        self.state = array('b', [HOLE_EMPTY]) * holes
+        self.spawn_time = array('q', [0]) * holes   # Clock ms the mole appeared
+        self.lifetime = array('l', [0]) * holes     # ms until it times out
+        self.hit_time = array('q', [0]) * holes     # Clock ms it was whacked
+        self.hit_ratio = array('d', [1.0]) * holes  # Visible height when whacked
+        self.generation = array('I', [0]) * holes
+        self.live = 0           # Holes in HOLE_UP / HOLE_HIDING
+        self.whacked = 0        # Holes in HOLE_WHACKED
+        self.spawn_pending = False
+        self._heap = []         # (deadline, seq, event, hole, generation)
+        self._seq = 0           # Tie breaker: same deadline -> scheduling order
+
+    def _schedule(self, deadline, event, hole):
+        generation = self.generation[hole] if hole >= 0 else 0
+        heapq.heappush(self._heap, (deadline, self._seq, event, hole, generation))
+        self._seq += 1
+
+    def active(self):
+        """ Holes that count towards the mole limit (up, hiding or being squashed). """
+        return self.live + self.whacked
+
+    def free_holes(self):
+        return [i for i in range(self.holes) if self.state[i] == HOLE_EMPTY]
+
+    def spawn(self, hole, now, lifetime, hide_duration):
+        """ Puts a mole up in an empty hole and schedules its retreat and timeout. """
+        self.state[hole] = HOLE_UP
+        self.spawn_time[hole] = now
+        self.lifetime[hole] = lifetime
+        self.generation[hole] += 1
+        self.live += 1
+        self._schedule(now + lifetime - hide_duration + 1, EV_RETREAT, hole)
+        self._schedule(now + lifetime + 1, EV_TIMEOUT, hole)
+
+    def schedule_spawn(self, deadline):
+        """ Asks for another mole at the given time (one request at a time). """
+        self.spawn_pending = True
+        self._schedule(deadline, EV_SPAWN, -1)
+
+    def whack(self, hole, now, ratio, squash_duration):
+        """ Turns a live mole into a squashed one; its retreat/timeout events go stale. """
+        self.state[hole] = HOLE_WHACKED
+        self.hit_time[hole] = now
+        self.hit_ratio[hole] = ratio
+        self.generation[hole] += 1
+        self.live -= 1
+        self.whacked += 1
+        self._schedule(now + squash_duration + 1, EV_CLEAR, hole)
+
+    def clear(self, hole):
+        """ Empties a hole, whatever is in it. """
+        state = self.state[hole]
+        if state == HOLE_EMPTY: return
+        if state == HOLE_WHACKED: self.whacked -= 1
+        else: self.live -= 1
+        self.state[hole] = HOLE_EMPTY
+        self.generation[hole] += 1
+
+    def reset(self):
+        """ Empties every hole and drops everything scheduled. """
+        for hole in range(self.holes):
+            self.clear(hole)
+        self._heap.clear()
+        self.spawn_pending = False
+
+    def _is_stale(self, entry):
+        hole = entry[3]
+        return hole >= 0 and entry[4] != self.generation[hole]
+
+    def pop_due(self, now):
+        """
+        Yields (event, hole) for every event whose deadline has passed, earliest
+        first. Events scheduled while iterating are picked up if already due.
+        """
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._is_stale(entry): continue
+            if entry[2] == EV_SPAWN: self.spawn_pending = False
+            yield entry[2], entry[3]
+
+    def next_deadline(self):
+        """ Clock ms of the next scheduled change, or None. """
+        heap = self._heap
+        while heap and self._is_stale(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def shift(self, ms):
+        """ Moves every timestamp and deadline by ms (time spent paused). """
+        for hole in range(self.holes):
+            self.spawn_time[hole] += ms
+            self.hit_time[hole] += ms
+        # Same offset for every entry: the heap order does not change
+        self._heap = [(entry[0] + ms,) + entry[1:] for entry in self._heap]
+
+    def is_animating(self, now, rise_duration):
+        """ True while any hole changes every frame (rising, hiding or squashed). """
+        if self.whacked: return True
+        for hole in range(self.holes):
+            state = self.state[hole]
+            if state == HOLE_HIDING: return True
+            if state == HOLE_UP and now - self.spawn_time[hole] < rise_duration: return True
+        return False
@@ -0,0 +1,285 @@
+"""
+Several PIC controllers on one host.
+
+ControllerHub opens every port and serves all of them from a single I/O
+thread built on selectors (epoll/kqueue/poll), instead of a reader and a
+writer thread per port:
+
+    python main.py /dev/rfcomm0 /dev/rfcomm1       # head-to-head, one board each
+
+Every inbound command is tagged with its controller ID (the port's position
+on the command line). Each controller has its own coalescing outbound queue
+(OutboundQueue), so every board's LEDs and 7-segment score follow its own game.
+Ports are non-blocking: a write the port cannot take completes when the
+selector reports it writable, so a stalled controller never holds up the others.
+An unplugged controller is dropped from the I/O loop and reported to the game
+with DISCONNECT_EVENT.
+Selectors need file descriptors, so the hub is POSIX only (Linux, macOS).
+"""
+import os
+import selectors
+import threading
+import time
+from collections import deque
+import pygame
+import serial
+from config import (SERIAL_TX_FLUSH_WINDOW, SERIAL_BINARY_PROTOCOL,
+                    SERIAL_HANDSHAKE_TIMEOUT, HUB_READ_CHUNK, HUB_CLOSE_TIMEOUT)
+from comms import (CommandAssembler, OutboundQueue, SERIAL_EVENT, DISCONNECT_EVENT, PROTOCOL_VERSION,
+                   wait_for_ready)
+
+class ControllerLink:
+    """
+    One controller attached to the hub. Has the send() method GameState
+    expects from its serial manager, so every board gets its own link.
+    """
+    def __init__(self, hub, controller_id, ser):
+        self.hub = hub
+        self.id = controller_id
+        self.serial = ser
+        self.fd = ser.fileno()
+        self.port = ser.port
+        self.rx = CommandAssembler(self._deliver, self._on_handshake)
+        self.tx = OutboundQueue()    # Guarded by hub._lock
+        self.tx_stats = self.tx.stats
+        self.flush_due = None        # perf_counter() at which queued output is written
+        # Payload the port has not accepted yet (I/O thread only)
+        self.out = b""
+        self.out_size = 0
+        self.out_first_queued = None
+        self.want_write = False      # EVENT_WRITE registered while out is not empty
+        self.handshake_done = threading.Event()
+        self.connected = True        # False once the port is gone; nothing is sent to it after that
+
+    @property
+    def protocol_version(self):
+        return self.rx.protocol_version
+
+    def send(self, message):
+        """ Queues a message for this controller and returns immediately. """
+        self.hub._send(self, message)
+
+    def tx_queue_depth(self):
+        return self.tx.depth()
+
+    def _deliver(self, timestamp, command):
+        self.hub._deliver(self.id, timestamp, command)
+
+    def _on_handshake(self):
+        self.handshake_done.set()
+
+class ControllerHub:
+    """
+    Multiplexes N controllers over one selector thread.
+    Reads are bounded to HUB_READ_CHUNK bytes per controller per round, so a
+    chatty (or noisy) controller cannot delay the others: every ready port is
+    served once per wakeup, in order.
+    """
+    def __init__(self, ports, post_events=False):
+        """
+        :param ports: Port names and/or open serial.Serial objects; the index is the controller ID
+        :param post_events: Deliver commands as SERIAL_EVENT pygame events
+                            (with a 'controller' attribute) instead of queueing them
+        """
+        self.post_events = post_events
+        self.links = []
+        self._rx_queue = deque()     # (timestamp, controller, command), unbounded like SerialManager's
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+
+        # Self-pipe: send() writes a byte so the I/O thread re-computes its flush timeout
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        for port in ports:
+            link = self._open(port, len(self.links))
+            if link:
+                self.links.append(link)
+                self._selector.register(link.fd, selectors.EVENT_READ, link)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._io_loop, name="controller-hub")
+        self._thread.daemon = True
+        self._thread.start()
+
+        if SERIAL_BINARY_PROTOCOL:
+            self.negotiate_binary()
+
+    def _open(self, port, controller_id):
+        """ Opens and pings one port. Returns its link, or None if it cannot be used. """
+        try:
+            ser = port if isinstance(port, serial.Serial) else serial.Serial(port, 9600, timeout=0.1)
+            if wait_for_ready(ser) is None:
+                print(f"[HUB] Warning: no answer from {ser.port}, continuing anyway")
+            # Non-blocking from now on: the selector does all the waiting, for writes too
+            ser.timeout = 0
+            os.set_blocking(ser.fileno(), False)
+            link = ControllerLink(self, controller_id, ser)
+        except (serial.SerialException, AttributeError, OSError) as e:
+            print(f"[HUB] Cannot use {port}: {e}")
+            return None
+        print(f"[HUB] Controller {controller_id} on {link.port}")
+        return link
+
+    def negotiate_binary(self, timeout=SERIAL_HANDSHAKE_TIMEOUT):
+        """ Asks every controller for binary frames at once and waits for all answers. """
+        for link in self.links:
+            link.handshake_done.clear()
+            link.send(f"\nBIN:{PROTOCOL_VERSION}\n")
+        deadline = time.perf_counter() + timeout
+        for link in self.links:
+            link.handshake_done.wait(max(0.0, deadline - time.perf_counter()))
+            mode = f"binary v{link.protocol_version}" if link.protocol_version else "ASCII"
+            print(f"[HUB] Controller {link.id}: {mode}")
+
+    # ==========================================
+    #  I/O THREAD
+    # ==========================================
+
+    def _io_loop(self):
+        while self._running:
+            with self._lock:
+                # Links still writing a payload flush when that write completes
+                due = [link.flush_due for link in self.links if link.flush_due is not None and not link.out]
+            self._poll(max(0.0, min(due) - time.perf_counter()) if due else None)
+            self._flush(time.perf_counter())
+
+        # Closing: write what is queued, waiting a bounded time for slow controllers
+        deadline = time.perf_counter() + HUB_CLOSE_TIMEOUT
+        self._flush(time.perf_counter(), force=True)
+        while any(link.out for link in self.links) and time.perf_counter() < deadline:
+            self._poll(deadline - time.perf_counter())
+            self._flush(time.perf_counter(), force=True)
+
+    def _poll(self, timeout):
+        """ Waits for ready ports (or a wakeup) and serves each one once. """
+        for key, mask in self._selector.select(timeout):
+            link = key.data
+            if link is None:
+                self._drain_wakeups()
+                continue
+            if mask & selectors.EVENT_WRITE:
+                self._write(link)
+            if mask & selectors.EVENT_READ and link.connected:
+                self._read(link)
+
+    def _read(self, link):
+        try:
+            chunk = os.read(link.fd, HUB_READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            chunk = b""
+            print(f"[HUB] Read error on controller {link.id}: {e}")
+        if not chunk:
+            self._disconnect(link)
+            return
+        link.rx.feed(chunk, time.perf_counter())
+
+    def _disconnect(self, link):
+        """ Port gone (unplugged): stops serving the link, drops its output and tells the game. """
+        link.connected = False
+        self._selector.unregister(link.fd)
+        link.out, link.out_size, link.want_write = b"", 0, False
+        with self._lock:
+            link.flush_due = None
+            link.tx.take_payload(False)
+        print(f"[HUB] Controller {link.id} on {link.port} disconnected")
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(DISCONNECT_EVENT, controller=link.id))
+
+    def _drain_wakeups(self):
+        try:
+            while os.read(self._wake_r, 64): pass
+        except BlockingIOError:
+            pass
+
+    def _flush(self, now, force=False):
+        """ Starts writing every queue whose flush window has passed (all of them if force). """
+        for link in self.links:
+            # Messages queued meanwhile keep coalescing until the port takes the last payload
+            if link.out or not link.connected: continue
+            with self._lock:
+                if link.flush_due is None or (not force and link.flush_due > now): continue
+                link.flush_due = None
+                first_queued = link.tx.first_queued
+                payload = link.tx.take_payload(link.protocol_version > 0)
+            if not payload: continue
+            link.out, link.out_size, link.out_first_queued = payload, len(payload), first_queued
+            self._write(link)
+
+    def _write(self, link):
+        """ Writes as much of the link's payload as the port takes; the selector reports when it takes more. """
+        try:
+            link.out = link.out[os.write(link.fd, link.out):]
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            print(f"[HUB] Send error on controller {link.id}: {e}")
+            self._disconnect(link)
+            return
+        self._watch_writable(link, bool(link.out))
+        if not link.out and link.out_size:
+            link.tx.record_flush(link.out_size, link.out_first_queued)
+            link.out_size = 0
+
+    def _watch_writable(self, link, enable):
+        """ Adds or removes EVENT_WRITE for a link's port. """
+        if link.want_write == enable: return
+        link.want_write = enable
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if enable else selectors.EVENT_READ
+        self._selector.modify(link.fd, events, link)
+
+    # ==========================================
+    #  GAME SIDE
+    # ==========================================
+
+    def _send(self, link, message):
+        if not link.connected: return
+        with self._lock:
+            link.tx.push(message)
+            if link.flush_due is not None: return
+            # Give back-to-back sends from the same frame a chance to coalesce
+            link.flush_due = time.perf_counter() + SERIAL_TX_FLUSH_WINDOW
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass # Pipe full: the I/O thread is awake anyway
+
+    def _deliver(self, controller_id, timestamp, command):
+        """ Hands one tagged command to the game: as a pygame event or through the queue. """
+        if self.post_events:
+            try:
+                pygame.event.post(pygame.event.Event(SERIAL_EVENT, command=command,
+                                                     arrival=timestamp, controller=controller_id))
+                return
+            except pygame.error:
+                pass # Display not initialised (yet): fall back to the queue
+        self._rx_queue.append((timestamp, controller_id, command))
+
+    def read_commands_timed(self):
+        """ Returns all commands received since the last call as (arrival_time, controller, command). """
+        queue = self._rx_queue
+        commands = []
+        while queue:
+            commands.append(queue.popleft())
+        return commands
+
+    def close(self):
+        """ Flushes every controller's queue, stops the I/O thread and closes the ports (once). """
+        if self._thread is None: return
+        self._running = False
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass
+        # The I/O thread writes what is still queued before it exits
+        self._thread.join(timeout=HUB_CLOSE_TIMEOUT + 0.5)
+        self._thread = None
+        for link in self.links:
+            link.serial.close()
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
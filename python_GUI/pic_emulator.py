@@ -0,0 +1,303 @@
+"""
+Virtual PIC18F4520 controller.
+
+Emulates the firmware's serial protocol behind a Linux pseudo-terminal so the
+GUI can be run (and load-tested) without the board or the HC-05:
+
+    python pic_emulator.py                      # interactive, prints the pty path
+    python pic_emulator.py --script demo.txt    # scripted session
+    python pic_emulator.py --link /tmp/ttyWAM0 --baud 9600 --noise 0.01
+
+Enter the printed path (or the --link path) in the Controller Setup screen.
+
+Script / interactive commands (one per line, '#' starts a comment):
+    pot <0-1023>          move the potentiometer (sent only past POT_THRESHOLD)
+    btn <0-8>             press a game button (0 to --buttons - 1)
+    confirm               press the confirm (yellow) button
+    ready                 re-send the boot banner (also sent when the host pings with '?')
+    wait <ms>             sleep
+    @<ms> <command>       run the command <ms> after the script started
+    random <count> <ms>   press <count> random game buttons, <ms> apart
+    repeat <n> ... end    repeat the enclosed block
+    status                print LED / score / protocol state
+    quit                  exit
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tty
+from comms import (encode_frame, PROTOCOL_VERSION, FRAME_SIZE, FRAME_KEY,
+                   OP_POT, OP_BTN, OP_CONFIRM, OP_LED, OP_SCORE, READY_BANNER)
+
+# Mirrors firmware/include/config.h
+POT_THRESHOLD = 30
+NUM_GAME_BUTTONS = 9
+
+class VirtualController:
+    """
+    Behaves like firmware/src/*.c on the far end of a pty:
+    sends POT/BTN events, drives a virtual LED and 7-segment score from the
+    G/P/E/X/SCR commands, and answers the binary protocol handshake.
+    """
+    def __init__(self, baudrate=9600, noise=0.0, verbose=True, seed=None, buttons=NUM_GAME_BUTTONS):
+        """
+        :param baudrate: Emulated line speed; writes are paced to 10 bits per byte (0 = unpaced)
+        :param noise: Probability that an outgoing byte is corrupted or dropped
+        :param buttons: Game buttons wired (random presses pick from these)
+        """
+        self.baudrate = baudrate
+        self.noise = noise
+        self.buttons = buttons
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+
+        # --- Virtual hardware state ---
+        self.led = 'E'
+        self.score = 0
+        self.binary_mode = False
+        self.last_pot = -100
+
+        # --- PTY ---
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.link = None
+
+        self._tx_lock = threading.Lock()
+        self._rx_line = bytearray()
+        self._rx_frame = bytearray()
+        self._running = True
+        self._reader = threading.Thread(target=self._reader_loop, name="emulator-rx")
+        self._reader.daemon = True
+        self._reader.start()
+
+    def make_link(self, path):
+        """ Creates a stable symlink to the pty (e.g. /tmp/ttyWAM0). """
+        if os.path.islink(path): os.unlink(path)
+        os.symlink(self.port, path)
+        self.link = path
+
+    def log(self, msg):
+        if self.verbose: print(f"[EMU] {msg}")
+
+    # ==========================================
+    #  PIC -> PC
+    # ==========================================
+
+    def _write(self, data):
+        """ Writes bytes to the host with optional line noise and baud pacing. """
+        if self.noise > 0:
+            noisy = bytearray()
+            for b in data:
+                roll = self.rng.random()
+                if roll < self.noise / 2: continue                      # Dropped byte
+                if roll < self.noise: b ^= 1 << self.rng.randrange(8)   # Flipped bit
+                noisy.append(b)
+            data = bytes(noisy)
+
+        with self._tx_lock:
+            if self.baudrate:
+                # 1 start + 8 data + 1 stop bit per byte, like the real UART
+                byte_time = 10.0 / self.baudrate
+                for i in range(len(data)):
+                    os.write(self.master_fd, data[i:i + 1])
+                    time.sleep(byte_time)
+            else:
+                os.write(self.master_fd, data)
+
+    def _send_event(self, opcode, value, text):
+        """ Same as UART_Send_Event(): binary frame or ASCII line. """
+        if self.binary_mode:
+            self._write(encode_frame(opcode, value))
+        else:
+            self._write(text.encode() + b"\r\n")
+
+    def ready(self):
+        self._write(READY_BANNER + b"\r\n")
+
+    def set_pot(self, value):
+        """ Moves the potentiometer; reports it only past POT_THRESHOLD like main.c. """
+        value = max(0, min(1023, int(value)))
+        if abs(value - self.last_pot) > POT_THRESHOLD:
+            self._send_event(OP_POT, value, f"POT:{value}")
+            self.last_pot = value
+
+    def press(self, index):
+        self._send_event(OP_BTN, index, f"BTN:{index}")
+
+    def confirm(self):
+        self._send_event(OP_CONFIRM, 0, "BTN:CONFIRM")
+
+    # ==========================================
+    #  PC -> PIC
+    # ==========================================
+
+    def _reader_loop(self):
+        while self._running:
+            try:
+                data = os.read(self.master_fd, 256)
+            except OSError:
+                # No host attached right now
+                time.sleep(0.05)
+                continue
+            for b in data:
+                self._on_byte(b)
+
+    def _on_byte(self, b):
+        """ Mirrors UART_ISR_Handler(). """
+        # --- Binary frames ---
+        # Opcodes have bit 7 set; the following 3 bytes (any value) complete the frame
+        if self._rx_frame:
+            self._rx_frame.append(b)
+            if len(self._rx_frame) == FRAME_SIZE:
+                op, hi, lo, chk = self._rx_frame
+                self._rx_frame = bytearray()
+                if chk != (op ^ hi ^ lo ^ FRAME_KEY): return
+                if op == OP_LED: self._set_led(chr(lo))
+                elif op == OP_SCORE: self._set_score((hi << 8) | lo)
+            return
+        if b & 0x80:
+            self._rx_frame = bytearray((b,))
+            return
+
+        # --- ASCII ---
+        c = chr(b)
+        if c in "GPEX":
+            self._set_led(c)
+            self._rx_line.clear()
+        elif c == '?':
+            # Link check: answer with the boot banner
+            self.ready()
+            self._rx_line.clear()
+        elif c in "\r\n":
+            line = self._rx_line.decode(errors='ignore')
+            self._rx_line.clear()
+            if line.startswith("SCR:"):
+                try: self._set_score(int(line[4:]))
+                except ValueError: pass
+            elif line.startswith("BIN:"):
+                try: version = int(line[4:])
+                except ValueError: version = 0
+                if version > 0:
+                    version = min(version, PROTOCOL_VERSION)
+                    self._write(f"BIN:OK:{version}\r\n".encode())
+                    self.binary_mode = True
+                    self.log(f"Binary protocol v{version}")
+                else:
+                    self.binary_mode = False
+        elif len(self._rx_line) < 9:
+            self._rx_line.append(b)
+
+    def _set_led(self, c):
+        if c == 'X':
+            self._set_score(0)
+            self.binary_mode = False
+        self.led = c
+        self.log(f"LED -> {c}")
+
+    def _set_score(self, value):
+        self.score = min(9999, value)
+        self.log(f"7-SEG -> {self.score:04d}")
+
+    # ==========================================
+    #  SCRIPTING
+    # ==========================================
+
+    def run_script(self, lines):
+        """ Executes script lines (see module docstring). """
+        self._script_start = time.monotonic()
+        self._run_block(self._parse_block(iter(lines)))
+
+    def _parse_block(self, lines):
+        block = []
+        for raw in lines:
+            line = raw.split('#', 1)[0].strip()
+            if not line: continue
+            words = line.split()
+            if words[0] == 'end': return block
+            if words[0] == 'repeat':
+                block.append(('repeat', int(words[1]), self._parse_block(lines)))
+            else:
+                block.append(tuple(words))
+        return block
+
+    def _run_block(self, block):
+        for step in block:
+            if step[0] == 'repeat':
+                for _ in range(step[1]):
+                    self._run_block(step[2])
+            elif not self.execute(step):
+                return False
+        return True
+
+    def execute(self, words):
+        """ Runs one command. Returns False on 'quit'. """
+        if words[0].startswith('@'):
+            due = self._script_start + int(words[0][1:]) / 1000.0
+            delay = due - time.monotonic()
+            if delay > 0: time.sleep(delay)
+            words = words[1:]
+            if not words: return True
+
+        cmd = words[0].lower()
+        try:
+            if cmd == 'pot': self.set_pot(int(words[1]))
+            elif cmd == 'btn': self.press(int(words[1]))
+            elif cmd == 'confirm': self.confirm()
+            elif cmd == 'ready': self.ready()
+            elif cmd == 'wait': time.sleep(int(words[1]) / 1000.0)
+            elif cmd == 'random':
+                count, gap = int(words[1]), int(words[2])
+                for _ in range(count):
+                    self.press(self.rng.randrange(self.buttons))
+                    time.sleep(gap / 1000.0)
+            elif cmd == 'status':
+                print(f"[EMU] LED={self.led} SCORE={self.score} BINARY={self.binary_mode}")
+            elif cmd == 'quit': return False
+            else: print(f"[EMU] Unknown command: {' '.join(words)}")
+        except (IndexError, ValueError):
+            print(f"[EMU] Bad arguments: {' '.join(words)}")
+        return True
+
+    def close(self):
+        self._running = False
+        if self.link and os.path.islink(self.link): os.unlink(self.link)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual PIC18F Whac-A-Mole controller on a pty")
+    parser.add_argument('--script', help="Script file to run (default: interactive)")
+    parser.add_argument('--baud', type=int, default=9600, help="Emulated baud rate, 0 = unpaced")
+    parser.add_argument('--noise', type=float, default=0.0, help="Per-byte corruption probability")
+    parser.add_argument('--link', help="Also expose the pty under this path")
+    parser.add_argument('--seed', type=int, help="Seed for noise and random presses")
+    parser.add_argument('--buttons', type=int, default=NUM_GAME_BUTTONS, help="Game buttons (match BOARD_ROWS x BOARD_COLS)")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    emu = VirtualController(args.baud, args.noise, not args.quiet, args.seed, args.buttons)
+    if args.link: emu.make_link(args.link)
+    print(f"[EMU] Virtual controller on {emu.link or emu.port}")
+    emu.ready()
+
+    try:
+        if args.script:
+            with open(args.script) as f:
+                emu.run_script(f.readlines())
+        else:
+            emu._script_start = time.monotonic()
+            for line in sys.stdin:
+                words = line.split('#', 1)[0].split()
+                if words and not emu.execute(words): break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emu.close()
+
+if __name__ == "__main__":
+    main()
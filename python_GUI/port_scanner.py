@@ -0,0 +1,158 @@
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import serial
+import serial.tools.list_ports
+from config import DISCOVERY_GLOBS, DISCOVERY_WORKERS, DISCOVERY_INTERVAL, SERIAL_READY_TIMEOUT
+from comms import wait_for_ready
+
+# --- PROBE STATES ---
+PROBING = 0
+READY = 1       # Opened and answered the ping (rtt is set)
+SILENT = 2      # Opened, but nothing answered in time
+FAILED = 3      # Could not be opened
+
+class PortProbe:
+    """ Result of checking one port. Keeps the port open unless it failed. """
+    def __init__(self, port):
+        self.port = port
+        self.state = PROBING
+        self.rtt = None
+        self.handle = None
+        self.error = ""
+
+    def sort_key(self):
+        """ Responders first (fastest first), then silent, probing and failed ports. """
+        order = {READY: 0, SILENT: 1, PROBING: 2, FAILED: 3}[self.state]
+        return (order, self.rtt or 0.0, self.port)
+
+class PortScanner:
+    """
+    Finds the controller without typing a port name.
+    A watcher thread lists candidate ports every DISCOVERY_INTERVAL seconds
+    (glob patterns + pyserial's port list) and probes new ones on a bounded
+    thread pool, so setup takes as long as the slowest single probe.
+    Ports that disappear (unplugged) are dropped from the results.
+    """
+    def __init__(self, patterns=DISCOVERY_GLOBS, workers=DISCOVERY_WORKERS,
+                 interval=DISCOVERY_INTERVAL, timeout=SERIAL_READY_TIMEOUT):
+        self.patterns = patterns
+        self.interval = interval
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="port-probe")
+        self._lock = threading.Lock()
+        self._probes = {}       # port -> PortProbe, guarded by _lock
+        self._manual = set()    # Typed in by the user: never dropped by the watcher
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch_loop, name="port-watcher")
+        self._watcher.daemon = True
+        self.changes = 0        # Bumped whenever the results change (for redraws)
+
+    def start(self):
+        self._watcher.start()
+        return self
+
+    def candidates(self):
+        """ Current set of port names worth probing. """
+        ports = set()
+        for pattern in self.patterns:
+            ports.update(glob.glob(pattern))
+        try:
+            ports.update(p.device for p in serial.tools.list_ports.comports())
+        except Exception as e:
+            print(f"[SCAN] Port listing failed: {e}")
+        return ports
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            present = self.candidates()
+            with self._lock:
+                known = set(self._probes)
+            for port in present - known:
+                self.check(port)
+            for port in known - present - self._manual:
+                self._forget(port)
+            self._stop.wait(self.interval)
+
+    def check(self, port, manual=False):
+        """
+        Probes a port in the background (no-op if it is already known).
+        :param manual: The port was typed in, keep it even if it is not listed
+        """
+        with self._lock:
+            if manual: self._manual.add(port)
+            if port in self._probes: return
+            probe = self._probes[port] = PortProbe(port)
+            self.changes += 1
+        try:
+            self._pool.submit(self._probe, probe)
+        except RuntimeError:
+            pass # Pool already shut down
+
+    def _probe(self, probe):
+        """ Worker: open the port and ping the PIC. """
+        try:
+            handle = serial.Serial(probe.port, 9600, timeout=0.1)
+        except Exception as e:
+            probe.error = str(e)
+            state = FAILED
+            handle = None
+        else:
+            probe.rtt = wait_for_ready(handle, self.timeout)
+            state = SILENT if probe.rtt is None else READY
+
+        with self._lock:
+            if self._probes.get(probe.port) is probe and not self._stop.is_set():
+                probe.handle = handle
+                probe.state = state
+                self.changes += 1
+                if state == READY:
+                    print(f"[SCAN] {probe.port} answered in {probe.rtt * 1000:.1f} ms")
+                return
+        # Forgotten (unplugged) or scanner stopped while probing
+        if handle: handle.close()
+
+    def _forget(self, port):
+        with self._lock:
+            probe = self._probes.pop(port, None)
+            self.changes += 1
+        if probe and probe.handle:
+            probe.handle.close()
+
+    def retry(self, port):
+        """ Probes a port again, e.g. after the controller was switched on. """
+        self._forget(port)
+        self.check(port, port in self._manual)
+
+    def results(self):
+        """ Snapshot of all probes, best controller first. """
+        with self._lock:
+            probes = list(self._probes.values())
+        probes.sort(key=PortProbe.sort_key)
+        return probes
+
+    def get(self, port):
+        with self._lock:
+            return self._probes.get(port)
+
+    def take(self, port):
+        """
+        Hands over a probed port's open handle (None if it has none).
+        The probe stays listed without a handle, so the watcher does not open
+        the port a second time while the game uses it.
+        """
+        with self._lock:
+            probe = self._probes.get(port)
+            if probe is None or probe.handle is None: return None
+            handle, probe.handle = probe.handle, None
+            return handle
+
+    def stop(self):
+        """ Stops watching and closes every port that was not taken. """
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            probes = list(self._probes.values())
+            self._probes.clear()
+        for probe in probes:
+            if probe.handle: probe.handle.close()
@@ -0,0 +1,208 @@
+"""
+Where does the frame budget go?
+
+The main loop and the renderer call profiler.mark(name) at the end of each
+phase; the time since the previous mark is charged to that phase. Once a
+frame is on screen, end_frame() files the per-phase totals into ring buffers
+(PROFILER_FRAMES frames) used for the HUD (F1) and the exports (F2):
+
+    profiles/frames_<stamp>.csv     one row per frame, one column per phase (ms)
+    profiles/trace_<stamp>.json     Chrome trace events, open in chrome://tracing
+                                    or https://ui.perfetto.dev
+
+A mark is one perf_counter() call and a few array stores, and all buffers are
+allocated up front, so the profiler can stay on.
+"""
+import json
+import os
+import time
+from array import array
+from datetime import datetime
+from config import (PROFILER_ENABLED, PROFILER_FRAMES, PROFILER_SPANS, PROFILER_HUD_INTERVAL,
+                    PROFILE_DIR, RENDER_FPS)
+
+# Sleeping in the event wait: part of the frame time, but not of the work
+PHASE_WAIT = "wait"
+
+class FrameProfiler:
+    """ Rolling per-phase frame statistics plus a ring of raw spans for tracing. """
+    def __init__(self, frames=PROFILER_FRAMES, spans=PROFILER_SPANS, enabled=PROFILER_ENABLED,
+                 budget_ms=1000.0 / RENDER_FPS):
+        """
+        :param budget_ms: Work (frame time minus waiting) above this counts as a dropped frame
+        """
+        self.enabled = enabled
+        self.capacity = frames
+        self.budget_ms = budget_ms
+        self.phases = []                    # Phase names, in first-seen order
+        self._ids = {}                      # name -> index into phases
+        self._current = []                  # Seconds per phase in the frame being built
+        self._rings = []                    # Per phase: ms per frame
+        self.frame_ms = array('d', [0.0]) * frames
+        self.busy_ms = array('d', [0.0]) * frames
+        self.rx_backlog = array('l', [0]) * frames
+        self.tx_backlog = array('l', [0]) * frames
+        self.frames = 0                     # Frames recorded since start
+        self.dropped = 0
+
+        self.span_capacity = spans
+        self._span_start = array('d', [0.0]) * spans
+        self._span_length = array('d', [0.0]) * spans
+        self._span_phase = array('H', [0]) * spans
+        self.spans = 0                      # Spans recorded since start
+
+        self.origin = time.perf_counter()
+        self._last = self.origin
+        self._frame_start = self.origin
+
+        self.show_hud = False
+        self._hud_lines = []
+        self._hud_updated = 0.0
+
+    def _phase_id(self, name):
+        phase = self._ids.get(name)
+        if phase is None:
+            phase = self._ids[name] = len(self.phases)
+            self.phases.append(name)
+            self._current.append(0.0)
+            self._rings.append(array('d', [0.0]) * self.capacity)
+        return phase
+
+    def mark(self, name):
+        """ Ends a phase: charges the time since the previous mark to it. """
+        if not self.enabled: return
+        now = time.perf_counter()
+        phase = self._phase_id(name)
+        elapsed = now - self._last
+        self._current[phase] += elapsed
+        slot = self.spans % self.span_capacity
+        self._span_start[slot] = self._last
+        self._span_length[slot] = elapsed
+        self._span_phase[slot] = phase
+        self.spans += 1
+        self._last = now
+
+    def end_frame(self, rx_backlog=0, tx_backlog=0):
+        """
+        Closes the frame at the last mark (call after presenting it).
+        :param rx_backlog: Received commands not simulated yet
+        :param tx_backlog: Messages queued for the controller(s)
+        """
+        if not self.enabled: return
+        slot = self.frames % self.capacity
+        total = (self._last - self._frame_start) * 1000.0
+        wait = self._current[self._ids[PHASE_WAIT]] * 1000.0 if PHASE_WAIT in self._ids else 0.0
+        self.frame_ms[slot] = total
+        self.busy_ms[slot] = total - wait
+        self.rx_backlog[slot] = rx_backlog
+        self.tx_backlog[slot] = tx_backlog
+        if total - wait > self.budget_ms: self.dropped += 1
+        current = self._current
+        for phase, ring in enumerate(self._rings):
+            ring[slot] = current[phase] * 1000.0
+            current[phase] = 0.0
+        self.frames += 1
+        self._frame_start = self._last
+
+    # ==========================================
+    #  STATISTICS
+    # ==========================================
+
+    def _window(self):
+        """ Ring slots of the recorded frames, oldest first. """
+        count = min(self.frames, self.capacity)
+        first = self.frames - count
+        return [(first + i) % self.capacity for i in range(count)]
+
+    def summary(self):
+        """ Frame and per-phase statistics (ms) over the frames in the ring. """
+        slots = self._window()
+        if not slots: return None
+        frame = sorted(self.frame_ms[s] for s in slots)
+        busy = sorted(self.busy_ms[s] for s in slots)
+        phases = {}
+        for phase, ring in enumerate(self._rings):
+            values = [ring[s] for s in slots]
+            phases[self.phases[phase]] = {'mean': sum(values) / len(values), 'max': max(values)}
+        last = slots[-1]
+        return {
+            'frames': len(slots),
+            'frame_mean': sum(frame) / len(frame),
+            'frame_p95': frame[int(0.95 * (len(frame) - 1))],
+            'busy_mean': sum(busy) / len(busy),
+            'busy_p95': busy[int(0.95 * (len(busy) - 1))],
+            'phases': phases,
+            'dropped': self.dropped,
+            'rx_backlog': self.rx_backlog[last],
+            'tx_backlog': self.tx_backlog[last],
+        }
+
+    def hud_lines(self):
+        """ HUD text, recomputed at most every PROFILER_HUD_INTERVAL seconds. """
+        now = time.perf_counter()
+        if now - self._hud_updated < PROFILER_HUD_INTERVAL: return self._hud_lines
+        self._hud_updated = now
+        s = self.summary()
+        if s is None: return self._hud_lines
+        work = [(v['mean'], name) for name, v in s['phases'].items() if name != PHASE_WAIT]
+        slowest_ms, slowest = max(work) if work else (0.0, "-")
+        self._hud_lines = [
+            f"frame {s['frame_mean']:5.1f} ms  p95 {s['frame_p95']:5.1f}",
+            f"work  {s['busy_mean']:5.1f} ms  p95 {s['busy_p95']:5.1f}",
+            f"slowest {slowest} {slowest_ms:.2f} ms",
+            f"dropped {s['dropped']}  (> {self.budget_ms:.1f} ms)",
+            f"serial rx {s['rx_backlog']}  tx {s['tx_backlog']}",
+        ]
+        return self._hud_lines
+
+    def format_report(self):
+        """ Human readable per-phase table (mean / max ms per frame). """
+        s = self.summary()
+        if s is None: return "[PROFILE] No frames recorded"
+        lines = [f"[PROFILE] {s['frames']} frames: {s['frame_mean']:.2f} ms per frame "
+                 f"({s['busy_mean']:.2f} ms work), {s['dropped']} dropped",
+                 f"{'phase':<16}{'mean':>8}{'max':>8}"]
+        for name, v in s['phases'].items():
+            lines.append(f"{name:<16}{v['mean']:>8.2f}{v['max']:>8.2f}")
+        return "\n".join(lines)
+
+    # ==========================================
+    #  EXPORT
+    # ==========================================
+
+    def export_csv(self, path):
+        """ One row per frame in the ring: totals, backlog and ms per phase. """
+        with open(path, "w") as f:
+            f.write(",".join(["frame", "frame_ms", "busy_ms", "rx_backlog", "tx_backlog"] + self.phases) + "\n")
+            first = self.frames - min(self.frames, self.capacity)
+            for i, slot in enumerate(self._window()):
+                row = [str(first + i), f"{self.frame_ms[slot]:.3f}", f"{self.busy_ms[slot]:.3f}",
+                       str(self.rx_backlog[slot]), str(self.tx_backlog[slot])]
+                row += [f"{ring[slot]:.3f}" for ring in self._rings]
+                f.write(",".join(row) + "\n")
+
+    def export_chrome_trace(self, path):
+        """ Spans in the ring as Chrome trace 'complete' events (microseconds). """
+        count = min(self.spans, self.span_capacity)
+        first = self.spans - count
+        events = []
+        for i in range(first, self.spans):
+            slot = i % self.span_capacity
+            events.append({'name': self.phases[self._span_phase[slot]], 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': round((self._span_start[slot] - self.origin) * 1e6, 1),
+                           'dur': round(self._span_length[slot] * 1e6, 1)})
+        with open(path, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, directory=PROFILE_DIR):
+        """ Writes both exports with a timestamped name. Returns the paths. """
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_path = os.path.join(directory, f"frames_{stamp}.csv")
+        trace_path = os.path.join(directory, f"trace_{stamp}.json")
+        self.export_csv(csv_path)
+        self.export_chrome_trace(trace_path)
+        return csv_path, trace_path
+
+# Shared by main.py and renderer.py
+profiler = FrameProfiler()
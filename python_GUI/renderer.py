@@ -1,312 +1,558 @@
-import pygame
-import os
-import math
-from config import *
-
-# --- PATH SETTINGS ---
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
-
-# --- ASSET CACHE ---
-assets = {}
-fonts = {}
-
-def init_resources():
-    """ Load images and fonts if not already loaded. """
-    if 'initialized' in assets: return
-
-    pygame.font.init()
-    try:
-        fonts['normal'] = pygame.font.SysFont("Chalkboard SE", 32, bold=True)
-        fonts['large'] = pygame.font.SysFont("Chalkboard SE", 64, bold=True)
-        fonts['ui'] = pygame.font.SysFont("Arial Rounded MT Bold", 24)
-    except:
-        fonts['normal'] = pygame.font.SysFont("Arial", 32)
-        fonts['large'] = pygame.font.SysFont("Arial", 64)
-        fonts['ui'] = pygame.font.SysFont("Arial", 24)
-
-    def load_img(name, size=None):
-        path = os.path.join(ASSETS_DIR, name)
-        try:
-            img = pygame.image.load(path).convert_alpha()
-            if size:
-                img = pygame.transform.scale(img, size)
-            return img
-        except FileNotFoundError:
-            print(f"[UI Warning] Missing image: {name}")
-            return None
-
-    # --- IMAGE SIZES ---
-    hole_w = int(MOLE_RADIUS * 1.8) 
-    hole_h = int(MOLE_RADIUS * 1.8) 
-    mole_w = int(MOLE_RADIUS * 1.1) 
-    mole_h = int(MOLE_RADIUS * 1.3)
-    hammer_w = int(MOLE_RADIUS * 1.5)
-    hammer_h = int(MOLE_RADIUS * 1.5)
-
-    assets['hammer_orig'] = load_img('hammer.png', (hammer_w, hammer_h))
-    assets['bg'] = load_img('bg.png', (SCREEN_WIDTH, SCREEN_HEIGHT))
-    assets['hole'] = load_img('hole.png', (hole_w, hole_h))
-    assets['mole'] = load_img('mole.png', (mole_w, mole_h))
-    assets['mole_whacked'] = load_img('mole_whacked.png', (mole_w, mole_h))
-    
-    assets['initialized'] = True
-
-def draw_text_with_shadow(screen, text, font, color, pos, shadow_color=(0,0,0)):
-    """ Draws text with a black shadow for better visibility. """
-    shadow = font.render(text, True, shadow_color)
-    main = font.render(text, True, color)
-    screen.blit(shadow, (pos[0] + 2, pos[1] + 2))
-    screen.blit(main, pos)
-
-def draw_centered_text(screen, text, font, color, y, shadow_color=(0,0,0)):
-    """ Draws text horizontally centered at a specific Y coordinate. """
-    surf = font.render(text, True, color)
-    x = SCREEN_WIDTH // 2 - surf.get_width() // 2
-    draw_text_with_shadow(screen, text, font, color, (x, y), shadow_color)
-
-# ==========================================
-#  MAIN DRAW LOGIC
-# ==========================================
-
-def draw(screen, game):
-    """ Main render function calling specific state draw methods. """
-    init_resources()
-    
-    # Draw Background
-    if assets['bg']:
-        screen.blit(assets['bg'], (0, 0))
-    else:
-        screen.fill(COLOR_BG)
-
-    # State Dispatcher
-    if game.state == STATE_MENU:
-        _draw_menu(screen, game)
-    elif game.state == STATE_PLAYING:
-        _draw_game(screen, game)
-    elif game.state == STATE_GAMEOVER:
-        _draw_gameover(screen, game)
-    elif game.state == STATE_PAUSED:
-        _draw_game(screen, game)
-        _draw_pause_overlay(screen, game)
-    
-    # --- MULTIPLAYER SPECIFIC STATES ---
-    elif game.state == STATE_WAITING_P2:
-        _draw_waiting_p2(screen, game)
-    elif game.state == STATE_WINNER:
-        _draw_winner(screen, game)
-
-def _draw_menu(screen, game):
-    """ Draws the Main Menu with difficulty selection. """
-    draw_centered_text(screen, "WHAC-A-MOLE", fonts['large'], (255, 220, 0), 100)
-
-    start_y = 320 
-    for i, name in enumerate(MODE_NAMES):
-        color = (255, 215, 0) if i == game.difficulty else (200, 200, 200)
-        draw_centered_text(screen, name, fonts['normal'], color, start_y + i * 60)
-
-    draw_text_with_shadow(screen, "Use Potentiometer to Select", fonts['ui'], (255,255,255), (20, SCREEN_HEIGHT - 60))
-    draw_text_with_shadow(screen, "Press Yellow Button Confirm", fonts['ui'], (255,255,255), (20, SCREEN_HEIGHT - 35))
-
-def _draw_game(screen, game):
-    """ Draws the main 3x3 game grid, moles, and UI. """
-    cols = 3
-    rows = 3
-    start_x = SCREEN_WIDTH // 6
-    start_y = SCREEN_HEIGHT // 4 + 140 
-    gap_x = SCREEN_WIDTH // 3
-    gap_y = SCREEN_HEIGHT // 5 - 10 
-    
-    positions = []
-    for r in range(rows):
-        for c in range(cols):
-            x = start_x + (c * gap_x)
-            y = start_y + (r * gap_y)
-            positions.append((x, y))
-            
-    current_time = pygame.time.get_ticks() 
-    is_multi = getattr(game, 'is_multiplayer', False)
-
-    # --- MULTIPLAYER UI (Timer & Player Name) ---
-    if is_multi:
-        time_elapsed = current_time - getattr(game, 'start_time', current_time)
-        time_left = max(0, GAME_DURATION - time_elapsed)
-        seconds = math.ceil(time_left / 1000)
-        
-        timer_color = (255, 255, 255)
-        if seconds <= 5: timer_color = (255, 50, 50)
-        draw_centered_text(screen, f"Time: {seconds}", fonts['normal'], timer_color, 80)
-        
-        p_num = getattr(game, 'current_player', 1) 
-        p_text = f"PLAYER {p_num}"
-        p_color = (100, 255, 255) if p_num == 1 else (255, 100, 255)
-        draw_text_with_shadow(screen, p_text, fonts['normal'], p_color, (30, 80))
-
-    # --- DRAW HOLES AND MOLES ---
-    for i, pos in enumerate(positions):
-        # 1. Hole
-        if assets['hole']:
-            hole_w = assets['hole'].get_width()
-            hole_h = assets['hole'].get_height()
-            hole_x = pos[0] - hole_w // 2
-            hole_y = pos[1] - hole_h // 2
-            screen.blit(assets['hole'], (hole_x, hole_y))
-        else:
-            pygame.draw.circle(screen, COLOR_HOLE, pos, MOLE_RADIUS)
-        
-        # 2. Mole
-        if assets['mole']:
-            w = assets['mole'].get_width()
-            h = assets['mole'].get_height()
-            mole_x = pos[0] - w // 2
-            mole_bottom_y = pos[1] + 10 
-            
-            if i == game.current_mole_index:
-                # Alive Mole Logic (Hiding/Appearing)
-                if game.is_hiding:
-                    retreat_start_time = game.last_spawn_time + (game.spawn_interval - game.hide_duration)
-                    time_into_retreat = current_time - retreat_start_time
-                    progress = time_into_retreat / game.hide_duration
-                    if progress > 1.0: progress = 1.0
-                    if progress < 0.0: progress = 0.0
-                    visible_h = int(h * (1.0 - progress))
-                    if visible_h > 0:
-                        crop_rect = pygame.Rect(0, 0, w, visible_h)
-                        mole_cropped = assets['mole'].subsurface(crop_rect)
-                        draw_y = mole_bottom_y - visible_h
-                        screen.blit(mole_cropped, (mole_x, draw_y))
-                else:
-                    anim_duration = 150 
-                    time_elapsed = current_time - game.last_spawn_time
-                    progress = time_elapsed / anim_duration
-                    if progress >= 1.0:
-                        draw_y = mole_bottom_y - h
-                        screen.blit(assets['mole'], (mole_x, draw_y))
-                    else:
-                        visible_h = int(h * progress)
-                        if visible_h > 0:
-                            crop_rect = pygame.Rect(0, 0, w, visible_h)
-                            mole_cropped = assets['mole'].subsurface(crop_rect)
-                            draw_y = mole_bottom_y - visible_h
-                            screen.blit(mole_cropped, (mole_x, draw_y))
-            
-            elif i == game.whacked_mole_index:
-                # Whacked Mole (Squashing Animation)
-                if assets['mole_whacked']:
-                    time_since_hit = current_time - game.hit_time
-                    progress = time_since_hit / game.hit_delay_duration
-                    if progress > 1.0: progress = 1.0
-                    if progress < 0.0: progress = 0.0
-                    current_visible_ratio = game.whacked_height_ratio * (1.0 - progress)
-                    visible_h = int(h * current_visible_ratio)
-                    if visible_h > 0:
-                        crop_rect = pygame.Rect(0, 0, w, visible_h)
-                        whacked_cropped = assets['mole_whacked'].subsurface(crop_rect)
-                        draw_y = mole_bottom_y - visible_h
-                        screen.blit(whacked_cropped, (mole_x, draw_y))
-
-        # 3. Hammer Animation (With Rotation)
-        if assets.get('hammer_orig') and getattr(game, 'is_hammering', False) and i == getattr(game, 'hammer_target_index', -1):
-            duration = getattr(game, 'hammer_duration', 150) 
-            time_elapsed = current_time - game.hammer_start_time
-            progress = time_elapsed / duration
-            
-            if progress >= 1.0:
-                game.is_hammering = False
-                game.hammer_target_index = -1
-            else:
-                # Rotation: Start at 0 deg, End at 60 deg (Simple swing)
-                start_angle = 0   
-                end_angle = 60    
-                current_angle = start_angle + (end_angle - start_angle) * progress
-                
-                rotated_hammer = pygame.transform.rotate(assets['hammer_orig'], current_angle)
-                
-                # Re-center logic
-                new_rect = rotated_hammer.get_rect(center=pos)
-                new_rect.centery -= int(MOLE_RADIUS * 0.8)
-                new_rect.centerx += int(MOLE_RADIUS * 0.4) 
-                
-                screen.blit(rotated_hammer, new_rect)
-
-    # Dashboard (Score & Lives)
-    draw_text_with_shadow(screen, f"Score: {game.score}", fonts['normal'], (255, 255, 255), (30, 30), shadow_color=(50,50,50))
-    lives_color = (255, 50, 50) if game.lives < 3 else (255, 100, 100)
-    lives_surf = fonts['normal'].render(f"Lives: {game.lives}", True, lives_color)
-    draw_text_with_shadow(screen, f"Lives: {game.lives}", fonts['normal'], lives_color, (SCREEN_WIDTH - 30 - lives_surf.get_width(), 30), shadow_color=(50,50,50))
-    
-    # Show Mode Name
-    mode_str = f"Mode: {MODE_NAMES[game.difficulty]}"
-    mode_surf = fonts['ui'].render(mode_str, True, (100, 255, 100))
-    draw_text_with_shadow(screen, mode_str, fonts['ui'], (100, 255, 100), (SCREEN_WIDTH//2 - mode_surf.get_width()//2, 35), shadow_color=(50,50,50))
-
-def _draw_gameover(screen, game):
-    """ Draws Game Over screen with Restart/Quit options. """
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(200)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
-
-    draw_centered_text(screen, "GAME OVER", fonts['large'], (255, 50, 50), 150)
-    draw_centered_text(screen, f"Final Score: {game.score}", fonts['normal'], (255, 255, 255), 250)
-    
-    opts = ["RESTART", "QUIT"]
-    for i, opt in enumerate(opts):
-        color = (255, 255, 0) if i == game.game_over_selection else (150, 150, 150)
-        draw_centered_text(screen, opt, fonts['normal'], color, 400 + i*60)
-
-def _draw_pause_overlay(screen, game):
-    """ Draws semi-transparent pause menu. """
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(150) 
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
-    draw_centered_text(screen, "PAUSED", fonts['large'], (255, 255, 0), 150)
-    opts = ["RESUME", "MAIN MENU"]
-    for i, opt in enumerate(opts):
-        color = (255, 255, 0) if i == game.pause_selection else (150, 150, 150)
-        draw_centered_text(screen, opt, fonts['normal'], color, 300 + i*60)
-
-# --- MULTIPLAYER INTERMISSION ---
-def _draw_waiting_p2(screen, game):
-    """ Draws the screen between Player 1 and Player 2 turns. """
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(240)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
-
-    draw_centered_text(screen, "PLAYER 1 FINISHED!", fonts['normal'], (100, 255, 255), 150)
-    p1_score = getattr(game, 'p1_score', game.score)
-    draw_centered_text(screen, f"Score: {p1_score}", fonts['large'], (255, 255, 255), 220)
-    draw_centered_text(screen, "Player 2, Get Ready!", fonts['normal'], (255, 100, 255), 350)
-    draw_centered_text(screen, "Press Button to Start", fonts['ui'], (200, 200, 200), 450)
-
-# --- MULTIPLAYER WINNER ---
-def _draw_winner(screen, game):
-    """ Draws the final results for Multiplayer mode. """
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(240)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
-
-    s1 = getattr(game, 'p1_score', 0)
-    s2 = getattr(game, 'p2_score', 0)
-
-    if s1 > s2:
-        title = "PLAYER 1 WINS!"
-        color = (100, 255, 255)
-    elif s2 > s1:
-        title = "PLAYER 2 WINS!"
-        color = (255, 100, 255)
-    else:
-        title = "IT'S A DRAW!"
-        color = (255, 255, 255)
-
-    draw_centered_text(screen, title, fonts['large'], color, 100)
-    draw_centered_text(screen, f"P1 Score: {s1}", fonts['normal'], (100, 255, 255), 220)
-    draw_centered_text(screen, f"P2 Score: {s2}", fonts['normal'], (255, 100, 255), 280)
-
-    opts = ["PLAY AGAIN", "QUIT"]
-    for i, opt in enumerate(opts):
-        c = (255, 255, 0) if i == game.game_over_selection else (150, 150, 150)
+import pygame
+import os
+import math
+from config import *
+from text_cache import text_cache
+from asset_loader import loader
+from moles import HOLE_UP, HOLE_HIDING, HOLE_WHACKED
+from layout import board
+from profiler import profiler
+from leaderboard import leaderboard, format_entry, BOARD_ALL, BOARD_TODAY
+
+# --- PATH SETTINGS ---
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(CURRENT_DIR, 'asset')
+
+# --- ASSET CACHE ---
+assets = {}
+fonts = {}
+
+# Hammer swing end angle in degrees (one pre-rotated frame per degree)
+HAMMER_END_ANGLE = 60
+
+# Overlays are pre-built at load time for every alpha level in use
+OVERLAY_ALPHAS = (150, 200, 240)
+overlays = {}
+# Surfaces allocated after load (see allocation_count)
+surface_allocs = 0
+
+# --- DIRTY RECTANGLE STATE ---
+# Target surface -> display list drawn there in the previous gameplay frame
+# (missing = repaint everything). One entry per board in split-screen mode.
+_last_items = {}
+
+# --- SPLIT SCREEN STATE ---
+# Full-size offscreen surface and scaled pane per board, built on first use
+_split_targets = []
+_split_panes = []
+_split_layout = None
+
+# --- IMAGE SIZES (scaled to the board, see layout.py) ---
+HOLE_SIZE = board.hole_size
+MOLE_SIZE = board.mole_size
+HAMMER_SIZE = board.hammer_size
+
+# asset key -> (file, size); decoded and scaled by the background loader
+IMAGES = {
+    'hammer_orig': ('hammer.png', HAMMER_SIZE),
+    'bg': ('bg.png', (SCREEN_WIDTH, SCREEN_HEIGHT)),
+    'hole': ('hole.png', HOLE_SIZE),
+    'mole': ('mole.png', MOLE_SIZE),
+    'mole_whacked': ('mole_whacked.png', MOLE_SIZE),
+}
+
+def preload():
+    """ Starts loading the game images in the background (call once the window exists). """
+    for key, (name, size) in IMAGES.items():
+        loader.load_image(key, os.path.join(ASSETS_DIR, name), size)
+
+def init_resources():
+    """ Load images and fonts if not already loaded. """
+    if 'initialized' in assets: return
+
+    pygame.font.init()
+    try:
+        fonts['normal'] = pygame.font.SysFont("Chalkboard SE", 32, bold=True)
+        fonts['large'] = pygame.font.SysFont("Chalkboard SE", 64, bold=True)
+        fonts['ui'] = pygame.font.SysFont("Arial Rounded MT Bold", 24)
+    except:
+        fonts['normal'] = pygame.font.SysFont("Arial", 32)
+        fonts['large'] = pygame.font.SysFont("Arial", 64)
+        fonts['ui'] = pygame.font.SysFont("Arial", 24)
+    fonts['hud'] = pygame.font.SysFont("monospace", 14, bold=True)
+    fonts['board'] = pygame.font.SysFont("Arial", 18)
+
+    # Usually already decoded in the background while the setup screen ran
+    preload()
+    for key, (name, _) in IMAGES.items():
+        assets[key] = loader.image(key)
+        if assets[key] is None:
+            print(f"[UI Warning] Missing image: {name}")
+
+    assets['hammer_frames'] = _build_hammer_frames(assets['hammer_orig'])
+    if assets['hammer_frames']:
+        # Screen rect of every swing frame over every hole
+        assets['hammer_rects'] = [[rect.move(offset) for _, rect in assets['hammer_frames']]
+                                  for offset in board.hammer_offsets]
+    if assets['hole'] is None:
+        # Fallback: plain black circle, pre-drawn so it blits like the image
+        radius = HOLE_SIZE[0] // 2
+        assets['hole'] = pygame.Surface(HOLE_SIZE, pygame.SRCALPHA)
+        pygame.draw.circle(assets['hole'], COLOR_HOLE, (radius, radius), radius)
+    assets['mole_frames'] = _build_height_frames(assets['mole'])
+    assets['mole_whacked_frames'] = _build_height_frames(assets['mole_whacked'])
+
+    # Full-screen dimming overlays used by the menus
+    for alpha in OVERLAY_ALPHAS:
+        _overlay(alpha)
+    
+    assets['initialized'] = True
+
+def _build_hammer_frames(hammer):
+    """
+    Pre-rotates the hammer for every degree of the swing.
+    Each frame is (surface, rect) with the rect centered on (0, 0), so
+    rotation keeps the head in place; board.hammer_offsets places it.
+    """
+    if hammer is None: return None
+    frames = []
+    for angle in range(HAMMER_END_ANGLE + 1):
+        rotated = pygame.transform.rotate(hammer, angle)
+        frames.append((rotated, rotated.get_rect(center=(0, 0))))
+    return frames
+
+def _build_height_frames(img):
+    """
+    Returns one frame per visible height (index = pixels shown from the top)
+    for the rise / retreat / squash animations. Index 0 is None (hidden).
+    Subsurfaces share the image's pixels, so this costs no extra memory.
+    """
+    if img is None: return None
+    w, h = img.get_size()
+    return [None] + [img.subsurface((0, 0, w, visible_h)) for visible_h in range(1, h + 1)]
+
+def _overlay(alpha, color=(0, 0, 0)):
+    """ Returns the shared full-screen overlay for an alpha level, building it once. """
+    global surface_allocs
+    key = (alpha, color)
+    overlay = overlays.get(key)
+    if overlay is None:
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        overlay.set_alpha(alpha)
+        overlay.fill(color)
+        overlays[key] = overlay
+        surface_allocs += 1
+    return overlay
+
+def allocation_count():
+    """
+    Surfaces created by the renderer so far (overlays + text cache misses).
+    Sample it every frame: in steady state the difference should be 0.
+    """
+    return surface_allocs + text_cache.misses
+
+def draw_text_with_shadow(screen, text, font, color, pos, shadow_color=(0,0,0)):
+    """ Draws text with a black shadow for better visibility. """
+    screen.blit(text_cache.get(text, font, color, shadow_color), pos)
+
+def draw_centered_text(screen, text, font, color, y, shadow_color=(0,0,0)):
+    """ Draws text horizontally centered at a specific Y coordinate. """
+    text_w = text_cache.text_size(text, font, color, shadow_color)[0]
+    x = SCREEN_WIDTH // 2 - text_w // 2
+    draw_text_with_shadow(screen, text, font, color, (x, y), shadow_color)
+
+# ==========================================
+#  MAIN DRAW LOGIC
+# ==========================================
+
+def draw(screen, game, now=None):
+    """
+    Main render function calling specific state draw methods.
+    :param now: Time to animate to (ms, may be fractional); defaults to the game clock
+    Returns the list of screen rects that changed, or None if the whole
+    screen was redrawn (caller should flip instead of update).
+    """
+    init_resources()
+    if now is None: now = game.clock.get_ticks()
+
+    # Gameplay: repaint only what changed since the last frame
+    if game.state == STATE_PLAYING and DIRTY_RECT_RENDERING:
+        dirty = _draw_game_dirty(screen, game, now)
+        profiler.mark("draw_game")
+        return dirty
+    invalidate(screen)
+
+    # Draw Background
+    if assets['bg']:
+        screen.blit(assets['bg'], (0, 0))
+    else:
+        screen.fill(COLOR_BG)
+    profiler.mark("draw_background")
+
+    # State Dispatcher
+    if game.state == STATE_MENU:
+        _draw_menu(screen, game)
+        profiler.mark("draw_menu")
+    elif game.state == STATE_PLAYING:
+        _draw_game(screen, game, now)
+        profiler.mark("draw_game")
+    elif game.state == STATE_GAMEOVER:
+        _draw_gameover(screen, game)
+        profiler.mark("draw_gameover")
+    elif game.state == STATE_PAUSED:
+        _draw_game(screen, game, now)
+        profiler.mark("draw_game")
+        _draw_pause_overlay(screen, game)
+        profiler.mark("draw_pause_overlay")
+    
+    # --- MULTIPLAYER SPECIFIC STATES ---
+    elif game.state == STATE_WAITING_P2:
+        _draw_waiting_p2(screen, game)
+        profiler.mark("draw_waiting_p2")
+    elif game.state == STATE_WINNER:
+        _draw_winner(screen, game)
+        profiler.mark("draw_winner")
+
+    # Controller unplugged (head-to-head): the board stays dimmed on the menu
+    if not game.connected:
+        _draw_disconnected(screen, game)
+        profiler.mark("draw_disconnected")
+
+def _draw_menu(screen, game):
+    """ Draws the Main Menu with difficulty selection. """
+    draw_centered_text(screen, "WHAC-A-MOLE", fonts['large'], (255, 220, 0), 100)
+
+    start_y = 320 
+    for i, name in enumerate(MODE_NAMES):
+        color = (255, 215, 0) if i == game.difficulty else (200, 200, 200)
+        draw_centered_text(screen, name, fonts['normal'], color, start_y + i * 60)
+
+    draw_text_with_shadow(screen, "Use Potentiometer to Select", fonts['ui'], (255,255,255), (20, SCREEN_HEIGHT - 60))
+    draw_text_with_shadow(screen, "Press Yellow Button Confirm", fonts['ui'], (255,255,255), (20, SCREEN_HEIGHT - 35))
+
+    # --- LEADERBOARDS (in-memory, see leaderboard.py) ---
+    if leaderboard.enabled or leaderboard.loaded:
+        _draw_board(screen, "ALL TIME", BOARD_ALL, (20, 180))
+        _draw_board(screen, "TODAY", BOARD_TODAY, (20, 350))
+        if game.difficulty != MENU_QUIT:
+            _draw_board(screen, f"BEST {MODE_NAMES[game.difficulty].upper()}", game.difficulty,
+                        (SCREEN_WIDTH - 230, 180))
+
+def _draw_board(screen, title, board, pos):
+    """ One leaderboard: title and up to LEADERBOARD_SIZE entries. """
+    x, y = pos
+    draw_text_with_shadow(screen, title, fonts['ui'], (255, 215, 0), (x, y))
+    entries = leaderboard.top(board)
+    if not entries:
+        draw_text_with_shadow(screen, "No scores yet", fonts['board'], (160, 160, 160), (x, y + 32))
+    for rank, entry in enumerate(entries, 1):
+        draw_text_with_shadow(screen, format_entry(rank, entry, board), fonts['board'], (230, 230, 230),
+                              (x, y + 8 + rank * 24))
+
+def _text_items(items, key, text, font, color, pos, shadow_color=(0,0,0)):
+    """ Display-list version of draw_text_with_shadow. """
+    surf = text_cache.get(text, font, color, shadow_color)
+    items.append((key, surf.get_rect(topleft=pos), surf))
+
+def _game_items(game, current_time):
+    """
+    Builds the display list for the game screen: (key, rect, surface) tuples
+    in drawing order. The key identifies what the surface shows, so two frames
+    with equal key and rect draw identical pixels.
+    """
+    items = []
+    is_multi = getattr(game, 'is_multiplayer', False)
+
+    # --- MULTIPLAYER UI (Timer & Player Name) ---
+    if is_multi:
+        time_elapsed = current_time - getattr(game, 'start_time', current_time)
+        time_left = max(0, GAME_DURATION - time_elapsed)
+        seconds = math.ceil(time_left / 1000)
+        
+        timer_color = (255, 255, 255)
+        if seconds <= 5: timer_color = (255, 50, 50)
+        timer_text = f"Time: {seconds}"
+        x = SCREEN_WIDTH // 2 - text_cache.text_size(timer_text, fonts['normal'], timer_color, (0,0,0))[0] // 2
+        _text_items(items, ('timer', timer_text, timer_color), timer_text, fonts['normal'], timer_color, (x, 80))
+        
+        p_num = getattr(game, 'current_player', 1) 
+        p_text = f"PLAYER {p_num}"
+        p_color = (100, 255, 255) if p_num == 1 else (255, 100, 255)
+        _text_items(items, ('player', p_text, p_color), p_text, fonts['normal'], p_color, (30, 80))
+
+    # --- DRAW HOLES AND MOLES (positions from the precomputed board tables) ---
+    moles = game.moles
+    hole = assets['hole']
+    for i in range(board.holes):
+        # 1. Hole
+        items.append((('hole', i), board.hole_rects[i], hole))
+        
+        # 2. Mole
+        if assets['mole']:
+            h = MOLE_SIZE[1]
+            mole_rects = board.mole_rects[i]
+            
+            hole_state = moles.state[i]
+            if hole_state == HOLE_UP or hole_state == HOLE_HIDING:
+                # Alive Mole Logic (Hiding/Appearing)
+                if hole_state == HOLE_HIDING:
+                    retreat_start_time = moles.spawn_time[i] + (moles.lifetime[i] - game.hide_duration)
+                    time_into_retreat = current_time - retreat_start_time
+                    progress = time_into_retreat / game.hide_duration
+                    if progress > 1.0: progress = 1.0
+                    if progress < 0.0: progress = 0.0
+                    visible_h = int(h * (1.0 - progress))
+                else:
+                    time_elapsed = current_time - moles.spawn_time[i]
+                    progress = time_elapsed / MOLE_RISE_DURATION
+                    visible_h = h if progress >= 1.0 else int(h * progress)
+                if visible_h > 0:
+                    items.append((('mole', i, visible_h), mole_rects[visible_h], assets['mole_frames'][visible_h]))
+            
+            elif hole_state == HOLE_WHACKED:
+                # Whacked Mole (Squashing Animation)
+                if assets['mole_whacked']:
+                    time_since_hit = current_time - moles.hit_time[i]
+                    progress = time_since_hit / game.hit_delay_duration
+                    if progress > 1.0: progress = 1.0
+                    if progress < 0.0: progress = 0.0
+                    current_visible_ratio = moles.hit_ratio[i] * (1.0 - progress)
+                    visible_h = int(h * current_visible_ratio)
+                    if visible_h > 0:
+                        items.append((('whacked', i, visible_h), mole_rects[visible_h], assets['mole_whacked_frames'][visible_h]))
+
+        # 3. Hammer Animation (pre-rotated frame per degree)
+        if assets.get('hammer_frames') and getattr(game, 'is_hammering', False) and i == getattr(game, 'hammer_target_index', -1):
+            duration = getattr(game, 'hammer_duration', 150) 
+            time_elapsed = current_time - game.hammer_start_time
+            progress = time_elapsed / duration
+            
+            if progress >= 1.0:
+                game.is_hammering = False
+                game.hammer_target_index = -1
+            else:
+                # Rotation: Start at 0 deg, End at HAMMER_END_ANGLE (Simple swing)
+                frame = int(HAMMER_END_ANGLE * max(0.0, progress) + 0.5)
+                items.append((('hammer', i, frame), assets['hammer_rects'][i][frame], assets['hammer_frames'][frame][0]))
+
+    # Dashboard (Score & Lives)
+    score_text = f"Score: {game.score}"
+    _text_items(items, ('score', score_text), score_text, fonts['normal'], (255, 255, 255), (30, 30), shadow_color=(50,50,50))
+    lives_color = (255, 50, 50) if game.lives < 3 else (255, 100, 100)
+    lives_text = f"Lives: {game.lives}"
+    lives_w = text_cache.text_size(lives_text, fonts['normal'], lives_color, (50,50,50))[0]
+    _text_items(items, ('lives', lives_text, lives_color), lives_text, fonts['normal'], lives_color, (SCREEN_WIDTH - 30 - lives_w, 30), shadow_color=(50,50,50))
+    
+    # Show Mode Name
+    mode_str = f"Mode: {MODE_NAMES[game.difficulty]}"
+    mode_w = text_cache.text_size(mode_str, fonts['ui'], (100, 255, 100), (50,50,50))[0]
+    _text_items(items, ('mode', mode_str), mode_str, fonts['ui'], (100, 255, 100), (SCREEN_WIDTH//2 - mode_w//2, 35), shadow_color=(50,50,50))
+    return items
+
+def _draw_game(screen, game, now):
+    """ Draws the game board, moles, and UI. """
+    for _, rect, surf in _game_items(game, now):
+        screen.blit(surf, rect)
+
+def _restore_background(screen, rect):
+    """ Repaints one region of the background. """
+    if assets['bg']:
+        screen.blit(assets['bg'], rect, rect)
+    else:
+        screen.fill(COLOR_BG, rect)
+
+def _draw_game_dirty(screen, game, now):
+    """
+    Dirty-rectangle version of the game screen.
+    Diffs this frame's display list against the previous one and repaints
+    only the regions whose content changed. Returns the list of updated rects.
+    """
+    items = _game_items(game, now)
+    last_items = _last_items.get(screen)
+    _last_items[screen] = items
+
+    if last_items is None:
+        # First frame (or after another screen): full repaint
+        _restore_background(screen, screen.get_rect())
+        for _, rect, surf in items:
+            screen.blit(surf, rect)
+        return [screen.get_rect()]
+
+    # Anything added, removed, changed or moved is dirty (old and new position)
+    previous = {key: rect for key, rect, _ in last_items}
+    current = set()
+    changed = []
+    for key, rect, _ in items:
+        current.add(key)
+        if previous.get(key) != rect:
+            changed.append(rect)
+            old = previous.get(key)
+            if old is not None: changed.append(old)
+    for key, rect in previous.items():
+        if key not in current:
+            changed.append(rect)
+    if not changed:
+        return []
+
+    # Merge overlapping regions so nothing is painted twice
+    dirty = []
+    for rect in changed:
+        rect = rect.clip(screen.get_rect())
+        i = 0
+        while i < len(dirty):
+            if dirty[i].colliderect(rect):
+                rect = rect.union(dirty.pop(i))
+                i = 0
+            else:
+                i += 1
+        if rect.width and rect.height:
+            dirty.append(rect)
+
+    # Repaint each region: background first, then every item touching it
+    for region in dirty:
+        screen.set_clip(region)
+        _restore_background(screen, region)
+        for _, rect, surf in items:
+            if rect.colliderect(region):
+                screen.blit(surf, rect)
+    screen.set_clip(None)
+    return dirty
+
+def invalidate(screen=None):
+    """ Forces the next dirty-rectangle frame to repaint the whole screen (or every target). """
+    if screen is None:
+        _last_items.clear()
+    else:
+        _last_items.pop(screen, None)
+
+# ==========================================
+#  SPLIT SCREEN (one board per controller)
+# ==========================================
+
+def draw_split(screen, games, now=None):
+    """
+    Head-to-head view: every game is drawn at full size into its own offscreen
+    surface (keeping its own dirty-rectangle state) and scaled into a pane.
+    Only panes whose board changed are rescaled.
+    Returns the changed screen rects, or None after a full repaint.
+    """
+    global _split_layout, surface_allocs
+    init_resources()
+    count = len(games)
+    cols = 1 if count == 1 else 2
+    rows = (count + cols - 1) // cols
+    scale = min(1.0 / cols, 1.0 / rows)
+    pane_size = (int(SCREEN_WIDTH * scale), int(SCREEN_HEIGHT * scale))
+    # Panes centered in a cols x rows grid
+    cell_w, cell_h = SCREEN_WIDTH // cols, SCREEN_HEIGHT // rows
+
+    full_repaint = _split_layout != (count, pane_size)
+    if full_repaint:
+        _split_layout = (count, pane_size)
+        _split_targets[:] = [pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert() for _ in range(count)]
+        _split_panes[:] = [pygame.Surface(pane_size).convert() for _ in range(count)]
+        surface_allocs += 2 * count
+        screen.fill((0, 0, 0))
+
+    updated = []
+    for i, game in enumerate(games):
+        target, pane = _split_targets[i], _split_panes[i]
+        if full_repaint: invalidate(target)
+        dirty = draw(target, game, now)
+        if dirty == []: continue
+        pygame.transform.smoothscale(target, pane_size, pane)
+        cell_x, cell_y = (i % cols) * cell_w, (i // cols) * cell_h
+        pane_rect = pane.get_rect(center=(cell_x + cell_w // 2, cell_y + cell_h // 2))
+        screen.blit(pane, pane_rect)
+        draw_text_with_shadow(screen, f"P{i + 1}", fonts['ui'], (255, 215, 0), (pane_rect.x + 8, pane_rect.bottom - 32))
+        updated.append(pane_rect)
+        profiler.mark("draw_split")
+    return None if full_repaint else updated
+
+# ==========================================
+#  PROFILER HUD (F1)
+# ==========================================
+
+_hud_lines = None
+_hud_surface = None
+
+def draw_hud(screen, lines):
+    """
+    Draws the profiler panel in the bottom-right corner. The panel is opaque,
+    so it can be redrawn over itself, and is only re-rendered when the text
+    changes. Returns its screen rect.
+    """
+    global _hud_lines, _hud_surface
+    init_resources()
+    if lines != _hud_lines or _hud_surface is None:
+        font = fonts['hud']
+        line_h = font.get_linesize()
+        width = max([font.size(line)[0] for line in lines] + [1]) + 12
+        height = line_h * len(lines) + 8
+        if _hud_surface is not None:
+            # Never shrink: the new panel must cover the previous one
+            width = max(width, _hud_surface.get_width())
+            height = max(height, _hud_surface.get_height())
+        _hud_surface = pygame.Surface((width, height))
+        _hud_surface.fill((20, 20, 20))
+        for i, line in enumerate(lines):
+            _hud_surface.blit(font.render(line, True, (120, 255, 120)), (6, 4 + i * line_h))
+        _hud_lines = list(lines)
+    rect = _hud_surface.get_rect(bottomright=(screen.get_width() - 8, screen.get_height() - 8))
+    screen.blit(_hud_surface, rect)
+    return rect
+
+def _draw_gameover(screen, game):
+    """ Draws Game Over screen with Restart/Quit options. """
+    screen.blit(_overlay(200), (0, 0))
+
+    draw_centered_text(screen, "GAME OVER", fonts['large'], (255, 50, 50), 150)
+    draw_centered_text(screen, f"Final Score: {game.score}", fonts['normal'], (255, 255, 255), 250)
+    
+    opts = ["RESTART", "QUIT"]
+    for i, opt in enumerate(opts):
+        color = (255, 255, 0) if i == game.game_over_selection else (150, 150, 150)
+        draw_centered_text(screen, opt, fonts['normal'], color, 400 + i*60)
+
+def _draw_pause_overlay(screen, game):
+    """ Draws semi-transparent pause menu. """
+    screen.blit(_overlay(150), (0, 0))
+    draw_centered_text(screen, "PAUSED", fonts['large'], (255, 255, 0), 150)
+    opts = ["RESUME", "MAIN MENU"]
+    for i, opt in enumerate(opts):
+        color = (255, 255, 0) if i == game.pause_selection else (150, 150, 150)
+        draw_centered_text(screen, opt, fonts['normal'], color, 300 + i*60)
+
+def _draw_disconnected(screen, game):
+    """ Draws the notice over a board whose controller was unplugged. """
+    screen.blit(_overlay(240), (0, 0))
+    draw_centered_text(screen, "DISCONNECTED", fonts['large'], (255, 80, 80), 220)
+    draw_centered_text(screen, f"Controller P{game.controller + 1} was unplugged", fonts['normal'], (200, 200, 200), 320)
+
+# --- MULTIPLAYER INTERMISSION ---
+def _draw_waiting_p2(screen, game):
+    """ Draws the screen between Player 1 and Player 2 turns. """
+    screen.blit(_overlay(240), (0, 0))
+
+    draw_centered_text(screen, "PLAYER 1 FINISHED!", fonts['normal'], (100, 255, 255), 150)
+    p1_score = getattr(game, 'p1_score', game.score)
+    draw_centered_text(screen, f"Score: {p1_score}", fonts['large'], (255, 255, 255), 220)
+    draw_centered_text(screen, "Player 2, Get Ready!", fonts['normal'], (255, 100, 255), 350)
+    draw_centered_text(screen, "Press Button to Start", fonts['ui'], (200, 200, 200), 450)
+
+# --- MULTIPLAYER WINNER ---
+def _draw_winner(screen, game):
+    """ Draws the final results for Multiplayer mode. """
+    screen.blit(_overlay(240), (0, 0))
+
+    s1 = getattr(game, 'p1_score', 0)
+    s2 = getattr(game, 'p2_score', 0)
+
+    if s1 > s2:
+        title = "PLAYER 1 WINS!"
+        color = (100, 255, 255)
+    elif s2 > s1:
+        title = "PLAYER 2 WINS!"
+        color = (255, 100, 255)
+    else:
+        title = "IT'S A DRAW!"
+        color = (255, 255, 255)
+
+    draw_centered_text(screen, title, fonts['large'], color, 100)
+    draw_centered_text(screen, f"P1 Score: {s1}", fonts['normal'], (100, 255, 255), 220)
+    draw_centered_text(screen, f"P2 Score: {s2}", fonts['normal'], (255, 100, 255), 280)
+
+    opts = ["PLAY AGAIN", "QUIT"]
+    for i, opt in enumerate(opts):
+        c = (255, 255, 0) if i == game.game_over_selection else (150, 150, 150)
         draw_centered_text(screen, opt, fonts['normal'], c, 400 + i*60)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Session record & replay.
+
+While the game runs, SessionRecorder writes one line per simulation step that
+handled serial commands: the step's game time and the commands. The game
+logic runs in fixed steps (tick_ms in the header), so together with the RNG
+seed and the start time this is enough to rebuild the exact GameState history.
+
+    python replay.py sessions/session_20260101_120000.log            # real time, rendered
+    python replay.py sessions/*.log --speed 100 --headless           # 100x, no window
+    python replay.py sessions/*.log --max --headless                 # as fast as possible
+
+File format (text, tab separated):
+    {"format": "wam-session", "version": 2, "seed": 123, "start": 850, "tick_ms": 2, ...}
+    <ticks>[\t<command>]*          <- one line per step with commands, last line = end time
+
+Version 1 logs (no tick_ms) have one line per rendered frame and are replayed
+frame by frame.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+SESSION_FORMAT = "wam-session"
+SESSION_VERSION = 2
+
+class SessionRecorder:
+    """ Appends one line per simulation step with input to a session log. """
+    def __init__(self, directory, seed, start_ticks, tick_ms):
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(directory, f"session_{stamp}.log")
+        self.file = open(self.path, "w", buffering=64 * 1024)
+        header = {'format': SESSION_FORMAT, 'version': SESSION_VERSION,
+                  'seed': seed, 'start': start_ticks, 'tick_ms': tick_ms,
+                  'started': datetime.now().isoformat(timespec='seconds')}
+        self.file.write(json.dumps(header) + "\n")
+        print(f"[REPLAY] Recording session to {self.path}")
+
+    def frame(self, ticks, commands):
+        """ Records the step time and the commands processed in it. """
+        if commands:
+            self.file.write(f"{ticks}\t" + "\t".join(commands) + "\n")
+        else:
+            self.file.write(f"{ticks}\n")
+
+    def close(self, end_ticks=None):
+        """ Writes the end time (so replays run to the same point) and closes the log. """
+        if self.file.closed: return
+        if end_ticks is not None:
+            self.frame(end_ticks, [])
+        self.file.close()
+
+def load_session(path):
+    """ Returns (header, frames) where frames is a list of (ticks, [commands]). """
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get('format') != SESSION_FORMAT:
+            raise ValueError(f"{path} is not a session log")
+        frames = []
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if parts[0]:
+                frames.append((int(parts[0]), parts[1:]))
+    return header, frames
+
+class NullSerial:
+    """ Stand-in for SerialManager during replays: counts what would have been sent. """
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, message):
+        self.sent += 1
+
+def replay_session(path, speed=1.0, screen=None):
+    """
+    Feeds a recorded session back through GameState.
+    :param speed: Time warp factor (1.0 = real time), None = as fast as possible
+    :param screen: Surface to render every frame to, None for headless
+    :return: dict with the final game state and timing
+    """
+    import pygame
+    import renderer
+    from game_clock import ManualClock
+    from game_state import GameState
+
+    from audio import init_mixer
+
+    # A previous replay may have ended with the in-game "Quit" (pygame.quit())
+    if not pygame.get_init():
+        init_mixer()
+        pygame.init()
+
+    header, frames = load_session(path)
+    tick_ms = header.get('tick_ms')
+    if tick_ms:
+        # Fixed-step log: every step between start and end, commands where recorded
+        first_tick = header['start']
+        last_tick = frames[-1][0] if frames else first_tick
+        recorded = {}
+        for t, cmds in frames:
+            recorded.setdefault(t, []).extend(cmds)
+        steps = ((t, recorded.get(t, ())) for t in range(first_tick + tick_ms, last_tick + 1, tick_ms))
+        render_every = max(1, round(1000 / 60 / tick_ms))
+    else:
+        # Version 1: one line per frame
+        first_tick = frames[0][0] if frames else 0
+        last_tick = frames[-1][0] if frames else 0
+        steps = frames
+        render_every = 1
+
+    clock = ManualClock(first_tick)
+    game = GameState(NullSerial(), clock=clock, seed=header['seed'])
+
+    commands = 0
+    step_count = 0
+    wall_start = time.perf_counter()
+    try:
+        for ticks, cmds in steps:
+            if speed:
+                due = wall_start + (ticks - first_tick) / 1000.0 / speed
+                delay = due - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+
+            clock.set(ticks)
+            if cmds:
+                game.process_batch(cmds)   # Same batches as the live game loop
+            commands += len(cmds)
+            game.update()
+            step_count += 1
+
+            if screen is not None and step_count % render_every == 0:
+                renderer.draw(screen, game)
+                pygame.display.flip()
+                pygame.event.pump()
+    except SystemExit:
+        pass # The player chose "Quit" in the recorded session
+
+    wall_ms = (time.perf_counter() - wall_start) * 1000.0
+    return {
+        'path': path,
+        'steps': step_count,
+        'commands': commands,
+        'game_ms': last_tick - first_tick,
+        'wall_ms': wall_ms,
+        'state': game.state,
+        'score': game.score,
+        'lives': game.lives,
+        'p1_score': game.p1_score,
+        'p2_score': game.p2_score,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Whac-A-Mole sessions")
+    parser.add_argument('sessions', nargs='+', help="Session log files")
+    parser.add_argument('--speed', type=float, default=1.0, help="Time warp factor (default 1x)")
+    parser.add_argument('--max', action='store_true', help="Replay as fast as possible")
+    parser.add_argument('--headless', action='store_true', help="Do not open a window or play audio")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+    import pygame
+    from audio import init_mixer
+    from config import SCREEN_WIDTH, SCREEN_HEIGHT
+    init_mixer()
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Whac-A-Mole Replay")
+
+    speed = None if args.max else args.speed
+    total_steps = 0
+    total_wall = 0.0
+    for path in args.sessions:
+        result = replay_session(path, speed, None if args.headless else screen)
+        total_steps += result['steps']
+        total_wall += result['wall_ms']
+        print(f"[REPLAY] {os.path.basename(path)}: state={result['state']} score={result['score']} "
+              f"lives={result['lives']} steps={result['steps']} commands={result['commands']} "
+              f"game={result['game_ms'] / 1000:.1f}s wall={result['wall_ms']:.0f}ms")
+
+    if total_wall > 0:
+        print(f"[REPLAY] {len(args.sessions)} session(s), {total_steps} steps in {total_wall:.0f} ms "
+              f"({total_steps / total_wall * 1000:.0f} steps/s)")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Session telemetry: every game event as a 16-byte binary record.
+
+GameState calls telemetry.log() for spawns, hits, misses, timeouts, pauses,
+bonus lives, state changes and inbound controller commands. A call packs one
+record into a preallocated ring buffer (no allocation, no I/O); a background
+thread copies what has accumulated to disk in one large sequential write every
+TELEMETRY_FLUSH_INTERVAL seconds, or sooner when the ring is half full.
+
+File layout (little endian), telemetry/telemetry_<stamp>_<part>.wamt:
+
+    header   32 bytes   '<4sHHdQ8x'  magic b"WAMT", version, record size,
+                                     wall clock at creation (time.time()), seed
+    records  16 bytes   '<dBBHf'     time   game clock (ms)
+                                     kind   event (low 4 bits) | controller << 4
+                                     a      hole / state / opcode / flag
+                                     b      interval / reaction time / lives / value
+                                     value  whacked height ratio, 0.0 otherwise
+
+A file is closed and the next part started once it reaches
+TELEMETRY_MAX_FILE_BYTES; only the newest TELEMETRY_MAX_FILES parts are kept.
+If the writer ever falls a full ring behind, new events are dropped (counted)
+rather than blocking the game.
+
+    python telemetry.py telemetry/telemetry_20250101_120000_000.wamt   # print the events
+"""
+import glob
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from config import (TELEMETRY_DIR, TELEMETRY_RING_RECORDS, TELEMETRY_FLUSH_INTERVAL,
+                    TELEMETRY_MAX_FILE_BYTES, TELEMETRY_MAX_FILES)
+
+MAGIC = b"WAMT"
+VERSION = 1
+HEADER = struct.Struct('<4sHHdQ8x')
+RECORD = struct.Struct('<dBBHf')
+FILE_PATTERN = "telemetry_*.wamt"
+
+# --- Event kinds (low 4 bits of the kind byte; moles.EV_* are scheduler events) ---
+TEL_SPAWN = 1        # a = hole, b = mole lifetime (ms)
+TEL_HIT = 2          # a = hole, b = reaction time (ms), value = whacked height ratio
+TEL_MISS = 3         # a = hole pressed
+TEL_TIMEOUT = 4      # a = hole, b = lives left
+TEL_PAUSE = 5        # a = 1 paused / 0 resumed, b = pause duration (ms, on resume)
+TEL_BONUS_LIFE = 6   # b = lives after the bonus
+TEL_STATE = 7        # a = new state, b = previous state
+TEL_COMMAND = 8      # a = opcode (comms.OP_*), b = pot value / button
+TEL_GAME = 9         # a = mode (MODE_*), b = lives; a game or multiplayer turn starts
+
+EVENT_NAMES = {TEL_SPAWN: "spawn", TEL_HIT: "hit", TEL_MISS: "miss", TEL_TIMEOUT: "timeout",
+               TEL_PAUSE: "pause", TEL_BONUS_LIFE: "bonus_life", TEL_STATE: "state", TEL_COMMAND: "command",
+               TEL_GAME: "game"}
+
+class TelemetryLog:
+    """ Ring buffer of packed records, drained to rotating files by a writer thread. """
+    def __init__(self, directory=TELEMETRY_DIR, records=TELEMETRY_RING_RECORDS,
+                 flush_interval=TELEMETRY_FLUSH_INTERVAL, max_file_bytes=TELEMETRY_MAX_FILE_BYTES,
+                 max_files=TELEMETRY_MAX_FILES):
+        self.directory = directory
+        self.capacity = records
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.enabled = False                # Off until start(): replays and benchmarks log nothing
+
+        self._ring = bytearray(records * RECORD.size)
+        self._view = memoryview(self._ring)
+        self._pack = RECORD.pack_into
+        self._head = 0                      # Records logged (written by the game thread only)
+        self._tail = 0                      # Records on disk (written by the writer thread only)
+        self._wake_at = records // 2
+        self.dropped = 0
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._file = None
+        self._file_bytes = 0
+        self._part = 0
+        self._stamp = None
+        self.seed = 0
+        self.bytes_written = 0
+        self.paths = []                     # Parts written this session
+
+    def start(self, seed=0):
+        """ Opens the first file and starts the writer thread. """
+        if self._thread is not None: return
+        self.seed = seed
+        self._stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_part()
+        self.enabled = True
+        self._thread = threading.Thread(target=self._writer_loop, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        print(f"[TELEMETRY] Logging events to {self._file.name}")
+
+    def log(self, time_ms, event, a=0, b=0, value=0.0, controller=0):
+        """
+        Appends one record (game thread). Costs a pack_into and two int stores.
+        :param b: Clamped to 0..65535
+        """
+        if not self.enabled: return
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return
+        if b > 0xFFFF: b = 0xFFFF
+        elif b < 0: b = 0
+        self._pack(self._ring, (head % self.capacity) * RECORD.size,
+                   time_ms, event | (controller << 4), a, b, value)
+        self._head = head + 1
+        if head + 1 - self._tail == self._wake_at:
+            self._wake.set()
+
+    def close(self):
+        """ Writes out everything logged so far and stops the writer. """
+        if self._thread is None: return
+        self.enabled = False
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        print(f"[TELEMETRY] {self._head} events, "
+              f"{self.bytes_written / 1024:.1f} KiB in {len(self.paths)} file(s)"
+              + (f", {self.dropped} dropped" if self.dropped else ""))
+
+    # ==========================================
+    #  WRITER THREAD
+    # ==========================================
+
+    def _writer_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+            try:
+                self._flush()
+            except OSError as e:
+                print(f"[TELEMETRY] Write failed, logging stopped: {e}")
+                self.enabled = False
+                return
+            if stopping: return
+
+    def _flush(self):
+        """ Copies the records between tail and head out of the ring in one write. """
+        head = self._head
+        tail = self._tail
+        if head == tail: return
+        size = RECORD.size
+        start = (tail % self.capacity) * size
+        end = (head % self.capacity) * size
+        if start < end:
+            data = self._view[start:end].tobytes()
+        else:   # Wrapped around (or exactly one full ring)
+            data = self._view[start:].tobytes() + self._view[:end].tobytes()
+        # Slots may be reused as soon as the tail moves, so copy first
+        self._tail = head
+
+        room = (self.max_file_bytes - self._file_bytes) // size * size
+        while len(data) > room:
+            if room > 0: self._write(data[:room])
+            data = data[room:]
+            self._open_part()
+            room = (self.max_file_bytes - self._file_bytes) // size * size
+        self._write(data)
+
+    def _write(self, data):
+        self._file.write(data)
+        self._file.flush()
+        self._file_bytes += len(data)
+        self.bytes_written += len(data)
+
+    def _open_part(self):
+        """ Starts the next file (with its own header) and removes the oldest beyond max_files. """
+        if self._file is not None: self._file.close()
+        path = os.path.join(self.directory, f"telemetry_{self._stamp}_{self._part:03d}.wamt")
+        self._part += 1
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time(), self.seed))
+        self._file_bytes = HEADER.size
+        self.bytes_written += HEADER.size
+        self.paths.append(path)
+        for old in sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)))[:-self.max_files]:
+            try: os.remove(old)
+            except OSError: pass
+
+# ==========================================
+#  READING
+# ==========================================
+
+def read_header(f):
+    """ Parses the file header. Returns a dict, raises ValueError for other files. """
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("not a telemetry file (too short)")
+    magic, version, record_size, created, seed = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("not a telemetry file")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"unsupported telemetry version {version} (record size {record_size})")
+    return {'version': version, 'record_size': record_size, 'created': created, 'seed': seed}
+
+def read_events(path):
+    """ Header dict and a list of (time_ms, event, controller, a, b, value). """
+    with open(path, "rb") as f:
+        header = read_header(f)
+        data = f.read()
+    # A file cut short by a crash may end in a partial record
+    data = data[:len(data) // RECORD.size * RECORD.size]
+    events = [(t, kind & 0x0F, kind >> 4, a, b, value) for t, kind, a, b, value in RECORD.iter_unpack(data)]
+    return header, events
+
+def format_event(event):
+    t, kind, controller, a, b, value = event
+    text = f"{t:12.1f}  P{controller + 1}  {EVENT_NAMES.get(kind, kind)!s:<11}"
+    if kind == TEL_HIT: return text + f"hole {a}  {b} ms  ratio {value:.2f}"
+    if kind == TEL_SPAWN: return text + f"hole {a}  {b} ms"
+    if kind in (TEL_MISS, TEL_TIMEOUT): return text + f"hole {a}" + (f"  lives {b}" if kind == TEL_TIMEOUT else "")
+    if kind == TEL_PAUSE: return text + ("paused" if a else f"resumed after {b} ms")
+    if kind == TEL_BONUS_LIFE: return text + f"lives {b}"
+    if kind == TEL_STATE: return text + f"{b} -> {a}"
+    if kind == TEL_GAME: return text + f"mode {a}  lives {b}"
+    return text + f"0x{a:02X} {b}"
+
+# Shared by main.py (starts it if TELEMETRY_ENABLED) and game_state.py
+telemetry = TelemetryLog()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"usage: python {os.path.basename(__file__)} <file.wamt>")
+        sys.exit(1)
+    header, events = read_events(sys.argv[1])
+    print(f"[TELEMETRY] {len(events)} events, seed {header['seed']}, "
+          f"created {datetime.fromtimestamp(header['created']).isoformat(timespec='seconds')}")
+    for event in events:
+        print(format_event(event))
@@ -0,0 +1,65 @@
+import pygame
+from collections import OrderedDict
+from config import TEXT_CACHE_SIZE
+
+# Drop shadow offset in pixels (right and down)
+SHADOW_OFFSET = 2
+
+class TextCache:
+    """
+    LRU cache of rendered text.
+    Key: (text, font, color, shadow_color) -> one pre-composited surface with
+    the drop shadow already blended in, so drawing a label is a single blit and
+    unchanged labels never touch the font rasterizer again.
+    """
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text, font, color, shadow_color=None):
+        """
+        Returns the surface for the label. With a shadow_color the surface is
+        SHADOW_OFFSET px wider/taller than the text; the text sits at (0, 0).
+        """
+        key = (text, font, color, shadow_color)
+        entries = self._entries
+        surf = entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        main = font.render(text, True, color)
+        if shadow_color is None:
+            surf = main
+        else:
+            w, h = main.get_size()
+            surf = pygame.Surface((w + SHADOW_OFFSET, h + SHADOW_OFFSET), pygame.SRCALPHA)
+            surf.blit(font.render(text, True, shadow_color), (SHADOW_OFFSET, SHADOW_OFFSET))
+            surf.blit(main, (0, 0))
+
+        entries[key] = surf
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def text_size(self, text, font, color, shadow_color=None):
+        """ Size of the text itself (without shadow), rendering it if needed. """
+        w, h = self.get(text, font, color, shadow_color).get_size()
+        if shadow_color is None: return w, h
+        return w - SHADOW_OFFSET, h - SHADOW_OFFSET
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self):
+        self._entries.clear()
+
+# Shared by renderer.py and input_screen.py
+text_cache = TextCache()
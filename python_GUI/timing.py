@@ -0,0 +1,33 @@
+import time
+
+class PhaseTimer:
+    """
+    Measures consecutive phases (e.g. of the startup) with time.perf_counter().
+    Each mark() closes the phase that started at the previous mark.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []    # (name, seconds)
+
+    def mark(self, name):
+        """ Ends the current phase under the given name and starts the next one. """
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def add(self, name, seconds):
+        """ Records a duration measured elsewhere (shown indented, not part of the total). """
+        self.phases.append(("  " + name, seconds))
+
+    def total(self):
+        return self._last - self.start
+
+    def format_report(self, title="startup"):
+        """ Human readable table of the recorded phases in milliseconds. """
+        width = max([len(name) for name, _ in self.phases] + [len(title), 5])
+        lines = [f"{title:<{width}}{'ms':>10}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<{width}}{seconds * 1000.0:>10.1f}")
+        lines.append(f"{'total':<{width}}{self.total() * 1000.0:>10.1f}")
+        return "\n".join(lines)